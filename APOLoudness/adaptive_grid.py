@@ -0,0 +1,412 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+from bulk_fir_filter_generator import BulkFIRFilterGenerator, phon_axis_values
+from preamp_codegen import KOTLIN_PACKAGE
+
+
+GRID_FILENAME = "adaptive_grid.json"
+
+
+def normalized_curves(generator, phons):
+    """
+    폰 값별 1kHz 정규화 곡선 H (dB, (N, len(iso_freq)))
+
+    (타겟, 참조) 필터의 상대 이득은 H(타겟) - H(참조)이므로, 같은 참조에서 타겟만 바뀐 두 필터의
+    최대 dB 차이는 max|H(t) - H(t')|이고 참조와 무관합니다 (참조 축도 마찬가지).
+    """
+    phons = np.asarray(phons, dtype=float)
+    gains_db = 20 * np.log10(generator._relative_gains_matrix(
+        np.column_stack((phons, np.full(len(phons), phons[0])))))
+    # 참조를 phons[0]으로 고정했으므로 H(t) - H(phons[0]), 차이에는 영향 없음
+    return gains_db
+
+
+def plan_axis(phons, curves, upper_db, lower_db=None):
+    """
+    1차원 축에서 가장 가까운 격자점 (폰 거리, 같으면 작은 쪽)으로 조회했을 때
+    모든 후보 값의 주파수별 곡선 오차 (후보 - 격자점, dB)가 [lower_db, upper_db] 안에 들도록 격자점을 고름 (양 끝 포함)
+
+    현재 격자점에서 다음 격자점을 가능한 한 멀리 잡는 탐욕 방식입니다 (셀 병합).
+    곡선이 빠르게 휘는 구간에서는 셀이 자동으로 촘촘해집니다 (세분).
+
+    Args:
+        upper_db: 오차 상한 (스칼라 또는 주파수별 배열)
+        lower_db: 오차 하한 (None이면 -upper_db)
+
+    Returns:
+        선택한 후보 인덱스 배열
+    """
+    upper_db = np.broadcast_to(np.asarray(upper_db, dtype=float), curves.shape[1:])
+    lower_db = -upper_db if lower_db is None else np.broadcast_to(np.asarray(lower_db, dtype=float), upper_db.shape)
+    phons_x10 = np.round(np.asarray(phons) * 10).astype(int)
+    last = len(phons_x10) - 1
+    chosen = [0]
+    while chosen[-1] < last:
+        start = chosen[-1]
+        best = start + 1
+        for end in range(start + 2, last + 1):
+            between = np.arange(start + 1, end)
+            near_start = phons_x10[between] - phons_x10[start] <= phons_x10[end] - phons_x10[between]
+            nearest = np.where(near_start, start, end)
+            errors = curves[between] - curves[nearest]
+            if np.all(errors <= upper_db) and np.all(errors >= lower_db):
+                best = end
+            elif np.any(np.abs(curves[end] - curves[start]) > upper_db - lower_db):
+                # 이보다 먼 격자점은 중간점 오차가 허용 폭을 넘으므로 탐색 종료
+                break
+        chosen.append(best)
+    return np.array(chosen)
+
+
+def nearest_indices(axis_x10, query_x10):
+    """정렬된 축에서 가장 가까운 값의 인덱스 (같으면 작은 쪽)"""
+    axis_x10 = np.asarray(axis_x10)
+    query_x10 = np.asarray(query_x10)
+    upper = np.clip(np.searchsorted(axis_x10, query_x10, side='left'), 1, len(axis_x10) - 1) \
+        if len(axis_x10) > 1 else np.zeros(query_x10.shape, dtype=int)
+    if len(axis_x10) == 1:
+        return upper
+    lower = upper - 1
+    return np.where(query_x10 - axis_x10[lower] <= axis_x10[upper] - query_x10, lower, upper)
+
+
+class AdaptiveGrid:
+    """
+    비균일 (타겟 축 x 참조 축) 필터 격자와 가장 가까운 필터 조회
+
+    필터 순서는 generate_filter_range와 같은 타겟 우선 (filter_index = 타겟 인덱스 x 참조 수 + 참조 인덱스)이며,
+    target_range / reference_range를 generate_filter_range에 그대로 넘겨 필터를 생성합니다.
+    """
+
+    def __init__(self, target_axis, reference_axis, threshold_db=None, stats=None):
+        self.target_axis = np.round(np.asarray(target_axis, dtype=float), 1)
+        self.reference_axis = np.round(np.asarray(reference_axis, dtype=float), 1)
+        self.threshold_db = threshold_db
+        self.stats = stats or {}
+        self._target_x10 = np.round(self.target_axis * 10).astype(int)
+        self._reference_x10 = np.round(self.reference_axis * 10).astype(int)
+
+    @property
+    def target_range(self):
+        return {'values': [float(value) for value in self.target_axis]}
+
+    @property
+    def reference_range(self):
+        return {'values': [float(value) for value in self.reference_axis]}
+
+    def __len__(self):
+        return len(self.target_axis) * len(self.reference_axis)
+
+    def nearest(self, target_phons, reference_phons):
+        """
+        가장 가까운 격자 필터 (벡터 입력 가능, 조회는 0.1 폰 단위로 반올림)
+
+        Returns:
+            (타겟 폰, 참조 폰, filter_index) 배열
+        """
+        target_x10 = np.floor(np.asarray(target_phons, dtype=float) * 10 + 0.5).astype(int)
+        reference_x10 = np.floor(np.asarray(reference_phons, dtype=float) * 10 + 0.5).astype(int)
+        target_index = nearest_indices(self._target_x10, target_x10)
+        reference_index = nearest_indices(self._reference_x10, reference_x10)
+        return (self.target_axis[target_index], self.reference_axis[reference_index],
+                target_index * len(self.reference_axis) + reference_index)
+
+    def filename(self, target_phon, reference_phon):
+        """가장 가까운 격자 필터의 파일명 (확장자 제외)"""
+        target, reference, _ = self.nearest(target_phon, reference_phon)
+        return f"{float(target):.1f}-{float(reference):.1f}_filter"
+
+    def to_dict(self):
+        return {
+            'threshold_db': self.threshold_db,
+            'target_axis': [float(value) for value in self.target_axis],
+            'reference_axis': [float(value) for value in self.reference_axis],
+            'stats': self.stats,
+        }
+
+    def save(self, filename):
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['target_axis'], data['reference_axis'], data.get('threshold_db'), data.get('stats'))
+
+
+def grid_error_db(generator, grid, target_phons, reference_phons):
+    """
+    모든 (타겟, 참조) 후보를 가장 가까운 격자 필터로 대신했을 때의 이득 곡선 최대 dB 오차
+
+    Returns:
+        (타겟 수, 참조 수) 오차 배열
+    """
+    target_grid, reference_grid = np.meshgrid(target_phons, reference_phons, indexing='ij')
+    nearest_target, nearest_reference, _ = grid.nearest(target_grid.ravel(), reference_grid.ravel())
+    exact = generator._relative_gains_matrix(np.column_stack((target_grid.ravel(), reference_grid.ravel())))
+    approx = generator._relative_gains_matrix(np.column_stack((nearest_target, nearest_reference)))
+    error = np.max(np.abs(20 * np.log10(exact / approx)), axis=1)
+    return error.reshape(target_grid.shape)
+
+
+def axis_error_range(phons, curves, axis_indices):
+    """
+    축 후보 값을 가장 가까운 격자점으로 대신할 때 주파수별 곡선 오차의 (최댓값, 최솟값)
+
+    2차원 오차는 (타겟 축 오차) - (참조 축 오차)이므로, 두 축의 이 범위만으로
+    모든 (타겟, 참조) 쌍의 최대 오차를 정확히 계산할 수 있습니다 (pair_error_db).
+    """
+    phons_x10 = np.round(np.asarray(phons) * 10).astype(int)
+    nearest = axis_indices[nearest_indices(phons_x10[axis_indices], phons_x10)]
+    errors = curves - curves[nearest]
+    return errors.max(axis=0), errors.min(axis=0)
+
+
+def pair_error_db(target_range_db, reference_range_db):
+    """두 축 오차 범위로 계산한 2차원 격자의 최대 dB 오차"""
+    target_max, target_min = target_range_db
+    reference_max, reference_min = reference_range_db
+    return float(np.max(np.maximum(target_max - reference_min, reference_max - target_min)))
+
+
+def _uniform_axis_options(phons):
+    """후보 간격의 배수인 균일 축 (양 끝 포함)"""
+    indices = np.arange(len(phons))
+    return [np.unique(np.append(indices[::step], indices[-1])) for step in range(1, max(2, len(phons)))]
+
+
+def _best_pair(pairs, threshold_db):
+    """최대 오차가 threshold_db 이하인 (타겟 축, 참조 축) 쌍 중 필터 수가 가장 적은 쌍 (없으면 None)"""
+    best = None
+    for (target_axis, target_range_db), (reference_axis, reference_range_db) in pairs:
+        count = len(target_axis) * len(reference_axis)
+        if best is not None and count >= best[0]:
+            continue
+        error = pair_error_db(target_range_db, reference_range_db)
+        if error <= threshold_db:
+            best = (count, target_axis, reference_axis, error)
+    return best
+
+
+def plan_adaptive_grid(generator, target_range=(40.0, 90.0, 0.1), reference_range=(75.0, 90.0, 0.1),
+                       threshold_db=0.5, budgets=24):
+    """
+    이득 곡선 차이 기준 비균일 격자 계획
+
+    격자 밖 (타겟, 참조) 값을 가장 가까운 격자 필터로 대신할 때 주파수별 오차는
+    (타겟 축 오차) - (참조 축 오차)입니다. 한 축의 후보 (균일 축, 허용 오차를 budgets 단계로 나눈 plan_axis 축)마다
+    남은 주파수별 허용 범위로 다른 축을 plan_axis로 계획하고, 실제 2차원 최대 오차가 threshold_db 이하이면서
+    필터 수가 가장 적은 쌍을 고릅니다.
+
+    Args:
+        target_range, reference_range: 후보 폰 축 ((start, end, step) 또는 {'values': [...]})
+        threshold_db: 허용 최대 dB 오차 (모든 후보 (타겟, 참조)에 대해)
+
+    Returns:
+        AdaptiveGrid (stats에 필터 수, 실제 최대 오차, 같은 허용 오차의 가장 성긴 균일 격자 필터 수)
+    """
+    target_phons = phon_axis_values(target_range)
+    reference_phons = phon_axis_values(reference_range)
+    target_curves = normalized_curves(generator, target_phons)
+    reference_curves = normalized_curves(generator, reference_phons)
+    budget_values = np.linspace(threshold_db / budgets, threshold_db, budgets)
+
+    def base_options(phons, curves):
+        """허용 오차 안의 균일 축과 스칼라 허용 오차 plan_axis 축"""
+        axes = [plan_axis(phons, curves, budget) for budget in budget_values]
+        options = [(axis, axis_error_range(phons, curves, axis)) for axis in axes]
+        uniform = []
+        for axis in _uniform_axis_options(phons):
+            error_range = axis_error_range(phons, curves, axis)
+            if max(error_range[0].max(), -error_range[1].min()) > threshold_db:
+                break  # 간격이 더 넓으면 오차도 더 큼
+            uniform.append((axis, error_range))
+        return uniform, options
+
+    def complement(option, phons, curves, sign):
+        """option 축의 오차 범위에서 남은 주파수별 허용 범위로 다른 축 계획"""
+        error_max, error_min = option[1]
+        # 타겟 오차 - 참조 오차가 [-threshold, threshold] 안에 들어야 함
+        if sign > 0:
+            upper, lower = threshold_db + error_min, error_max - threshold_db
+        else:
+            upper, lower = threshold_db - error_max, -threshold_db - error_min
+        axis = plan_axis(phons, curves, upper, lower)
+        return axis, axis_error_range(phons, curves, axis)
+
+    target_uniform, target_planned = base_options(target_phons, target_curves)
+    reference_uniform, reference_planned = base_options(reference_phons, reference_curves)
+
+    pairs = [(target, reference) for target in target_uniform + target_planned
+             for reference in reference_uniform + reference_planned]
+    pairs += [(complement(reference, target_phons, target_curves, 1), reference)
+              for reference in reference_uniform + reference_planned]
+    pairs += [(target, complement(target, reference_phons, reference_curves, -1))
+              for target in target_uniform + target_planned]
+    best = _best_pair(pairs, threshold_db)
+    if best is None:
+        raise ValueError(f"허용 오차 {threshold_db} dB를 만족하는 격자가 없습니다 (후보 간격을 줄이세요).")
+    uniform = _best_pair([(target, reference) for target in target_uniform for reference in reference_uniform],
+                         threshold_db)
+
+    _, target_axis, reference_axis, _ = best
+    grid = AdaptiveGrid(target_phons[target_axis], reference_phons[reference_axis], threshold_db)
+    # 생성기 이득 계산으로 실제 오차 확인
+    error = float(np.max(grid_error_db(generator, grid, target_phons, reference_phons)))
+    grid.stats = {
+        'candidate_filters': len(target_phons) * len(reference_phons),
+        'filters': len(grid),
+        'target_points': len(grid.target_axis),
+        'reference_points': len(grid.reference_axis),
+        'max_error_db': error,
+        'uniform_filters_same_threshold': uniform[0] if uniform else None,
+    }
+    return grid
+
+
+def emit_cpp_header(grid, filename, guard="ADAPTIVE_GRID_GENERATED_H"):
+    """C++ 헤더: 축 배열 (폰 x 10) + 가장 가까운 필터 조회"""
+    def values(axis_x10):
+        return ", ".join(str(int(value)) for value in axis_x10)
+
+    lines = [
+        f"#ifndef {guard}", f"#define {guard}", "", "#include <algorithm>", "#include <cmath>", "",
+        "// Generated by adaptive_grid.py - do not edit by hand",
+        f"// Non-uniform filter grid, max gain curve error {grid.stats.get('max_error_db', 0):.3f} dB "
+        f"(threshold {grid.threshold_db} dB)",
+        "// Filter order: filterIndex = targetIndex * REFERENCE_COUNT + referenceIndex",
+        "namespace AdaptiveGrid {",
+        "",
+        f"constexpr int TARGET_COUNT = {len(grid.target_axis)};",
+        f"constexpr int REFERENCE_COUNT = {len(grid.reference_axis)};",
+        f"constexpr int TARGET_X10[TARGET_COUNT] = {{{values(grid._target_x10)}}};",
+        f"constexpr int REFERENCE_X10[REFERENCE_COUNT] = {{{values(grid._reference_x10)}}};",
+        "",
+        "// Index of the nearest axis value (ties go to the lower value)",
+        "inline int nearestIndex(const int* axis, int count, double phon) {",
+        "    const int x10 = static_cast<int>(std::floor(phon * 10.0 + 0.5));",
+        "    const int upper = static_cast<int>(std::lower_bound(axis, axis + count, x10) - axis);",
+        "    if (upper <= 0) return 0;",
+        "    if (upper >= count) return count - 1;",
+        "    return (x10 - axis[upper - 1] <= axis[upper] - x10) ? upper - 1 : upper;",
+        "}",
+        "",
+        "// Nearest filter; writes its grid phon values and returns its index",
+        "inline int nearestFilter(double targetPhon, double referencePhon, double* gridTarget, double* gridReference) {",
+        "    const int targetIndex = nearestIndex(TARGET_X10, TARGET_COUNT, targetPhon);",
+        "    const int referenceIndex = nearestIndex(REFERENCE_X10, REFERENCE_COUNT, referencePhon);",
+        "    if (gridTarget) *gridTarget = TARGET_X10[targetIndex] / 10.0;",
+        "    if (gridReference) *gridReference = REFERENCE_X10[referenceIndex] / 10.0;",
+        "    return targetIndex * REFERENCE_COUNT + referenceIndex;",
+        "}",
+        "",
+        "} // namespace AdaptiveGrid",
+        "",
+        f"#endif // {guard}",
+        "",
+    ]
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines))
+
+
+def emit_kotlin(grid, filename, object_name="AdaptiveGrid", package=KOTLIN_PACKAGE):
+    """Kotlin 소스: 축 배열 (폰 x 10) + 가장 가까운 필터 조회"""
+    def values(axis_x10):
+        return ", ".join(str(int(value)) for value in axis_x10)
+
+    lines = [
+        f"package {package}", "", "import kotlin.math.floor", "",
+        "// Generated by adaptive_grid.py - do not edit by hand",
+        f"// Non-uniform filter grid, max gain curve error {grid.stats.get('max_error_db', 0):.3f} dB "
+        f"(threshold {grid.threshold_db} dB)",
+        f"object {object_name} {{",
+        f"    private val TARGET_X10 = intArrayOf({values(grid._target_x10)})",
+        f"    private val REFERENCE_X10 = intArrayOf({values(grid._reference_x10)})",
+        "",
+        "    val targetCount get() = TARGET_X10.size",
+        "    val referenceCount get() = REFERENCE_X10.size",
+        "",
+        "    private fun nearestIndex(axis: IntArray, phon: Float): Int {",
+        "        val x10 = floor(phon * 10.0 + 0.5).toInt()",
+        "        val found = axis.binarySearch(x10)",
+        "        if (found >= 0) return found",
+        "        val upper = -found - 1",
+        "        if (upper <= 0) return 0",
+        "        if (upper >= axis.size) return axis.size - 1",
+        "        return if (x10 - axis[upper - 1] <= axis[upper] - x10) upper - 1 else upper",
+        "    }",
+        "",
+        "    /**",
+        "     * Nearest filter as (target phon, reference phon, filter index); index = targetIndex * referenceCount + referenceIndex",
+        "     */",
+        "    fun nearestFilter(targetPhon: Float, referencePhon: Float): Triple<Float, Float, Int> {",
+        "        val targetIndex = nearestIndex(TARGET_X10, targetPhon)",
+        "        val referenceIndex = nearestIndex(REFERENCE_X10, referencePhon)",
+        "        return Triple(TARGET_X10[targetIndex] / 10f, REFERENCE_X10[referenceIndex] / 10f,",
+        "                      targetIndex * REFERENCE_X10.size + referenceIndex)",
+        "    }",
+        "",
+        "    fun filterName(targetPhon: Float, referencePhon: Float): String {",
+        "        val (target, reference, _) = nearestFilter(targetPhon, referencePhon)",
+        "        return \"%.1f-%.1f_filter\".format(java.util.Locale.US, target, reference)",
+        "    }",
+        "}",
+        "",
+    ]
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines))
+
+
+def generate_grid_outputs(grid, output_dir, basename="adaptive_grid"):
+    """격자 JSON, C++ 헤더, Kotlin 소스 생성"""
+    os.makedirs(output_dir, exist_ok=True)
+    outputs = {
+        'json': os.path.join(output_dir, f"{basename}.json"),
+        'cpp': os.path.join(output_dir, f"{basename}_generated.h"),
+        'kotlin': os.path.join(output_dir, "AdaptiveGrid.kt"),
+    }
+    grid.save(outputs['json'])
+    emit_cpp_header(grid, outputs['cpp'])
+    emit_kotlin(grid, outputs['kotlin'])
+    return outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="이득 곡선 차이 기준 비균일 폰 격자 계획")
+    parser.add_argument("--output-dir", default="generated_grid", help="출력 디렉토리")
+    parser.add_argument("--target-range", type=float, nargs=3, default=(40.0, 90.0, 0.1),
+                        metavar=("START", "END", "STEP"), help="후보 타겟 폰 범위")
+    parser.add_argument("--reference-range", type=float, nargs=3, default=(75.0, 90.0, 0.1),
+                        metavar=("START", "END", "STEP"), help="후보 참조 폰 범위")
+    parser.add_argument("--threshold", type=float, default=0.5, help="허용 최대 dB 오차")
+    parser.add_argument("--generate", metavar="DIR", help="지정하면 계획한 격자의 필터를 이 디렉토리에 생성")
+    parser.add_argument("--bank", help="--generate와 함께 쓸 필터 뱅크 파일명")
+    parser.add_argument("--fs", type=int, default=48000)
+    args = parser.parse_args()
+
+    generator = BulkFIRFilterGenerator(fs=args.fs)
+    grid = plan_adaptive_grid(generator, tuple(args.target_range), tuple(args.reference_range), args.threshold)
+    outputs = generate_grid_outputs(grid, args.output_dir)
+
+    stats = grid.stats
+    print(f"\n=== 비균일 격자 (허용 오차 {args.threshold} dB) ===")
+    print(f"후보 필터: {stats['candidate_filters']}개 -> 격자 필터: {stats['filters']}개 "
+          f"(타겟 {stats['target_points']} x 참조 {stats['reference_points']})")
+    print(f"실제 최대 오차: {stats['max_error_db']:.3f} dB")
+    if stats['uniform_filters_same_threshold'] is not None:
+        print(f"같은 허용 오차의 가장 성긴 균일 격자: {stats['uniform_filters_same_threshold']}개")
+    for name, path in outputs.items():
+        print(f"  {name}: {path}")
+
+    if args.generate:
+        generator.generate_filter_range(grid.target_range, grid.reference_range, output_dir=args.generate,
+                                        bank_filename=args.bank)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,673 @@
+import argparse
+import csv
+import os
+import struct
+import time
+
+import numpy as np
+
+from bulk_fir_filter_generator import BulkFIRFilterGenerator
+from preamp_codegen import KOTLIN_PACKAGE, phon_axis
+
+
+# 바이퀘드 종류 (캐스케이드 순서: 로우 셸프, 피킹 x (N - 2), 하이 셸프)
+LOW_SHELF = 0
+PEAKING = 1
+HIGH_SHELF = 2
+
+# 바이너리 바이퀘드 테이블 형식 (리틀 엔디언)
+#   magic(4) version(u16) fs(u32) num_biquads(u16) ref_min_x10(i16) ref_step_x10(i16) ref_count(u16)
+#   target_min_x10(i16) target_step_x10(i16) target_count(u16)
+#   + float32 [ref_count x target_count x num_biquads x 5] (b0, b1, b2, a1, a2, a0 = 1로 정규화)
+TABLE_MAGIC = b'JLBQ'
+TABLE_VERSION = 1
+TABLE_HEADER_FORMAT = '<4sHIHhhHhhH'
+
+# 파라미터 범위 (log10 주파수, dB, log10 Q)
+MIN_FREQ_HZ = 15.0
+MAX_GAIN_DB = 36.0
+MIN_Q = 0.25
+MAX_Q = 8.0
+
+
+def biquad_types(num_biquads):
+    """캐스케이드의 바이퀘드 종류 배열 (첫 번째 로우 셸프, 마지막 하이 셸프, 나머지 피킹)"""
+    if num_biquads < 2:
+        raise ValueError("바이퀘드는 최소 2개 (로우 / 하이 셸프)가 필요합니다.")
+    types = np.full(num_biquads, PEAKING)
+    types[0], types[-1] = LOW_SHELF, HIGH_SHELF
+    return types
+
+
+def biquad_coefficients(types, freq_hz, gain_db, q, fs):
+    """
+    RBJ (Audio EQ Cookbook) 셸프 / 피킹 바이퀘드 계수
+
+    Args:
+        types, freq_hz, gain_db, q: 브로드캐스트 가능한 배열 (마지막 축 = 바이퀘드)
+
+    Returns:
+        (..., 5) 배열 (b0, b1, b2, a1, a2), a0 = 1로 정규화
+    """
+    A = 10 ** (np.asarray(gain_db, dtype=float) / 40.0)
+    w0 = 2 * np.pi * np.asarray(freq_hz, dtype=float) / fs
+    cos_w0 = np.cos(w0)
+    alpha = np.sin(w0) / (2 * np.asarray(q, dtype=float))
+    shelf_alpha = 2 * np.sqrt(A) * alpha
+
+    # 피킹
+    b = [1 + alpha * A, -2 * cos_w0, 1 - alpha * A]
+    a = [1 + alpha / A, -2 * cos_w0, 1 - alpha / A]
+
+    low = np.asarray(types) == LOW_SHELF
+    high = np.asarray(types) == HIGH_SHELF
+    low_b = [A * ((A + 1) - (A - 1) * cos_w0 + shelf_alpha), 2 * A * ((A - 1) - (A + 1) * cos_w0),
+             A * ((A + 1) - (A - 1) * cos_w0 - shelf_alpha)]
+    low_a = [(A + 1) + (A - 1) * cos_w0 + shelf_alpha, -2 * ((A - 1) + (A + 1) * cos_w0),
+             (A + 1) + (A - 1) * cos_w0 - shelf_alpha]
+    high_b = [A * ((A + 1) + (A - 1) * cos_w0 + shelf_alpha), -2 * A * ((A - 1) + (A + 1) * cos_w0),
+              A * ((A + 1) + (A - 1) * cos_w0 - shelf_alpha)]
+    high_a = [(A + 1) - (A - 1) * cos_w0 + shelf_alpha, 2 * ((A - 1) - (A + 1) * cos_w0),
+              (A + 1) - (A - 1) * cos_w0 - shelf_alpha]
+
+    b = [np.where(low, lb, np.where(high, hb, pb)) for pb, lb, hb in zip(b, low_b, high_b)]
+    a = [np.where(low, la, np.where(high, ha, pa)) for pa, la, ha in zip(a, low_a, high_a)]
+    return np.stack([b[0] / a[0], b[1] / a[0], b[2] / a[0], a[1] / a[0], a[2] / a[0]], axis=-1)
+
+
+def biquad_response_db(coefficients, freqs, fs):
+    """
+    정규화 계수 (..., 5)의 크기 응답 (dB), 결과 (..., len(freqs))
+
+    |H|^2를 cos(w), cos(2w)의 실수식으로 계산합니다 (복소 지수 없음).
+    """
+    w = 2 * np.pi * np.asarray(freqs, dtype=float) / fs
+    cos_w, cos_2w = np.cos(w), np.cos(2 * w)
+    b0, b1, b2, a1, a2 = [coefficients[..., index, np.newaxis] for index in range(5)]
+    numerator = b0**2 + b1**2 + b2**2 + 2 * (b0 * b1 + b1 * b2) * cos_w + 2 * b0 * b2 * cos_2w
+    denominator = 1 + a1**2 + a2**2 + 2 * (a1 + a1 * a2) * cos_w + 2 * a2 * cos_2w
+    return 10 * np.log10(np.maximum(numerator, 1e-30) / np.maximum(denominator, 1e-30))
+
+
+def target_response_db(generator, pairs, freqs):
+    """FIR 설계와 같은 목표 곡선 (ISO 주파수 사이 선형 보간, 1kHz 0dB)의 dB 값 (N, len(freqs))"""
+    plan = generator._batch_design_plan('hann', generator.numtaps)
+    interp_matrix = generator._interp_matrix(np.asarray(freqs, dtype=float), plan['breakpoints'])
+    relative_gains_linear = generator._relative_gains_matrix(pairs)
+    return 20 * np.log10(generator._breakpoint_gains(relative_gains_linear, plan) @ interp_matrix.T)
+
+
+def _parameter_bounds(num_biquads, fs):
+    lower = np.tile([np.log10(MIN_FREQ_HZ), -MAX_GAIN_DB, np.log10(MIN_Q)], (num_biquads, 1))
+    upper = np.tile([np.log10(0.45 * fs), MAX_GAIN_DB, np.log10(MAX_Q)], (num_biquads, 1))
+    return lower, upper
+
+
+def _initial_parameters(target_db, freqs, num_biquads):
+    """셸프 120Hz / 9kHz, 피킹은 40Hz ~ 12kHz 로그 간격 (Q 1, 0dB)에서 시작"""
+    count = len(target_db)
+    params = np.zeros((count, num_biquads, 3))
+    centers = np.geomspace(40.0, 12000.0, num_biquads - 2) if num_biquads > 2 else np.empty(0)
+    params[:, 1:-1, 0] = np.log10(centers)
+    params[:, 0, 0] = np.log10(120.0)
+    params[:, -1, 0] = np.log10(9000.0)
+    params[:, :, 2] = 0.0
+    params[:, [0, -1], 2] = np.log10(0.707)
+    params[:, 0, 1] = np.clip(target_db[:, 0], -MAX_GAIN_DB, MAX_GAIN_DB)
+    params[:, -1, 1] = np.clip(target_db[:, np.argmin(np.abs(freqs - 12000.0))], -MAX_GAIN_DB, MAX_GAIN_DB)
+    return params
+
+
+def _per_biquad_db(params, types, freqs, fs):
+    """파라미터 (N, nb, 3) -> 바이퀘드별 응답 (N, nb, F)"""
+    coefficients = biquad_coefficients(types, 10 ** params[..., 0], params[..., 1], 10 ** params[..., 2], fs)
+    return biquad_response_db(coefficients, freqs, fs)
+
+
+def _fit_chunk(target_db, freqs, fs, types, iterations, step=1e-5):
+    """
+    Levenberg-Marquardt 배치 피팅 (필터마다 독립적인 감쇠 계수)
+
+    캐스케이드 응답 (dB)은 바이퀘드별 응답의 합이므로, 모든 바이퀘드의 j번째 파라미터를
+    한꺼번에 흔들어 수치 야코비안을 파라미터 종류 수 (3)번의 평가로 얻습니다.
+    전체 이득 (dB)은 선형 파라미터로 함께 피팅합니다.
+    """
+    count, num_freqs = target_db.shape
+    num_biquads = len(types)
+    lower, upper = _parameter_bounds(num_biquads, fs)
+
+    params = np.clip(_initial_parameters(target_db, freqs, num_biquads), lower, upper)
+    gain_db = np.zeros(count)
+    damping = np.full(count, 1e-2)
+
+    per_biquad = _per_biquad_db(params, types, freqs, fs)
+    residual = gain_db[:, np.newaxis] + per_biquad.sum(axis=1) - target_db
+    cost = np.sum(residual**2, axis=1)
+
+    for _ in range(iterations):
+        jacobian = np.empty((count, num_freqs, num_biquads, 3))
+        for index in range(3):
+            perturbed = params.copy()
+            perturbed[..., index] += step
+            jacobian[..., index] = np.moveaxis((_per_biquad_db(perturbed, types, freqs, fs) - per_biquad) / step, 1, 2)
+        jacobian = np.concatenate((jacobian.reshape(count, num_freqs, -1), np.ones((count, num_freqs, 1))), axis=2)
+
+        normal = np.einsum('nfp,nfq->npq', jacobian, jacobian)
+        gradient = np.einsum('nfp,nf->np', jacobian, residual)
+        diagonal = np.einsum('npp->np', normal)
+        system = normal + (damping[:, np.newaxis] * diagonal + 1e-9)[..., np.newaxis] * np.eye(normal.shape[1])
+        delta = np.linalg.solve(system, -gradient[..., np.newaxis])[..., 0]
+
+        candidate = np.clip(params + delta[:, :-1].reshape(count, num_biquads, 3), lower, upper)
+        candidate_gain = gain_db + delta[:, -1]
+        candidate_per_biquad = _per_biquad_db(candidate, types, freqs, fs)
+        candidate_residual = candidate_gain[:, np.newaxis] + candidate_per_biquad.sum(axis=1) - target_db
+        candidate_cost = np.sum(candidate_residual**2, axis=1)
+
+        improved = candidate_cost < cost
+        params[improved] = candidate[improved]
+        gain_db[improved] = candidate_gain[improved]
+        per_biquad[improved] = candidate_per_biquad[improved]
+        residual[improved] = candidate_residual[improved]
+        converged = improved & (cost - candidate_cost < 1e-9 * np.maximum(cost, 1e-12))
+        cost[improved] = candidate_cost[improved]
+        damping = np.clip(np.where(improved, damping * 0.3, damping * 4.0), 1e-9, 1e9)
+        if np.all(converged | (damping >= 1e9)):
+            break
+
+    return params, gain_db
+
+
+def fit_biquad_cascades(generator, pairs, num_biquads=6, iterations=60, num_fit_points=128,
+                        num_check_points=512, batch_size=1024):
+    """
+    (타겟, 참조) 쌍마다 N개 바이퀘드 캐스케이드를 목표 곡선에 피팅 (배치 벡터화)
+
+    20Hz ~ 20kHz 로그 간격 num_fit_points개 주파수에서 dB 오차 제곱합을 최소화하고,
+    결과는 FIR 뱅크와 같이 1kHz 0dB로 정규화합니다 (전체 이득은 첫 바이퀘드의 b 계수에 포함).
+    오차는 float32로 양자화한 계수로 num_check_points개 주파수에서 다시 계산합니다.
+
+    Returns:
+        딕셔너리: types, params (N, nb, 3: 주파수 Hz, 이득 dB, Q), gain_db (N,),
+                 coefficients (N, nb, 5 float32), max_error_db, rms_error_db (N,)
+    """
+    fs = generator.fs
+    max_freq = min(20000.0, 0.45 * fs)
+    fit_freqs = np.geomspace(20.0, max_freq, num_fit_points)
+    check_freqs = np.geomspace(20.0, max_freq, num_check_points)
+    types = biquad_types(num_biquads)
+
+    count = len(pairs)
+    params = np.empty((count, num_biquads, 3))
+    gain_db = np.empty(count)
+    coefficients = np.empty((count, num_biquads, 5), dtype=np.float32)
+    max_error_db = np.empty(count)
+    rms_error_db = np.empty(count)
+
+    for start in range(0, count, batch_size):
+        chunk_pairs = pairs[start:start + batch_size]
+        rows = slice(start, start + len(chunk_pairs))
+        chunk_params, chunk_gain = _fit_chunk(target_response_db(generator, chunk_pairs, fit_freqs),
+                                              fit_freqs, fs, types, iterations)
+
+        # 1kHz 0dB 정규화 (피팅한 전체 이득 대신 1kHz 응답의 역수 사용)
+        chunk_gain = -_per_biquad_db(chunk_params, types, [1000.0], fs).sum(axis=1)[:, 0]
+
+        chunk_coefficients = biquad_coefficients(types, 10 ** chunk_params[..., 0], chunk_params[..., 1],
+                                                 10 ** chunk_params[..., 2], fs)
+        chunk_coefficients[:, 0, :3] *= 10 ** (chunk_gain / 20.0)[:, np.newaxis]
+        chunk_coefficients = chunk_coefficients.astype(np.float32)
+
+        error_db = (biquad_response_db(chunk_coefficients.astype(np.float64), check_freqs, fs).sum(axis=1)
+                    - target_response_db(generator, chunk_pairs, check_freqs))
+        params[rows] = np.stack([10 ** chunk_params[..., 0], chunk_params[..., 1], 10 ** chunk_params[..., 2]],
+                                axis=-1)
+        gain_db[rows] = chunk_gain
+        coefficients[rows] = chunk_coefficients
+        max_error_db[rows] = np.max(np.abs(error_db), axis=1)
+        rms_error_db[rows] = np.sqrt(np.mean(error_db**2, axis=1))
+
+    return {
+        'types': types,
+        'params': params,
+        'gain_db': gain_db,
+        'coefficients': coefficients,
+        'max_error_db': max_error_db,
+        'rms_error_db': rms_error_db,
+    }
+
+
+class BiquadTable:
+    """
+    폰 x 10 정수 인덱스로 접근하는 고정 간격 바이퀘드 계수 테이블 (preamp_codegen.PreampTable과 같은 배치)
+
+    coefficients[ref_index, target_index] = (num_biquads, 5) float32 계수 (b0, b1, b2, a1, a2)
+    """
+
+    def __init__(self, fs, ref_min_x10, ref_step_x10, target_min_x10, target_step_x10, coefficients,
+                 params=None, gain_db=None, max_error_db=None, rms_error_db=None):
+        self.fs = fs
+        self.ref_min_x10 = ref_min_x10
+        self.ref_step_x10 = ref_step_x10
+        self.target_min_x10 = target_min_x10
+        self.target_step_x10 = target_step_x10
+        self.coefficients = np.asarray(coefficients, dtype=np.float32)
+        self.params = params
+        self.gain_db = gain_db
+        self.max_error_db = max_error_db
+        self.rms_error_db = rms_error_db
+
+    @property
+    def ref_count(self):
+        return self.coefficients.shape[0]
+
+    @property
+    def target_count(self):
+        return self.coefficients.shape[1]
+
+    @property
+    def num_biquads(self):
+        return self.coefficients.shape[2]
+
+    def _indices(self, target_phon, reference_phon):
+        ref_index = int(round((round(reference_phon * 10) - self.ref_min_x10) / self.ref_step_x10))
+        target_index = int(round((round(target_phon * 10) - self.target_min_x10) / self.target_step_x10))
+        return (min(max(ref_index, 0), self.ref_count - 1), min(max(target_index, 0), self.target_count - 1))
+
+    def lookup(self, target_phon, reference_phon):
+        """가장 가까운 격자점의 (num_biquads, 5) 계수 (범위 밖은 양 끝 값)"""
+        return self.coefficients[self._indices(target_phon, reference_phon)]
+
+    def sos(self, target_phon, reference_phon):
+        """scipy.signal.sosfilt용 (num_biquads, 6) second-order sections"""
+        coefficients = self.lookup(target_phon, reference_phon).astype(np.float64)
+        return np.concatenate((coefficients[:, :3], np.ones((self.num_biquads, 1)), coefficients[:, 3:]), axis=1)
+
+
+def build_biquad_table(generator, reference_range=(75.0, 90.0, 1.0), target_range=(40.0, 90.0, 0.1),
+                       num_biquads=6, **fit_options):
+    """고정 간격 (참조 x 타겟) 격자 전체를 피팅하여 BiquadTable 생성"""
+    ref_min_x10, ref_step_x10, reference_phons = phon_axis(reference_range)
+    target_min_x10, target_step_x10, target_phons = phon_axis(target_range)
+    pairs = [(float(target_phon), float(reference_phon))
+             for reference_phon in reference_phons for target_phon in target_phons]
+
+    fit = fit_biquad_cascades(generator, pairs, num_biquads=num_biquads, **fit_options)
+    shape = (len(reference_phons), len(target_phons))
+    return BiquadTable(generator.fs, ref_min_x10, ref_step_x10, target_min_x10, target_step_x10,
+                       fit['coefficients'].reshape(shape + (num_biquads, 5)),
+                       params=fit['params'].reshape(shape + (num_biquads, 3)),
+                       gain_db=fit['gain_db'].reshape(shape),
+                       max_error_db=fit['max_error_db'].reshape(shape),
+                       rms_error_db=fit['rms_error_db'].reshape(shape))
+
+
+# --- 출력 ---
+def _phon_of(min_x10, step_x10, index):
+    return (min_x10 + index * step_x10) / 10.0
+
+
+def _float_literal(value):
+    """float32 값을 그대로 되읽을 수 있는 C++ / Kotlin float 리터럴 (예: 1.0f, -1.9777832f)"""
+    text = f"{float(value):.9g}"
+    if not any(character in text for character in ".en"):
+        text += ".0"
+    return text + "f"
+
+
+def _header_comment(table, prefix):
+    lines = [
+        f"{prefix} Generated by biquad_fit.py - do not edit by hand",
+        f"{prefix} {table.num_biquads} biquads per filter (low shelf, {table.num_biquads - 2} peaking, high shelf), "
+        f"designed at {table.fs} Hz, 0 dB at 1 kHz",
+    ]
+    if table.max_error_db is not None:
+        lines.append(f"{prefix} Fit error vs. ISO 226 target (20 Hz - 20 kHz): max {np.max(table.max_error_db):.2f} dB, "
+                     f"mean RMS {np.mean(table.rms_error_db):.2f} dB")
+    lines.append(f"{prefix} Layout: [refIndex][targetIndex][biquad][b0, b1, b2, a1, a2], "
+                 f"index = (round(phon * 10) - MIN_X10) / STEP_X10")
+    return lines
+
+
+def emit_binary(table, filename):
+    """바이너리 블롭: 고정 헤더 + float32 계수"""
+    header = struct.pack(TABLE_HEADER_FORMAT, TABLE_MAGIC, TABLE_VERSION, table.fs, table.num_biquads,
+                         table.ref_min_x10, table.ref_step_x10, table.ref_count,
+                         table.target_min_x10, table.target_step_x10, table.target_count)
+    with open(filename, 'wb') as f:
+        f.writelines((header, memoryview(np.ascontiguousarray(table.coefficients, dtype='<f4')).cast('B')))
+
+
+def load_binary(filename):
+    """emit_binary로 기록한 테이블 읽기"""
+    with open(filename, 'rb') as f:
+        data = f.read()
+    (magic, version, fs, num_biquads, ref_min_x10, ref_step_x10, ref_count,
+     target_min_x10, target_step_x10, target_count) = struct.unpack_from(TABLE_HEADER_FORMAT, data)
+    if magic != TABLE_MAGIC or version != TABLE_VERSION:
+        raise ValueError(f"바이퀘드 테이블 파일이 아닙니다: {filename}")
+    coefficients = np.frombuffer(data, dtype='<f4', offset=struct.calcsize(TABLE_HEADER_FORMAT),
+                                 count=ref_count * target_count * num_biquads * 5)
+    return BiquadTable(fs, ref_min_x10, ref_step_x10, target_min_x10, target_step_x10,
+                       coefficients.reshape(ref_count, target_count, num_biquads, 5))
+
+
+def emit_cpp_header(table, filename, guard="LOUDNESS_BIQUADS_GENERATED_H"):
+    """C++ 헤더: constexpr float 계수 배열 + 조회 / TDF-II 캐스케이드 처리 함수"""
+    lines = [f"#ifndef {guard}", f"#define {guard}", "", "#include <cmath>", ""]
+    lines += _header_comment(table, "//")
+    lines += [
+        "namespace LoudnessBiquads {",
+        "",
+        f"constexpr int SAMPLE_RATE = {table.fs};",
+        f"constexpr int NUM_BIQUADS = {table.num_biquads};",
+        "constexpr int COEFFS_PER_FILTER = NUM_BIQUADS * 5;",
+        f"constexpr int REF_MIN_X10 = {table.ref_min_x10};",
+        f"constexpr int REF_STEP_X10 = {table.ref_step_x10};",
+        f"constexpr int REF_COUNT = {table.ref_count};",
+        f"constexpr int TARGET_MIN_X10 = {table.target_min_x10};",
+        f"constexpr int TARGET_STEP_X10 = {table.target_step_x10};",
+        f"constexpr int TARGET_COUNT = {table.target_count};",
+        "",
+        "constexpr float COEFFS[REF_COUNT * TARGET_COUNT * COEFFS_PER_FILTER] = {",
+    ]
+    for ref_index in range(table.ref_count):
+        lines.append(f"    // Reference Phon {_phon_of(table.ref_min_x10, table.ref_step_x10, ref_index):.1f}")
+        for target_index in range(table.target_count):
+            values = table.coefficients[ref_index, target_index].ravel()
+            lines.append("    " + " ".join(f"{_float_literal(value)}," for value in values))
+    lines += [
+        "};",
+        "",
+        "inline int clampIndex(int index, int count) {",
+        "    return index < 0 ? 0 : (index >= count ? count - 1 : index);",
+        "}",
+        "",
+        "// Coefficients (NUM_BIQUADS x {b0, b1, b2, a1, a2}) of the nearest grid point",
+        "inline const float* lookup(double targetPhon, double referencePhon) {",
+        "    const int refX10 = static_cast<int>(std::lround(referencePhon * 10.0));",
+        "    const int targetX10 = static_cast<int>(std::lround(targetPhon * 10.0));",
+        "    const int refIndex = clampIndex(static_cast<int>(std::lround(double(refX10 - REF_MIN_X10) / REF_STEP_X10)), REF_COUNT);",
+        "    const int targetIndex = clampIndex(static_cast<int>(std::lround(double(targetX10 - TARGET_MIN_X10) / TARGET_STEP_X10)), TARGET_COUNT);",
+        "    return &COEFFS[(refIndex * TARGET_COUNT + targetIndex) * COEFFS_PER_FILTER];",
+        "}",
+        "",
+        "// Transposed direct form II state (double precision for the low-frequency shelf)",
+        "struct State {",
+        "    double z1[NUM_BIQUADS] = {};",
+        "    double z2[NUM_BIQUADS] = {};",
+        "};",
+        "",
+        "inline double process(const float* coeffs, State& state, double x) {",
+        "    for (int i = 0; i < NUM_BIQUADS; ++i) {",
+        "        const float* c = coeffs + i * 5;",
+        "        const double y = c[0] * x + state.z1[i];",
+        "        state.z1[i] = c[1] * x - c[3] * y + state.z2[i];",
+        "        state.z2[i] = c[2] * x - c[4] * y;",
+        "        x = y;",
+        "    }",
+        "    return x;",
+        "}",
+        "",
+        "} // namespace LoudnessBiquads",
+        "",
+        f"#endif // {guard}",
+        "",
+    ]
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines))
+
+
+def emit_kotlin(table, filename, binary_name, object_name="LoudnessBiquadTable", package=KOTLIN_PACKAGE):
+    """
+    Kotlin 소스: 바이너리 블롭 로더 + 조회 함수
+
+    수만 개의 float 리터럴은 JVM 클래스 상수 풀 (65535개) / 메서드 크기 (64KB) 제한을 넘으므로
+    계수는 emit_binary 블롭 (assets 등)에서 읽고, 레이아웃 상수만 소스에 둡니다.
+    """
+    lines = [f"package {package}", "", "import java.io.InputStream", "import java.nio.ByteBuffer",
+             "import java.nio.ByteOrder", "import kotlin.math.roundToInt", ""]
+    lines += _header_comment(table, "//")
+    lines += [
+        f"// Coefficients are loaded from {binary_name} (biquad_fit.py binary format)",
+        f"object {object_name} {{",
+        f"    const val SAMPLE_RATE = {table.fs}",
+        f"    const val NUM_BIQUADS = {table.num_biquads}",
+        "    const val COEFFS_PER_FILTER = NUM_BIQUADS * 5",
+        f"    const val REF_MIN_X10 = {table.ref_min_x10}",
+        f"    const val REF_STEP_X10 = {table.ref_step_x10}",
+        f"    const val REF_COUNT = {table.ref_count}",
+        f"    const val TARGET_MIN_X10 = {table.target_min_x10}",
+        f"    const val TARGET_STEP_X10 = {table.target_step_x10}",
+        f"    const val TARGET_COUNT = {table.target_count}",
+        f"    private const val HEADER_SIZE = {struct.calcsize(TABLE_HEADER_FORMAT)}",
+        "",
+        "    private var coeffs: FloatArray? = null",
+        "",
+        "    /**",
+        f"     * Load {binary_name}; throws if the layout does not match this object",
+        "     */",
+        "    fun load(input: InputStream) {",
+        "        val buffer = ByteBuffer.wrap(input.readBytes()).order(ByteOrder.LITTLE_ENDIAN)",
+        "        val magic = ByteArray(4).also { buffer.get(it) }",
+        f"        require(String(magic, Charsets.US_ASCII) == \"{TABLE_MAGIC.decode('ascii')}\") {{ \"Not a biquad table\" }}",
+        f"        require(buffer.short.toInt() == {TABLE_VERSION}) {{ \"Unsupported biquad table version\" }}",
+        "        require(buffer.int == SAMPLE_RATE && buffer.short.toInt() == NUM_BIQUADS) { \"Biquad table layout mismatch\" }",
+        "        require(buffer.short.toInt() == REF_MIN_X10 && buffer.short.toInt() == REF_STEP_X10 &&",
+        "                (buffer.short.toInt() and 0xFFFF) == REF_COUNT) { \"Biquad table layout mismatch\" }",
+        "        require(buffer.short.toInt() == TARGET_MIN_X10 && buffer.short.toInt() == TARGET_STEP_X10 &&",
+        "                (buffer.short.toInt() and 0xFFFF) == TARGET_COUNT) { \"Biquad table layout mismatch\" }",
+        "        buffer.position(HEADER_SIZE)",
+        "        coeffs = FloatArray(REF_COUNT * TARGET_COUNT * COEFFS_PER_FILTER).also { buffer.asFloatBuffer().get(it) }",
+        "    }",
+        "",
+        "    /**",
+        "     * Coefficients (NUM_BIQUADS x {b0, b1, b2, a1, a2}) of the nearest grid point",
+        "     */",
+        "    fun lookup(targetPhon: Float, referencePhon: Float): FloatArray {",
+        "        val table = checkNotNull(coeffs) { \"Call load() first\" }",
+        "        val refX10 = (referencePhon * 10f).roundToInt()",
+        "        val targetX10 = (targetPhon * 10f).roundToInt()",
+        "        val refIndex = ((refX10 - REF_MIN_X10).toFloat() / REF_STEP_X10).roundToInt().coerceIn(0, REF_COUNT - 1)",
+        "        val targetIndex = ((targetX10 - TARGET_MIN_X10).toFloat() / TARGET_STEP_X10).roundToInt().coerceIn(0, TARGET_COUNT - 1)",
+        "        val offset = (refIndex * TARGET_COUNT + targetIndex) * COEFFS_PER_FILTER",
+        "        return table.copyOfRange(offset, offset + COEFFS_PER_FILTER)",
+        "    }",
+        "}",
+        "",
+    ]
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines))
+
+
+def emit_eel(table, filename, default_target=60.0, default_reference=80.0):
+    """
+    JamesDSP Liveprog (EEL2) 스크립트: 타겟 / 참조 폰 슬라이더 + 바이퀘드 캐스케이드
+
+    EEL에는 계수 대신 (전체 이득, 바이퀘드별 주파수 / 이득 / Q) 파라미터를 넣고
+    @init에서 실제 srate로 RBJ 계수를 계산하므로 44.1 / 48 / 96kHz 어디서나 같은 스크립트를 씁니다.
+    """
+    if table.params is None:
+        raise ValueError("EEL 출력에는 피팅 파라미터가 필요합니다 (build_biquad_table 결과 사용).")
+    params_per_filter = 1 + table.num_biquads * 3
+    ref_max = _phon_of(table.ref_min_x10, table.ref_step_x10, table.ref_count - 1)
+    target_max = _phon_of(table.target_min_x10, table.target_step_x10, table.target_count - 1)
+
+    lines = [
+        "desc: Loudness compensation (biquad cascade)",
+        "//tags: loudness iir",
+        "",
+        f"targetPhon:{default_target:g}<{table.target_min_x10 / 10:g},{target_max:g},{table.target_step_x10 / 10:g}>Target phon",
+        f"referencePhon:{default_reference:g}<{table.ref_min_x10 / 10:g},{ref_max:g},{table.ref_step_x10 / 10:g}>Reference phon",
+        "",
+        "@init",
+        f"targetPhon = {default_target:g};",
+        f"referencePhon = {default_reference:g};",
+        "",
+    ]
+    lines += _header_comment(table, "//")
+    lines += [
+        f"NUM_BIQUADS = {table.num_biquads};",
+        f"PARAMS_PER_FILTER = {params_per_filter}; // gain dB, then (freq Hz, gain dB, Q) per biquad",
+        f"REF_MIN_X10 = {table.ref_min_x10};",
+        f"REF_STEP_X10 = {table.ref_step_x10};",
+        f"REF_COUNT = {table.ref_count};",
+        f"TARGET_MIN_X10 = {table.target_min_x10};",
+        f"TARGET_STEP_X10 = {table.target_step_x10};",
+        f"TARGET_COUNT = {table.target_count};",
+        "",
+        "tbl = 0;",
+    ]
+    index = 0
+    for ref_index in range(table.ref_count):
+        lines.append(f"// Reference Phon {_phon_of(table.ref_min_x10, table.ref_step_x10, ref_index):.1f}")
+        for target_index in range(table.target_count):
+            values = [table.gain_db[ref_index, target_index]] + table.params[ref_index, target_index].ravel().tolist()
+            lines.append("".join(f"tbl[{index + offset}]={value:.4f};" for offset, value in enumerate(values)))
+            index += params_per_filter
+    lines += [
+        "",
+        "coef = tbl + REF_COUNT * TARGET_COUNT * PARAMS_PER_FILTER; // b0 b1 b2 a1 a2 per biquad",
+        "state = coef + NUM_BIQUADS * 5; // z1 z2 per biquad and channel",
+        "",
+        f"function setBiquad(k type f0 gain q) local(A w0 cw alpha sA b0 b1 b2 a0 a1 a2 c) (",
+        "    A = pow(10, gain / 40);",
+        "    w0 = 2 * $pi * min(f0, srate * 0.49) / srate;",
+        "    cw = cos(w0);",
+        "    alpha = sin(w0) / (2 * q);",
+        "    sA = 2 * sqrt(A) * alpha;",
+        f"    type == {LOW_SHELF} ? (",
+        "        b0 = A * ((A + 1) - (A - 1) * cw + sA);",
+        "        b1 = 2 * A * ((A - 1) - (A + 1) * cw);",
+        "        b2 = A * ((A + 1) - (A - 1) * cw - sA);",
+        "        a0 = (A + 1) + (A - 1) * cw + sA;",
+        "        a1 = -2 * ((A - 1) + (A + 1) * cw);",
+        "        a2 = (A + 1) + (A - 1) * cw - sA;",
+        f"    ) : type == {HIGH_SHELF} ? (",
+        "        b0 = A * ((A + 1) + (A - 1) * cw + sA);",
+        "        b1 = -2 * A * ((A - 1) + (A + 1) * cw);",
+        "        b2 = A * ((A + 1) + (A - 1) * cw - sA);",
+        "        a0 = (A + 1) - (A - 1) * cw + sA;",
+        "        a1 = 2 * ((A - 1) - (A + 1) * cw);",
+        "        a2 = (A + 1) - (A - 1) * cw - sA;",
+        "    ) : (",
+        "        b0 = 1 + alpha * A;",
+        "        b1 = -2 * cw;",
+        "        b2 = 1 - alpha * A;",
+        "        a0 = 1 + alpha / A;",
+        "        a1 = -2 * cw;",
+        "        a2 = 1 - alpha / A;",
+        "    );",
+        "    c = coef + k * 5;",
+        "    c[0] = b0 / a0;",
+        "    c[1] = b1 / a0;",
+        "    c[2] = b2 / a0;",
+        "    c[3] = a1 / a0;",
+        "    c[4] = a2 / a0;",
+        ");",
+        "",
+        "refIndex = min(max(floor((floor(referencePhon * 10 + 0.5) - REF_MIN_X10) / REF_STEP_X10 + 0.5), 0), REF_COUNT - 1);",
+        "targetIndex = min(max(floor((floor(targetPhon * 10 + 0.5) - TARGET_MIN_X10) / TARGET_STEP_X10 + 0.5), 0), TARGET_COUNT - 1);",
+        "p = tbl + (refIndex * TARGET_COUNT + targetIndex) * PARAMS_PER_FILTER;",
+        "outGain = pow(10, p[0] / 20);",
+        "k = 0;",
+        "loop(NUM_BIQUADS,",
+        f"    setBiquad(k, k == 0 ? {LOW_SHELF} : (k == NUM_BIQUADS - 1 ? {HIGH_SHELF} : {PEAKING}), "
+        "p[1 + k * 3], p[2 + k * 3], p[3 + k * 3]);",
+        "    k += 1;",
+        ");",
+        "",
+        "@sample",
+        "x0 = spl0 * outGain;",
+        "x1 = spl1 * outGain;",
+        "k = 0;",
+        "loop(NUM_BIQUADS,",
+        "    c = coef + k * 5;",
+        "    s = state + k * 4;",
+        "    y0 = c[0] * x0 + s[0];",
+        "    s[0] = c[1] * x0 - c[3] * y0 + s[1];",
+        "    s[1] = c[2] * x0 - c[4] * y0;",
+        "    y1 = c[0] * x1 + s[2];",
+        "    s[2] = c[1] * x1 - c[3] * y1 + s[3];",
+        "    s[3] = c[2] * x1 - c[4] * y1;",
+        "    x0 = y0;",
+        "    x1 = y1;",
+        "    k += 1;",
+        ");",
+        "spl0 = x0;",
+        "spl1 = x1;",
+        "",
+    ]
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines))
+
+
+def write_fit_report(table, filename):
+    """필터별 피팅 오차 / 파라미터 CSV"""
+    with open(filename, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        header = ['target_phon', 'reference_phon', 'max_error_db', 'rms_error_db', 'gain_db']
+        for index in range(table.num_biquads):
+            header += [f'freq{index}_hz', f'gain{index}_db', f'q{index}']
+        writer.writerow(header)
+        for ref_index in range(table.ref_count):
+            for target_index in range(table.target_count):
+                row = [f"{_phon_of(table.target_min_x10, table.target_step_x10, target_index):.1f}",
+                       f"{_phon_of(table.ref_min_x10, table.ref_step_x10, ref_index):.1f}",
+                       f"{table.max_error_db[ref_index, target_index]:.3f}",
+                       f"{table.rms_error_db[ref_index, target_index]:.3f}",
+                       f"{table.gain_db[ref_index, target_index]:.3f}"]
+                for freq_hz, gain_db, q in table.params[ref_index, target_index]:
+                    row += [f"{freq_hz:.1f}", f"{gain_db:.3f}", f"{q:.4f}"]
+                writer.writerow(row)
+
+
+def generate_biquad_outputs(table, output_dir, basename="loudness_biquads"):
+    """C++ 헤더, Kotlin 로더, 바이너리 블롭, EEL 스크립트, 피팅 보고서를 한 번에 생성"""
+    os.makedirs(output_dir, exist_ok=True)
+    outputs = {
+        'cpp': f"{basename}_generated.h",
+        'kotlin': "LoudnessBiquadTable.kt",
+        'binary': f"{basename}.bin",
+        'eel': f"{basename}.eel",
+        'report': f"{basename}_fit.csv",
+    }
+    emit_cpp_header(table, os.path.join(output_dir, outputs['cpp']))
+    emit_kotlin(table, os.path.join(output_dir, outputs['kotlin']), outputs['binary'])
+    emit_binary(table, os.path.join(output_dir, outputs['binary']))
+    emit_eel(table, os.path.join(output_dir, outputs['eel']))
+    write_fit_report(table, os.path.join(output_dir, outputs['report']))
+    return {name: os.path.join(output_dir, path) for name, path in outputs.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ISO 226 라우드니스 곡선의 바이퀘드 캐스케이드 피팅 / 코드 생성")
+    parser.add_argument("--output-dir", default="generated_biquads", help="출력 디렉토리")
+    parser.add_argument("--reference-range", type=float, nargs=3, default=(75.0, 90.0, 1.0),
+                        metavar=("START", "END", "STEP"), help="참조 폰 범위")
+    parser.add_argument("--target-range", type=float, nargs=3, default=(40.0, 90.0, 0.1),
+                        metavar=("START", "END", "STEP"), help="타겟 폰 범위")
+    parser.add_argument("--biquads", type=int, default=6, help="필터당 바이퀘드 수")
+    parser.add_argument("--iterations", type=int, default=60, help="Levenberg-Marquardt 최대 반복 수")
+    parser.add_argument("--fs", type=int, default=48000)
+    parser.add_argument("--numtaps", type=int, default=4095, help="비교할 FIR 탭 수 (연산량 보고용)")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    generator = BulkFIRFilterGenerator(fs=args.fs, numtaps=args.numtaps)
+    table = build_biquad_table(generator, tuple(args.reference_range), tuple(args.target_range),
+                               num_biquads=args.biquads, iterations=args.iterations)
+    outputs = generate_biquad_outputs(table, args.output_dir)
+
+    print(f"\n=== 바이퀘드 피팅: 참조 {table.ref_count}개 x 타겟 {table.target_count}개, "
+          f"필터당 {table.num_biquads}개 ({time.time() - start_time:.1f}초) ===")
+    print(f"최대 오차: 최대 {np.max(table.max_error_db):.2f} dB | 평균 {np.mean(table.max_error_db):.2f} dB | "
+          f"95% {np.percentile(table.max_error_db, 95):.2f} dB")
+    print(f"RMS 오차: 평균 {np.mean(table.rms_error_db):.3f} dB")
+    print(f"샘플당 곱셈: 바이퀘드 {table.num_biquads * 5}회 vs FIR {generator.numtaps}회 (직접 컨볼루션)")
+    for name, path in outputs.items():
+        print(f"  {name}: {path}")
+
+
+if __name__ == "__main__":
+    main()
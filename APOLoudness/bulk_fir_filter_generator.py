@@ -1,12 +1,135 @@
 import numpy as np
-from scipy import signal
-import wave
-import struct
 import os
+import signal as os_signal
 import time
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 import csv
+import hashlib
 import json
+from fine_curve_table import FineCurveView
+from loudness_curves import ISO_FREQ, ISO_CURVES, fine_curve_table, window_array
+from filter_wav import write_filter_wav, wav_samples, write_wav_samples
+from filter_bank import FilterBank, FilterBankWriter
+from generation_metrics import GenerationMetrics, METRICS_FILENAME, PROFILE_FILENAME
+from filter_cache import FilterCache
+from filter_writer import OrderedWriterPool, StageTimer
+from metadata_store import MetadataStore
+
+
+# 필터 설계 방식이 바뀌면 올려서 증분 생성 시 모든 필터를 다시 만들도록 함
+GENERATOR_VERSION = "2.0"
+
+MANIFEST_FILENAME = "filter_manifest.jsonl"
+MULTI_RATE_INDEX_FILENAME = "multi_rate_index.json"
+
+# 안드로이드 기기 / Equalizer APO 장치에서 쓰는 샘플링 주파수
+MULTI_RATE_SAMPLE_RATES = (44100, 48000, 88200, 96000)
+
+# 워커 프로세스별 생성기 인스턴스 (프로세스 풀 초기화 시 한 번만 전달)
+_worker_generator = None
+
+
+def _init_worker(generator):
+    """프로세스 풀 워커 초기화: 생성기 복사본 보관, Ctrl-C는 부모 프로세스에서만 처리"""
+    global _worker_generator
+    _worker_generator = generator
+    os_signal.signal(os_signal.SIGINT, os_signal.SIG_IGN)
+
+
+def _design_chunk_task(task):
+    """워커 프로세스에서 필터 묶음 설계 (예외는 결과에 담아 부모의 오류 카운트에 반영)"""
+    chunk, design_options, debug = task
+    return _worker_generator._design_chunk(chunk, debug=debug, **design_options)
+
+
+def _design_gains_task(task):
+    """워커 프로세스에서 이득 행렬 묶음을 한 샘플링 주파수로 설계 (예외는 결과로 반환)"""
+    return _worker_generator._design_gains_safely(*task)
+
+
+def rate_directory_name(fs):
+    """generate_multi_rate의 샘플링 주파수별 하위 디렉토리 이름 (예: 44100Hz)"""
+    return f"{int(fs)}Hz"
+
+
+def phon_axis_values(phon_range):
+    """
+    폰 축 값 배열 (0.1 폰 반올림)
+
+    phon_range는 (start, end, step) 튜플 또는 {'values': [...]} 딕셔너리 (adaptive_grid의 비균일 축)입니다.
+    """
+    if isinstance(phon_range, dict):
+        return np.round(np.asarray(phon_range['values'], dtype=float), 1)
+    start, end, step = phon_range
+    return np.round(np.arange(start, end + step*0.001, step), 1)
+
+
+def describe_phon_range(phon_range):
+    """진행 출력용 범위 설명"""
+    if isinstance(phon_range, dict):
+        values = phon_axis_values(phon_range)
+        return f"{values[0]} ~ {values[-1]} (비균일 {len(values)}개)"
+    start, end, step = phon_range
+    return f"{start} ~ {end} (step: {step})"
+
+
+def phon_grid(target_range, reference_range):
+    """
+    두 폰 축의 (타겟, 참조) 격자 쌍 리스트 (타겟 우선 순서, 0.1 폰 반올림)
+
+    generate_filter_range와 shard_merge가 같은 격자 / 순서를 쓰도록 공유합니다.
+    """
+    target_values = phon_axis_values(target_range)
+    ref_values = phon_axis_values(reference_range)
+    return [(target_phon, ref_phon) for target_phon in target_values for ref_phon in ref_values]
+
+
+def shard_grid_indices(total_filters, shard):
+    """
+    샤드 (index, count)에 속하는 격자 인덱스 리스트
+
+    격자 인덱스 % count == index 인 필터를 고르는 인터리브 분할입니다.
+    폰 영역마다 설계 비용 (최소 위상, 탭 탐색)이 달라도 샤드별 작업량이 고르게 나뉩니다.
+    """
+    if shard is None:
+        return list(range(total_filters))
+    shard_index, shard_count = shard
+    if shard_count < 1 or not 0 <= shard_index < shard_count:
+        raise ValueError(f"잘못된 샤드 지정: {shard_index}/{shard_count}")
+    return list(range(shard_index, total_filters, shard_count))
+
+
+def print_progress_event(event):
+    """
+    generate_filter_range 기본 진행 상황 콜백 (콘솔 출력)
+
+    이벤트 종류:
+        progress: 필터 하나 완료 (current, total, success, errors, elapsed, eta) - 10% 단위로 출력
+        error: 필터 생성 실패 (target_phon, reference_phon, error)
+        interrupted: 사용자 중단 (success)
+        done: 완료 (success, errors, skipped, total_time)
+    """
+    kind = event['event']
+    if kind == 'progress':
+        if event['current'] % max(1, event['total'] // 10) == 0:
+            print(f"진행률: {event['current'] / event['total'] * 100:.1f}% ({event['current']}/{event['total']}) "
+                  f"| 성공: {event['success']} | 실패: {event['errors']} "
+                  f"| 예상 남은 시간: {event['eta']:.1f}초")
+    elif kind == 'error':
+        print(f"오류 발생 T={event['target_phon']:.1f}, R={event['reference_phon']:.1f}: {event['error']}")
+    elif kind == 'interrupted':
+        print(f"\n사용자에 의해 중단됨. 현재까지 {event['success']}개 필터 생성완료.")
+    elif kind == 'done':
+        print(f"\n=== 생성 완료 ===")
+        print(f"성공: {event['success']}개")
+        print(f"실패: {event['errors']}개")
+        if event['skipped'] is not None:
+            print(f"건너뜀 (최신 상태): {event['skipped']}개")
+        print(f"총 소요 시간: {event['total_time']:.1f}초")
+        print(f"평균 필터당 시간: {event['total_time']/max(1, event['success']):.3f}초")
+
 
 class BulkFIRFilterGenerator:
     """
@@ -20,83 +143,53 @@ class BulkFIRFilterGenerator:
     - 필터 품질 검증
     """
     
-    def __init__(self, fs=48000, numtaps=4095):
+    def __init__(self, fs=48000, numtaps=4095, verbose=False, use_cache=True, device_correction=None):
+        """
+        Args:
+            verbose: True이면 곡선 보간 진행 출력
+            use_cache: True이면 보간 곡선 / 윈도우를 미리 계산한 캐시에서 읽음 (loudness_curves.cache_directory)
+            device_correction: 모든 필터에 포함할 장치 보정 곡선 (device_correction.DeviceCorrection, None이면 없음)
+        """
         self.fs = fs
         self.numtaps = numtaps if numtaps % 2 == 1 else numtaps + 1  # 홀수 탭 보장
+        self.verbose = verbose
+        self.use_cache = use_cache
+        self.device_correction = device_correction
+        self._design_freqs_cache = None  # (보정 서명, 설계 주파수) - design_frequencies용
         
-        # ISO 226 등라우드니스 곡선 데이터
-        self.iso_freq = [20, 25, 31.5, 40, 50, 63, 80, 100, 125, 160, 200, 250, 315, 400, 500, 630, 800, 1000, 1250, 1600, 2000, 2500, 3150, 4000, 5000, 6300, 8000, 10000, 12500, 16000, 20000]
-        
-        self.iso_curves = {
-            0: [76.5517, 65.6189, 55.1228, 45.5340, 37.6321, 30.8650, 25.0238, 20.5100, 16.6458, 13.1160, 10.0883, 7.5436, 5.1137, 3.0589, 1.4824, 0.3029, -0.3026, -0.0103, 1.0335, -1.1863, -4.1116, -7.0462, -9.0260, -8.4944, -4.4829, 3.2817, 9.8291, 10.4757, 8.3813, 14.1000, 79.6500],
-            10: [83.7500, 75.7579, 68.2089, 61.1365, 54.9638, 49.0098, 43.2377, 38.1338, 33.4772, 28.7734, 24.8417, 21.3272, 18.0522, 15.1379, 12.9768, 11.1791, 9.9918, 9.9996, 11.2621, 10.4291, 7.2744, 4.4508, 3.0404, 3.7961, 7.4583, 14.3483, 20.9841, 23.4306, 22.3269, 25.1700, 81.4700],
-            20: [89.5781, 82.6513, 75.9764, 69.6171, 64.0178, 58.5520, 53.1898, 48.3809, 43.9414, 39.3702, 35.5126, 31.9922, 28.6866, 25.6703, 23.4263, 21.4825, 20.1011, 20.0052, 21.4618, 21.4013, 18.1515, 15.3844, 14.2559, 15.1415, 18.6349, 25.0196, 31.5227, 34.4256, 33.0444, 34.6700, 84.1800],
-            40: [99.8539, 93.9444, 88.1659, 82.6287, 77.7849, 73.0825, 68.4779, 64.3711, 60.5855, 56.7022, 53.4087, 50.3992, 47.5775, 44.9766, 43.0507, 41.3392, 40.0618, 40.0100, 41.8195, 42.5076, 39.2296, 36.5090, 35.6089, 36.6492, 40.0077, 45.8283, 51.7968, 54.2841, 51.4859, 51.9600, 92.7700],
-            60: [109.5113, 104.2279, 99.0779, 94.1773, 89.9635, 85.9434, 82.0534, 78.6546, 75.5635, 72.4743, 69.8643, 67.5348, 65.3917, 63.4510, 62.0512, 60.8150, 59.8867, 60.0116, 62.1549, 63.1894, 59.9616, 57.2552, 56.4239, 57.5699, 60.8882, 66.3613, 71.6640, 73.1551, 68.6308, 68.4300, 104.9200],
-            80: [118.9900, 114.2326, 109.6457, 105.3367, 101.7214, 98.3618, 95.1729, 92.4797, 90.0892, 87.8162, 85.9166, 84.3080, 82.8934, 81.6786, 80.8634, 80.1736, 79.6691, 80.0121, 82.4834, 83.7408, 80.5867, 77.8847, 77.0748, 78.3124, 81.6182, 86.8087, 91.4062, 91.7361, 85.4068, 84.6700, 118.9500],
-            100: [128.4100, 124.1500, 120.1100, 116.3800, 113.3500, 110.6500, 108.1600, 106.1700, 104.4800, 103.0300, 101.8500, 100.9700, 100.300, 99.8300, 99.6200, 99.500, 99.4400, 100.0100, 102.8100, 104.2500, 101.1800, 98.4800, 97.6700, 99.00, 102.300, 107.2300, 111.1100, 110.2300, 102.0700, 100.8300, 133.7300]
-        }
+        # ISO 226 등라우드니스 곡선 데이터 (loudness_curves 공용 데이터의 복사본)
+        self.iso_freq = list(ISO_FREQ)
+        self.iso_curves = {phon_level: list(curve) for phon_level, curve in ISO_CURVES.items()}
         
+        self.fine_curve_table = None
         self.fine_curves = None
+        self._metrics = None  # generate_filter_range(metrics=...) 실행 중에만 설정
+        self._filter_cache = None  # get_filter 캐시 (configure_filter_cache로 설정)
+        self._signature_cache = None  # (곡선 배열, 설계 입력 서명) - _design_signature용
+        self._batch_plans = {}  # (fs, numtaps, window, 보정 서명) -> 배치 설계 계획
         self.setup_interpolated_curves()
     
     def setup_interpolated_curves(self):
-        """세밀한 보간 곡선 초기화"""
-        print("등라우드니스 곡선 보간 중...")
-        
-        # 1차 보간: 중간 폰 레벨 생성
-        primary_curves = dict(self.iso_curves)
-        for phon_level in [30, 50, 70, 90]:
-            lower_phon = phon_level - 10
-            upper_phon = phon_level + 10
-            
-            if lower_phon in self.iso_curves and upper_phon in self.iso_curves:
-                weight = 0.5
-                lower_curve = np.array(self.iso_curves[lower_phon])
-                upper_curve = np.array(self.iso_curves[upper_phon])
-                primary_curves[phon_level] = (
-                    lower_curve * (1 - weight) + upper_curve * weight
-                ).tolist()
-        
-        # 2차 세밀한 보간: 0.1 폰 단위
-        self.fine_curves = {}
-        sorted_phon_levels = sorted(primary_curves.keys())
-        
-        for phon_int in range(0, 1001):  # 0.0 ~ 100.0, 0.1 단위
-            phon_val = phon_int / 10.0
-            
-            # 보간 구간 찾기
-            lower_phon = None
-            upper_phon = None
-            
-            for phon_level in sorted_phon_levels:
-                if phon_level <= phon_val:
-                    lower_phon = phon_level
-                if phon_level >= phon_val:
-                    upper_phon = phon_level
-                    break
-            
-            if lower_phon is None:
-                lower_phon = sorted_phon_levels[0]
-            if upper_phon is None:
-                upper_phon = sorted_phon_levels[-1]
-            
-            # 선형 보간
-            if lower_phon == upper_phon:
-                interpolated_curve = primary_curves[lower_phon][:]
-            else:
-                weight = (phon_val - lower_phon) / (upper_phon - lower_phon)
-                lower_curve = np.array(primary_curves[lower_phon])
-                upper_curve = np.array(primary_curves[upper_phon])
-                interpolated_curve = (
-                    lower_curve * (1 - weight) + upper_curve * weight
-                ).tolist()
-            
-            self.fine_curves[phon_val] = [round(val, 4) for val in interpolated_curve]
+        """
+        세밀한 보간 곡선 초기화
+
+        1차 보간으로 중간 폰 레벨 (30, 50, 70, 90)을 만들고 0.1 폰 단위로 다시 보간합니다
+        (1001 x ISO 주파수 연속 배열, 행 = 폰 x 10). 같은 곡선 데이터의 결과는 캐시 파일에서 읽습니다.
+        """
+        if self.verbose:
+            print("등라우드니스 곡선 보간 중...")
+        
+        self.fine_curve_table = fine_curve_table(self.iso_curves, step=0.1, use_cache=self.use_cache)
+        self.fine_curves = FineCurveView(self.fine_curve_table, step=0.1)
         
-        print(f"보간 완료: {len(self.fine_curves)}개 폰 레벨 생성")
+        if self.verbose:
+            print(f"보간 완료: {len(self.fine_curves)}개 폰 레벨 생성")
     
-    def design_single_filter(self, target_phon, reference_phon, window='hann', debug=False):
+    def _stage(self, name):
+        """단계 시간 측정 컨텍스트 (메트릭 수집 중이 아니면 아무것도 하지 않음)"""
+        return self._metrics.stage(name) if self._metrics is not None else nullcontext()
+    
+    def design_single_filter(self, target_phon, reference_phon, window='hann', debug=False, phase='linear'):
         """
         단일 FIR 필터 설계 (개선된 firwin2 방식)
         
@@ -105,7 +198,12 @@ class BulkFIRFilterGenerator:
         2. 1kHz 기준점으로 상대 이득 정규화
         3. firwin2를 사용한 임의 주파수 응답 근사
         4. 1kHz에서 정확히 0dB가 되도록 후처리
+        
+        phase="minimum"이면 같은 크기 응답의 최소 위상 필터로 변환합니다 (그룹 지연 최소화).
         """
+        if phase not in ('linear', 'minimum'):
+            raise ValueError(f"알 수 없는 위상 방식: {phase}")
+        
         target_key = round(target_phon, 1)
         reference_key = round(reference_phon, 1)
         
@@ -113,23 +211,22 @@ class BulkFIRFilterGenerator:
             raise ValueError(f"폰 레벨을 찾을 수 없습니다: T={target_key}, R={reference_key}")
         
         # SPL 차이 계산
-        target_curve = np.array(self.fine_curves[target_key])
-        reference_curve = np.array(self.fine_curves[reference_key])
-        db_diff = reference_curve - target_curve
+        with self._stage('design.curve_lookup'):
+            db_diff = self.fine_curves[reference_key] - self.fine_curves[target_key]
         
         # 1kHz 기준점 (인덱스 17)
         idx_1khz = self.iso_freq.index(1000)
         reference_db_at_1khz = db_diff[idx_1khz]
         
-        # 상대 이득 계산
+        # 상대 이득 계산 (장치 보정이 있으면 설계 주파수로 확장하여 포함)
         relative_gains_db = reference_db_at_1khz - db_diff
-        relative_gains_linear = 10**(relative_gains_db / 20.0)
+        relative_gains_linear = self._apply_device_correction((10**(relative_gains_db / 20.0))[np.newaxis])[0]
         
         # firwin2를 위한 주파수/이득 포인트 설정
         nyquist_freq = self.fs / 2.0
         
         # ISO 주파수와 이득을 쌍으로 처리
-        iso_freq_gain_pairs = list(zip(self.iso_freq, relative_gains_linear))
+        iso_freq_gain_pairs = list(zip(self.design_frequencies(), relative_gains_linear))
         
         # 나이퀴스트 주파수 이하의 주파수만 선택
         valid_pairs = [(freq, gain) for freq, gain in iso_freq_gain_pairs if freq < nyquist_freq]
@@ -191,84 +288,718 @@ class BulkFIRFilterGenerator:
             print(f"  - 순증가: {np.all(np.diff(final_freqs) > 0)}")
             print("=" * 50)
         
+        from scipy import signal  # 필터별 firwin2 경로에서만 필요 (배치 경로는 scipy 없이 동작)
+
         try:
             # FIR 필터 설계 (실제 주파수 단위 사용, fs 파라미터 포함)
-            fir_coeff = signal.firwin2(self.numtaps, final_freqs, final_gains, 
-                                      window=window, fs=self.fs)
+            with self._stage('design.firwin2'):
+                fir_coeff = signal.firwin2(self.numtaps, final_freqs, final_gains, 
+                                          window=window, fs=self.fs)
             
-            # 1kHz 정규화
-            w_1k, h_1k = signal.freqz(fir_coeff, worN=[1000], fs=self.fs)
-            gain_1k = np.abs(h_1k[0])
+            if phase == 'minimum':
+                with self._stage('design.minimum_phase'):
+                    fir_coeff = self._minimum_phase_batch(fir_coeff[np.newaxis])[0]
             
-            if gain_1k > 1e-9:
-                fir_coeff /= gain_1k
+            # 1kHz 정규화
+            with self._stage('design.normalize_1khz'):
+                w_1k, h_1k = signal.freqz(fir_coeff, worN=[1000], fs=self.fs)
+                gain_1k = np.abs(h_1k[0])
+                
+                if gain_1k > 1e-9:
+                    fir_coeff /= gain_1k
             
-            return fir_coeff, {
+            filter_info = {
                 'target_phon': target_phon,
                 'reference_phon': reference_phon,
                 'max_boost_db': float(20 * np.log10(np.max(relative_gains_linear))),
                 'max_cut_db': float(20 * np.log10(np.min(relative_gains_linear))),
                 'filter_length': len(fir_coeff)
             }
+            if phase != 'linear':
+                filter_info['phase'] = phase
+            return fir_coeff, filter_info
             
         except Exception as e:
             raise RuntimeError(f"필터 설계 실패 T={target_key}, R={reference_key}: {e}")
     
-    def save_filter_to_wav(self, coefficients, filename, normalize=True):
-        """FIR 계수를 WAV 파일로 저장"""
-        if normalize:
-            # 16비트 범위로 정규화
-            max_val = np.max(np.abs(coefficients))
-            if max_val > 0:
-                scaled_coeff = np.int16(coefficients / max_val * 32767 * 0.9)  # 약간의 헤드룸
+    def _relative_gains_matrix(self, pairs):
+        """
+        (타겟, 참조) 쌍 배열에 대한 ISO 주파수별 상대 이득 (선형) 행렬 계산
+
+        Returns:
+            (N, len(design_frequencies())) 배열 - 1kHz에서 0dB가 되도록 정렬된 선형 이득
+            (장치 보정이 없으면 설계 주파수 = ISO 주파수)
+        """
+        pairs = np.asarray(pairs, dtype=float).reshape(-1, 2)
+        target_keys = np.round(pairs[:, 0], 1)
+        reference_keys = np.round(pairs[:, 1], 1)
+
+        try:
+            target_rows = self.fine_curves.indices(target_keys)
+            reference_rows = self.fine_curves.indices(reference_keys)
+        except KeyError:
+            for target_key, reference_key in zip(target_keys, reference_keys):
+                if target_key not in self.fine_curves or reference_key not in self.fine_curves:
+                    raise ValueError(f"폰 레벨을 찾을 수 없습니다: T={target_key}, R={reference_key}")
+            raise
+
+        db_diff = self.fine_curve_table[reference_rows] - self.fine_curve_table[target_rows]
+
+        idx_1khz = self.iso_freq.index(1000)
+        relative_gains_db = db_diff[:, idx_1khz:idx_1khz + 1] - db_diff
+        return self._apply_device_correction(10**(relative_gains_db / 20.0))
+
+    def design_frequencies(self):
+        """
+        이득 행렬 열 / 설계 중단점 주파수 리스트
+
+        장치 보정이 없으면 ISO 주파수, 있으면 ISO 주파수와 보정 곡선 주파수의 합집합입니다.
+        """
+        correction = self.device_correction
+        if correction is None:
+            return self.iso_freq
+        if self._design_freqs_cache is not None and self._design_freqs_cache[0] == correction.signature():
+            return self._design_freqs_cache[1]
+        freqs = sorted(set(float(freq) for freq in self.iso_freq) | set(float(freq) for freq in correction.freqs))
+        self._design_freqs_cache = (correction.signature(), freqs)
+        return freqs
+
+    def _apply_device_correction(self, relative_gains_linear):
+        """
+        ISO 주파수별 상대 이득 행렬 (N, len(iso_freq))에 장치 보정을 곱해 설계 주파수 행렬로 변환
+
+        라우드니스 이득은 firwin2와 같이 ISO 주파수 사이를 선형 보간하여 설계 주파수에서 읽고,
+        보정 곡선 (로그 주파수 dB 보간)을 모든 행에 한 번에 곱한 뒤 1kHz에서 다시 0dB로 정규화합니다.
+        장치 보정이 없으면 입력을 그대로 반환합니다.
+        """
+        correction = self.device_correction
+        if correction is None:
+            return relative_gains_linear
+        freqs = np.asarray(self.design_frequencies(), dtype=float)
+        loudness_gains = relative_gains_linear @ self._interp_matrix(freqs, np.asarray(self.iso_freq, dtype=float)).T
+        combined = loudness_gains * 10**(correction.gains_db_at(freqs) / 20.0)
+        idx_1khz = int(np.flatnonzero(freqs == 1000)[0])
+        return combined / combined[:, idx_1khz:idx_1khz + 1]
+
+    def _correction_signature(self):
+        """장치 보정 서명 (없으면 None) - 설계 계획 / 캐시 / 매니페스트 키용"""
+        correction = self.device_correction
+        return None if correction is None else correction.signature()
+
+    def _batch_design_plan(self, window='hann', numtaps=None, fs=None):
+        """
+        배치 설계에 공통으로 쓰이는 보간 행렬, 위상 이동, 윈도우, 1kHz 평가 벡터 (캐시됨)
+
+        signal.firwin2 내부와 동일한 계산 단계를 모든 필터가 공유하도록 한 번만 준비합니다.
+        fs를 지정하면 self.fs 대신 그 샘플링 주파수의 계획을 만듭니다 (다중 샘플링 주파수 생성용).
+        """
+        numtaps = numtaps or self.numtaps
+        fs = fs or self.fs
+        plan_key = (fs, numtaps, window, self._correction_signature())
+        if plan_key in self._batch_plans:
+            return self._batch_plans[plan_key]
+
+        nyquist_freq = fs / 2.0
+        design_freqs = np.array(self.design_frequencies(), dtype=float)
+        valid_mask = design_freqs < nyquist_freq
+        if not np.any(valid_mask):
+            raise ValueError("유효한 ISO 주파수가 없습니다.")
+
+        # firwin2와 동일한 중단점: 0Hz와 나이퀴스트는 양 끝 이득으로 채움
+        valid_freqs = design_freqs[valid_mask]
+        breakpoints = np.concatenate(([0.0], valid_freqs, [nyquist_freq]))
+
+        # firwin2와 동일한 균일 주파수 격자
+        nfreqs = 1 + 2 ** int(np.ceil(np.log2(numtaps)))
+        grid = np.linspace(0.0, nyquist_freq, nfreqs)
+
+        plan = {
+            'valid_mask': valid_mask,
+            'breakpoints': breakpoints,
+            'interp_matrix': self._interp_matrix(grid, breakpoints),
+            'shift': np.exp(-(numtaps - 1) / 2. * 1j * np.pi * grid / nyquist_freq),
+            'window': window_array(window, numtaps, use_cache=self.use_cache),
+            'eval_1khz': np.exp(-1j * 2 * np.pi * 1000 / fs * np.arange(numtaps)),
+        }
+        self._batch_plans[plan_key] = plan
+        return plan
+
+    @staticmethod
+    def _interp_matrix(freqs, breakpoints):
+        """np.interp(freqs, breakpoints, gains)를 (freqs x 중단점) 가중치 행렬로 표현"""
+        interp_matrix = np.empty((len(freqs), len(breakpoints)))
+        for column in range(len(breakpoints)):
+            unit = np.zeros(len(breakpoints))
+            unit[column] = 1.0
+            interp_matrix[:, column] = np.interp(freqs, breakpoints, unit)
+        return interp_matrix
+
+    def _breakpoint_gains(self, relative_gains_linear, plan):
+        """ISO 주파수별 이득을 설계 중단점 이득으로 변환: [첫 이득, 유효 ISO 이득..., 마지막 이득]"""
+        valid_gains = relative_gains_linear[:, plan['valid_mask']]
+        return np.concatenate((valid_gains[:, :1], valid_gains, valid_gains[:, -1:]), axis=1)
+
+    @staticmethod
+    def _minimum_phase_batch(fir_coeffs):
+        """
+        선형 위상 필터 묶음을 같은 크기 응답의 최소 위상 필터로 변환 (켑스트럼 방식)
+
+        signal.minimum_phase(method='homomorphic')와 달리 크기 응답의 제곱근을 취하지 않으므로
+        원래 필터와 같은 크기 응답을 유지하며, 길이도 그대로 유지합니다.
+        """
+        numtaps = fir_coeffs.shape[1]
+        n_fft = 2 ** int(np.ceil(np.log2(numtaps * 8)))
+        magnitude = np.abs(np.fft.rfft(fir_coeffs, n=n_fft, axis=1))
+        cepstrum = np.fft.irfft(np.log(np.maximum(magnitude, 1e-10)), n=n_fft, axis=1)
+
+        # 인과적 켑스트럼으로 접기
+        fold = np.zeros(n_fft)
+        fold[0] = 1.0
+        fold[1:n_fft // 2] = 2.0
+        fold[n_fft // 2] = 1.0
+
+        min_phase_spectrum = np.exp(np.fft.rfft(cepstrum * fold, axis=1))
+        return np.fft.irfft(min_phase_spectrum, n=n_fft, axis=1)[:, :numtaps]
+
+    def _design_from_gains(self, relative_gains_linear, window='hann', numtaps=None, phase='linear', fs=None):
+        """
+        설계 주파수별 상대 이득 행렬 (N, len(design_frequencies()))로부터 FIR 필터 묶음 설계
+
+        fs를 지정하면 같은 이득 행렬을 그 샘플링 주파수로 설계합니다 (None이면 self.fs).
+
+        Returns:
+            (N, numtaps) 계수 배열 (1kHz에서 0dB로 정규화됨)
+        """
+        if phase not in ('linear', 'minimum'):
+            raise ValueError(f"알 수 없는 위상 방식: {phase}")
+
+        numtaps = numtaps or self.numtaps
+        plan = self._batch_design_plan(window, numtaps, fs)
+        gain_matrix = self._breakpoint_gains(relative_gains_linear, plan)
+
+        # 균일 격자 보간 -> 위상 이동 -> 배치 irfft -> 윈도우
+        with self._stage('design.frequency_sampling'):
+            desired_response = gain_matrix @ plan['interp_matrix'].T
+            fir_coeffs = np.fft.irfft(desired_response * plan['shift'], axis=1)[:, :numtaps]
+            fir_coeffs *= plan['window']
+
+        if phase == 'minimum':
+            with self._stage('design.minimum_phase'):
+                fir_coeffs = self._minimum_phase_batch(fir_coeffs)
+
+        # 1kHz 정규화 (벡터 연산)
+        with self._stage('design.normalize_1khz'):
+            gains_1k = np.abs(fir_coeffs @ plan['eval_1khz'])
+            normalize_mask = gains_1k > 1e-9
+            fir_coeffs[normalize_mask] /= gains_1k[normalize_mask, np.newaxis]
+        return fir_coeffs
+
+    def _filter_infos(self, pairs, relative_gains_linear, filter_length, phase='linear'):
+        """배치 설계 결과의 필터 정보 딕셔너리 리스트"""
+        max_boost_db = 20 * np.log10(np.max(relative_gains_linear, axis=1))
+        max_cut_db = 20 * np.log10(np.min(relative_gains_linear, axis=1))
+        filter_infos = []
+        for (target_phon, reference_phon), boost, cut in zip(pairs, max_boost_db, max_cut_db):
+            filter_info = {
+                'target_phon': target_phon,
+                'reference_phon': reference_phon,
+                'max_boost_db': float(boost),
+                'max_cut_db': float(cut),
+                'filter_length': filter_length
+            }
+            if phase != 'linear':
+                filter_info['phase'] = phase
+            filter_infos.append(filter_info)
+        return filter_infos
+
+    def design_filter_batch(self, pairs, window='hann', numtaps=None, phase='linear'):
+        """
+        여러 (타겟, 참조) 쌍의 FIR 필터를 한 번에 설계 (배치 firwin2 방식)
+
+        design_single_filter와 같은 주파수 샘플링 설계를 이득 행렬 전체에 대해
+        한 번의 irfft와 윈도우 곱으로 수행하고, 1kHz 정규화도 벡터 연산으로 처리합니다.
+        결과는 design_single_filter 출력과 최대 계수 대비 1e-12 이내로 일치합니다.
+
+        Args:
+            pairs: (target_phon, reference_phon) 쌍의 시퀀스 또는 (N, 2) 배열
+            window: signal.get_window에 전달할 윈도우
+            numtaps: 필터 길이 (None이면 self.numtaps)
+            phase: "linear" (선형 위상) 또는 "minimum" (최소 위상, 그룹 지연 최소화)
+
+        Returns:
+            (N, numtaps) 계수 배열, 필터 정보 딕셔너리 리스트
+        """
+        numtaps = numtaps or self.numtaps
+        pairs = [(float(target_phon), float(reference_phon)) for target_phon, reference_phon in pairs]
+        if not pairs:
+            return np.empty((0, numtaps)), []
+
+        with self._stage('design.curve_lookup'):
+            relative_gains_linear = self._relative_gains_matrix(pairs)
+        fir_coeffs = self._design_from_gains(relative_gains_linear, window, numtaps, phase)
+        return fir_coeffs, self._filter_infos(pairs, relative_gains_linear, numtaps, phase)
+
+    def _response_error_db(self, fir_coeffs, relative_gains_linear, min_freq=20.0, max_freq=20000.0,
+                           num_points=256):
+        """
+        필터 묶음의 크기 응답과 ISO 차이 목표 곡선 사이의 최대 절대 오차 (dB)
+
+        목표 곡선은 설계와 같은 선형 보간이며, min_freq ~ max_freq (나이퀴스트 미만) 로그 간격에서 평가합니다.
+        """
+        numtaps = fir_coeffs.shape[1]
+        plan = self._batch_design_plan('hann', numtaps)
+        max_freq = min(max_freq, self.fs / 2.0 * 0.999)
+        freqs = np.logspace(np.log10(min_freq), np.log10(max_freq), num_points)
+
+        target_response = self._breakpoint_gains(relative_gains_linear, plan) @ \
+            self._interp_matrix(freqs, plan['breakpoints']).T
+        eval_matrix = np.exp(-1j * 2 * np.pi * np.outer(np.arange(numtaps), freqs) / self.fs)
+        actual_response = np.abs(fir_coeffs @ eval_matrix)
+
+        error_db = 20 * np.log10(np.maximum(actual_response, 1e-12) / target_response)
+        return np.max(np.abs(error_db), axis=1)
+
+    def _tap_candidates(self, min_numtaps=31):
+        """탭 수 탐색 후보: min_numtaps부터 self.numtaps까지 약 1/4 옥타브 간격의 홀수"""
+        candidates = []
+        numtaps = float(min_numtaps)
+        while numtaps < self.numtaps:
+            odd_numtaps = int(numtaps) | 1
+            if not candidates or odd_numtaps > candidates[-1]:
+                candidates.append(odd_numtaps)
+            numtaps *= 2 ** 0.25
+        candidates.append(self.numtaps)
+        return candidates
+
+    def search_min_numtaps(self, pairs, max_error_db, window='hann', phase='linear', min_numtaps=31):
+        """
+        목표 오차 이내를 만족하는 가장 짧은 필터 탐색
+
+        탭 수 후보를 짧은 순으로 배치 설계하여, 20Hz~20kHz에서 ISO 차이 목표 곡선과의
+        최대 오차가 max_error_db 이하가 되는 첫 후보를 필터별로 선택합니다.
+        어떤 후보도 만족하지 못하면 self.numtaps 필터를 사용하고 within_tolerance=False로 기록합니다.
+
+        Returns:
+            계수 배열 리스트 (필터마다 길이가 다를 수 있음), 필터 정보 딕셔너리 리스트
+        """
+        pairs = [(float(target_phon), float(reference_phon)) for target_phon, reference_phon in pairs]
+        with self._stage('design.curve_lookup'):
+            relative_gains_linear = self._relative_gains_matrix(pairs)
+
+        fir_coeffs = [None] * len(pairs)
+        achieved_errors = np.full(len(pairs), np.inf)
+        remaining = np.arange(len(pairs))
+        candidates = self._tap_candidates(min_numtaps)
+
+        for candidate in candidates:
+            if len(remaining) == 0:
+                break
+            candidate_coeffs = self._design_from_gains(relative_gains_linear[remaining], window,
+                                                       candidate, phase)
+            with self._stage('design.tap_search_error'):
+                errors = self._response_error_db(candidate_coeffs, relative_gains_linear[remaining])
+            accepted = (errors <= max_error_db) | (candidate == candidates[-1])
+            for row in np.flatnonzero(accepted):
+                fir_coeffs[remaining[row]] = candidate_coeffs[row]
+                achieved_errors[remaining[row]] = errors[row]
+            remaining = remaining[~accepted]
+
+        filter_infos = []
+        for pair, coeffs, achieved_error, gains in zip(pairs, fir_coeffs, achieved_errors,
+                                                      relative_gains_linear):
+            filter_info = self._filter_infos([pair], gains[np.newaxis], len(coeffs), phase)[0]
+            filter_info['tap_search'] = {
+                'max_error_db': float(max_error_db),
+                'achieved_error_db': float(achieved_error),
+                'within_tolerance': bool(achieved_error <= max_error_db),
+            }
+            filter_infos.append(filter_info)
+        return fir_coeffs, filter_infos
+    
+    def configure_filter_cache(self, max_memory_mb=64, disk_dir=None, max_disk_mb=512):
+        """
+        get_filter 캐시 설정 (기존 메모리 캐시는 버림)
+
+        Args:
+            max_memory_mb: 메모리 계층 최대 크기
+            disk_dir: 디스크 계층 디렉토리 (None이면 메모리 계층만 사용)
+            max_disk_mb: 디스크 계층 최대 크기
+        """
+        self._filter_cache = FilterCache(int(max_memory_mb * 1024 * 1024), disk_dir,
+                                         int(max_disk_mb * 1024 * 1024))
+        return self._filter_cache
+
+    def filter_cache_stats(self):
+        """get_filter 캐시 적중 / 실패 통계"""
+        if self._filter_cache is None:
+            self.configure_filter_cache()
+        return self._filter_cache.summary()
+
+    def _design_signature(self):
+        """캐시 키에 쓰는 설계 입력 서명 (생성기 버전, fs, 곡선 배열) - 디스크 계층 공유 시 구분용"""
+        if self._signature_cache is not None and self._signature_cache[0] is self.fine_curve_table:
+            return self._signature_cache[1]
+        digest = hashlib.sha256(f"{GENERATOR_VERSION}|{self.fs}".encode('utf-8'))
+        digest.update(np.asarray(self.iso_freq, dtype=float).tobytes())
+        digest.update(np.ascontiguousarray(self.fine_curve_table).tobytes())
+        if self._correction_signature() is not None:
+            digest.update(self._correction_signature().encode('utf-8'))
+        signature = digest.hexdigest()[:12]
+        self._signature_cache = (self.fine_curve_table, signature)
+        return signature
+
+    def _interpolated_curve(self, phon):
+        """격자 밖 폰 레벨의 곡선 (인접한 0.1 폰 격자 행 사이 선형 보간)"""
+        position = float(phon) / self.fine_curves.step
+        lower_row = int(np.floor(position + 1e-9))
+        if lower_row < 0 or lower_row >= len(self.fine_curve_table) or \
+                (lower_row == len(self.fine_curve_table) - 1 and position - lower_row > 1e-9):
+            raise ValueError(f"폰 레벨이 범위를 벗어났습니다: {phon}")
+        weight = min(max(position - lower_row, 0.0), 1.0)
+        if weight < 1e-9:
+            return self.fine_curve_table[lower_row]
+        return (self.fine_curve_table[lower_row] * (1 - weight) + self.fine_curve_table[lower_row + 1] * weight)
+
+    def get_filter(self, target_phon, reference_phon, window='hann', phase='linear', off_grid='design'):
+        """
+        (타겟, 참조) 필터를 필요할 때 설계하여 LRU 캐시에 보관 (미리 생성한 파일 없이 사용)
+
+        0.1 폰 격자의 값은 design_filter_batch와 같은 필터를 반환합니다. 격자 밖의 값 (0.01 폰 단위로 반올림)은
+        off_grid="design"이면 인접 격자 곡선을 선형 보간한 곡선으로 직접 설계하고,
+        off_grid="interpolate"이면 인접한 격자 필터 4개의 계수를 쌍선형 보간합니다.
+
+        Returns:
+            읽기 전용 계수 배열 (캐시와 공유하므로 수정하려면 복사)
+        """
+        if off_grid not in ('design', 'interpolate'):
+            raise ValueError(f"알 수 없는 격자 밖 처리 방식: {off_grid}")
+        if self._filter_cache is None:
+            self.configure_filter_cache()
+
+        target_x100 = int(round(float(target_phon) * 100))
+        reference_x100 = int(round(float(reference_phon) * 100))
+        mode = 'grid' if target_x100 % 10 == 0 and reference_x100 % 10 == 0 else off_grid
+        key = (self._design_signature(), self.numtaps, window, phase, mode, target_x100, reference_x100)
+
+        fir_coeff = self._filter_cache.get(key)
+        if fir_coeff is not None:
+            return fir_coeff
+
+        if mode == 'grid':
+            fir_coeffs, _ = self.design_filter_batch([(target_x100 / 100, reference_x100 / 100)],
+                                                     window=window, phase=phase)
+            fir_coeff = fir_coeffs[0]
+        elif mode == 'design':
+            db_diff = self._interpolated_curve(reference_x100 / 100) - self._interpolated_curve(target_x100 / 100)
+            idx_1khz = self.iso_freq.index(1000)
+            relative_gains_linear = self._apply_device_correction(10**((db_diff[idx_1khz] - db_diff) / 20.0)[np.newaxis])
+            fir_coeff = self._design_from_gains(relative_gains_linear, window, phase=phase)[0]
+        else:
+            # 인접 격자 필터 (각각 캐시됨)의 쌍선형 보간
+            target_low, reference_low = target_x100 // 10 * 10, reference_x100 // 10 * 10
+            target_weight = (target_x100 - target_low) / 10.0
+            reference_weight = (reference_x100 - reference_low) / 10.0
+            fir_coeff = np.zeros(self.numtaps)
+            for target_grid, target_factor in ((target_low, 1 - target_weight), (target_low + 10, target_weight)):
+                for reference_grid, reference_factor in ((reference_low, 1 - reference_weight),
+                                                         (reference_low + 10, reference_weight)):
+                    if target_factor * reference_factor > 0:
+                        fir_coeff += target_factor * reference_factor * self.get_filter(
+                            target_grid / 100, reference_grid / 100, window=window, phase=phase)
+
+        return self._filter_cache.put(key, fir_coeff)
+    
+    def save_filter_to_wav(self, coefficients, filename, normalize=True, sample_format="int16"):
+        """
+        FIR 계수를 WAV 파일로 저장
+
+        헤더와 계수 버퍼를 한 번에 기록합니다 (샘플별 struct.pack 없음).
+        sample_format="float32"이면 16비트 양자화와 헤드룸 스케일 없이 계수를 그대로 저장합니다.
+        """
+        write_filter_wav(coefficients, filename, self.fs, normalize=normalize,
+                         sample_format=sample_format)
+    
+    def _design_chunk(self, chunk, window='hann', engine="batch", debug=False, phase='linear',
+                      max_error_db=None):
+        """
+        (타겟, 참조) 쌍 묶음을 설계하여 (타겟, 참조, 결과) 튜플 리스트로 반환
+
+        결과는 (fir_coeff, filter_info) 튜플 또는 설계 중 발생한 예외입니다.
+        engine="batch"는 design_filter_batch (max_error_db가 있으면 search_min_numtaps),
+        engine="firwin2"는 design_single_filter를 사용합니다.
+        """
+        if engine == "firwin2":
+            if max_error_db is not None:
+                raise ValueError("탭 수 탐색(max_error_db)은 배치 엔진에서만 지원합니다.")
+            results = []
+            for index, (target_phon, ref_phon) in enumerate(chunk):
+                try:
+                    results.append((target_phon, ref_phon, self.design_single_filter(
+                        target_phon, ref_phon, window=window, debug=debug and index == 0, phase=phase
+                    )))
+                except Exception as e:
+                    results.append((target_phon, ref_phon, e))
+            return results
+
+        if engine != "batch":
+            raise ValueError(f"알 수 없는 설계 엔진: {engine}")
+
+        # 곡선이 없는 쌍은 개별 오류로 처리하고 나머지만 배치 설계
+        results = [None] * len(chunk)
+        valid_indices = []
+        for index, (target_phon, ref_phon) in enumerate(chunk):
+            target_key = round(target_phon, 1)
+            reference_key = round(ref_phon, 1)
+            if target_key not in self.fine_curves or reference_key not in self.fine_curves:
+                results[index] = (target_phon, ref_phon, ValueError(
+                    f"폰 레벨을 찾을 수 없습니다: T={target_key}, R={reference_key}"))
             else:
-                scaled_coeff = np.zeros_like(coefficients, dtype=np.int16)
+                valid_indices.append(index)
+
+        if debug:
+            print(f"\n=== 배치 설계 T={chunk[0][0]:.1f}, R={chunk[0][1]:.1f} 부터 {len(valid_indices)}개 ===")
+
+        try:
+            valid_pairs = [chunk[index] for index in valid_indices]
+            if max_error_db is None:
+                fir_coeffs, filter_infos = self.design_filter_batch(valid_pairs, window=window, phase=phase)
+            else:
+                fir_coeffs, filter_infos = self.search_min_numtaps(valid_pairs, max_error_db,
+                                                                   window=window, phase=phase)
+            for row, index in enumerate(valid_indices):
+                results[index] = (chunk[index][0], chunk[index][1], (fir_coeffs[row], filter_infos[row]))
+        except Exception as e:
+            for index in valid_indices:
+                target_phon, ref_phon = chunk[index]
+                results[index] = (target_phon, ref_phon, RuntimeError(
+                    f"필터 설계 실패 T={round(target_phon, 1)}, R={round(ref_phon, 1)}: {e}"))
+        return results
+
+    def _iter_designed_filters(self, pairs, debug_first=False, workers=None,
+                               engine="batch", batch_size=256, window='hann', phase='linear',
+                               max_error_db=None):
+        """
+        (타겟, 참조) 쌍을 순서대로 설계하여 (타겟, 참조, 결과) 튜플을 생성
+
+        결과는 (fir_coeff, filter_info) 튜플 또는 설계 중 발생한 예외입니다.
+        workers가 2 이상이면 프로세스 풀에서 설계하지만 출력 순서는 직렬 경로와 동일합니다.
+        """
+        if engine == "firwin2" and workers and workers > 1:
+            chunk_size = max(1, len(pairs) // (workers * 16))
+        elif engine == "firwin2":
+            chunk_size = 1
         else:
-            scaled_coeff = np.int16(np.clip(coefficients * 32767, -32767, 32767))
+            chunk_size = max(1, batch_size)
+
+        design_options = {'window': window, 'engine': engine, 'phase': phase,
+                          'max_error_db': max_error_db}
+        tasks = [(pairs[start:start + chunk_size], design_options, debug_first and start == 0)
+                 for start in range(0, len(pairs), chunk_size)]
+
+        if not workers or workers <= 1:
+            for chunk, chunk_options, debug in tasks:
+                yield from self._design_chunk(chunk, debug=debug, **chunk_options)
+            return
+
+        executor = ProcessPoolExecutor(max_workers=workers,
+                                       initializer=_init_worker, initargs=(self,))
+        try:
+            for results in executor.map(_design_chunk_task, tasks):
+                yield from results
+        except BaseException:
+            # Ctrl-C 등으로 중단되면 대기 중인 작업을 취소하고 즉시 반환
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        else:
+            executor.shutdown(wait=True)
+
+    def _filter_input_hash(self, target_phon, ref_phon, output_options):
+        """
+        필터 설계 입력 (곡선 행, fs, 탭 수, 생성기 버전)과 설계/출력 옵션
+        (윈도우, 엔진, 위상, 탭 탐색 오차, 파일/WAV 형식)의 SHA-256 해시
+        """
+        target_key = round(target_phon, 1)
+        reference_key = round(ref_phon, 1)
+        if target_key not in self.fine_curves or reference_key not in self.fine_curves:
+            return None
         
-        with wave.open(filename, 'w') as wav_file:
-            wav_file.setnchannels(1)
-            wav_file.setsampwidth(2)
-            wav_file.setframerate(self.fs)
-            
-            for sample in scaled_coeff:
-                wav_file.writeframes(struct.pack('h', sample))
+        design_inputs = {
+            'generator_version': GENERATOR_VERSION,
+            'fs': self.fs,
+            'numtaps': self.numtaps,
+            'options': output_options,
+            'target_phon': float(target_key),
+            'reference_phon': float(reference_key),
+        }
+        if self._correction_signature() is not None:
+            design_inputs['device_correction'] = self._correction_signature()
+        digest = hashlib.sha256(json.dumps(design_inputs, sort_keys=True).encode('utf-8'))
+        digest.update(np.asarray(self.iso_freq, dtype=float).tobytes())
+        digest.update(np.ascontiguousarray(self.fine_curves[target_key]).tobytes())
+        digest.update(np.ascontiguousarray(self.fine_curves[reference_key]).tobytes())
+        return digest.hexdigest()
+    
+    def _load_manifest(self, manifest_filename):
+        """증분 생성 매니페스트 로드 ({파일명: 항목}, 같은 파일명은 마지막 줄 우선)"""
+        manifest = {}
+        if not os.path.exists(manifest_filename):
+            return manifest
+        
+        with open(manifest_filename, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    manifest[entry['filename']] = entry
+                except (ValueError, KeyError, TypeError):
+                    # 중단된 실행이 남긴 불완전한 줄은 무시
+                    continue
+        return manifest
+    
+    def _save_manifest(self, manifest_filename, manifest):
+        """매니페스트를 파일명당 한 줄로 압축하여 원자적으로 다시 기록"""
+        temp_filename = manifest_filename + ".tmp"
+        with open(temp_filename, 'w', encoding='utf-8') as f:
+            for entry in manifest.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(temp_filename, manifest_filename)
     
     def generate_filter_range(self, target_range, reference_range, output_dir="filters", 
-                             file_format="wav", save_metadata=True, debug_first=False):
+                             file_format="wav", save_metadata=True, debug_first=False,
+                             workers=None, engine="batch", batch_size=256,
+                             wav_format="int16", window='hann', incremental=False,
+                             bank_filename=None, phase='linear', max_error_db=None,
+                             metrics=None, progress_callback=None, shard=None,
+                             writer_threads=0, write_queue_size=None):
         """
         지정된 범위의 모든 조합에 대해 필터 생성
         
         Args:
             target_range: (start, end, step) 튜플 - 타겟 폰 범위
-            reference_range: (start, end, step) 튜플 - 참조 폰 범위  
+                          ({'values': [...]}이면 비균일 축, adaptive_grid.AdaptiveGrid.target_range)
+            reference_range: (start, end, step) 튜플 - 참조 폰 범위 (비균일 축 가능)
             output_dir: 출력 디렉토리
             file_format: 출력 형식 ("wav", "csv", "both")
-            save_metadata: 메타데이터 저장 여부
+            save_metadata: 메타데이터 저장 여부 (필터마다 filter_metadata.jsonl / filter_metadata.sqlite에
+                           바로 기록하고, 끝나면 filter_metadata.json으로 내보냄, metadata_store.MetadataStore로 조회)
+            workers: 필터 설계에 사용할 프로세스 수 (None 또는 1이면 직렬 처리)
+            engine: 설계 엔진 ("batch": 배치 설계, "firwin2": 필터별 signal.firwin2)
+            batch_size: 배치 엔진이 한 번에 설계하는 필터 수 (메모리 사용량 제한)
+            wav_format: WAV 샘플 형식 ("int16": 16비트 PCM, "float32": 32비트 IEEE float)
+            window: 필터 설계 윈도우
+            incremental: True이면 설계 입력 해시가 매니페스트와 같고 파일이 있는 필터는 건너뜀
+                         (매니페스트는 filter_metadata.json 옆의 filter_manifest.jsonl)
+            bank_filename: 지정하면 output_dir 안에 모든 필터를 담은 필터 뱅크 파일도 생성
+                           (float32 계수 블록 + (타겟, 참조) 인덱스, filter_bank.FilterBank로 읽기)
+            phase: "linear" (선형 위상) 또는 "minimum" (최소 위상, 저지연)
+            max_error_db: 지정하면 필터마다 20Hz~20kHz 목표 오차 이내의 최소 탭 수를 탐색
+                          (탐색 결과와 달성 오차는 메타데이터의 tap_search에 기록)
+            metrics: True 또는 GenerationMetrics 인스턴스이면 단계별 시간 / 카운터를 수집하여
+                     filter_metadata.json 옆의 filter_metrics.json에 저장
+                     (병렬 모드에서는 설계 세부 단계 없이 설계 대기 시간만 기록)
+            progress_callback: 진행 이벤트 딕셔너리를 받는 함수 (None이면 print_progress_event)
+            shard: (index, count) 튜플이면 격자를 count개로 나눈 중 index번째 샤드만 생성
+                   (shard_grid_indices의 인터리브 분할, 샤드마다 별도 output_dir 사용,
+                   shard_merge로 병합, incremental=True와 함께 쓰면 샤드별로 재시작 가능)
+            writer_threads: 1 이상이면 파일 기록 (WAV 변환 / WAV / CSV / 뱅크)을 이만큼의 백그라운드
+                            스레드에서 처리하여 설계와 디스크 기록을 겹침 (출력 파일은 직렬 모드와 동일)
+            write_queue_size: 기록 대기 필터 수 상한 (None이면 writer_threads x 4, 차면 설계가 대기)
         """
         
+        if engine == "firwin2" and max_error_db is not None:
+            raise ValueError("탭 수 탐색(max_error_db)은 배치 엔진에서만 지원합니다.")
+        
+        if progress_callback is None:
+            progress_callback = print_progress_event
+        if metrics is True:
+            metrics = GenerationMetrics()
+        elif metrics is False:
+            metrics = None
+        stage = metrics.stage if metrics is not None else (lambda name: nullcontext())
+        
         # 출력 디렉토리 생성
         os.makedirs(output_dir, exist_ok=True)
         
         # 범위 생성
-        target_start, target_end, target_step = target_range
-        ref_start, ref_end, ref_step = reference_range
+        grid_pairs = phon_grid(target_range, reference_range)
+        shard_indices = shard_grid_indices(len(grid_pairs), shard)
+        total_filters = len(shard_indices)
+        
+        # 출력 파일 확장자
+        extensions = []
+        if file_format in ["wav", "both"]:
+            extensions.append(".wav")
+        if file_format in ["csv", "both"]:
+            extensions.append(".csv")
+        
+        # 증분 생성: 입력 해시가 같고 파일이 남아 있는 필터는 재사용
+        manifest_filename = os.path.join(output_dir, MANIFEST_FILENAME)
+        manifest = {}
+        manifest_file = None
+        reused_infos = {}
+        grid_indices = list(shard_indices)
+        input_hashes = {}
+        
+        bank_path = os.path.join(output_dir, bank_filename) if bank_filename else None
+        previous_bank = None
+        if incremental and bank_path and os.path.exists(bank_path):
+            try:
+                previous_bank = FilterBank(bank_path)
+            except ValueError:
+                previous_bank = None
         
-        target_values = np.arange(target_start, target_end + target_step*0.001, target_step)
-        ref_values = np.arange(ref_start, ref_end + ref_step*0.001, ref_step)
+        output_options = {'window': window, 'engine': engine, 'phase': phase,
+                          'max_error_db': max_error_db, 'file_format': file_format,
+                          'wav_format': wav_format}
         
-        target_values = np.round(target_values, 1)
-        ref_values = np.round(ref_values, 1)
+        if incremental:
+            manifest = self._load_manifest(manifest_filename)
+            grid_indices = []
+            for grid_index in shard_indices:
+                target_phon, ref_phon = grid_pairs[grid_index]
+                base_filename = f"{target_phon:.1f}-{ref_phon:.1f}_filter"
+                input_hash = self._filter_input_hash(target_phon, ref_phon, output_options)
+                input_hashes[grid_index] = input_hash
+                entry = manifest.get(base_filename)
+                is_fresh = (
+                    input_hash is not None and entry is not None and entry.get('hash') == input_hash
+                    and all(os.path.exists(os.path.join(output_dir, base_filename + extension))
+                            for extension in extensions)
+                    and (bank_path is None or (
+                        previous_bank is not None and (target_phon, ref_phon) in previous_bank
+                        and previous_bank.numtaps == self.numtaps))
+                )
+                if is_fresh:
+                    reused_infos[grid_index] = entry['info']
+                else:
+                    grid_indices.append(grid_index)
+            
+            # 재시작에 대비해 매 필터마다 매니페스트에 한 줄씩 추가
+            manifest_file = open(manifest_filename, 'a', encoding='utf-8')
         
-        total_filters = len(target_values) * len(ref_values)
+        skipped_count = total_filters - len(grid_indices)
         
         print(f"\n=== 대량 FIR 필터 생성 시작 ===")
-        print(f"타겟 폰 범위: {target_start} ~ {target_end} (step: {target_step})")
-        print(f"참조 폰 범위: {ref_start} ~ {ref_end} (step: {ref_step})")
+        print(f"타겟 폰 범위: {describe_phon_range(target_range)}")
+        print(f"참조 폰 범위: {describe_phon_range(reference_range)}")
+        if shard is not None:
+            print(f"샤드: {shard[0]}/{shard[1]} (전체 격자 {len(grid_pairs)}개 중 {total_filters}개)")
         print(f"총 생성할 필터 수: {total_filters}")
+        if incremental:
+            print(f"최신 상태로 건너뜀: {skipped_count}개 | 새로 생성: {len(grid_indices)}개")
         print(f"필터 길이: {self.numtaps} 탭")
         print(f"샘플링 주파수: {self.fs} Hz")
+        print(f"설계 엔진: {engine}")
+        if phase != 'linear':
+            print(f"위상: {phase}")
+        if max_error_db is not None:
+            print(f"탭 수 탐색: 최대 오차 {max_error_db} dB 이내 (최대 {self.numtaps} 탭)")
         print(f"출력 디렉토리: {output_dir}")
+        if bank_path:
+            print(f"필터 뱅크: {bank_path}")
+        if workers and workers > 1:
+            print(f"병렬 프로세스 수: {workers}")
+        if writer_threads:
+            print(f"파일 기록 스레드 수: {writer_threads}")
         
         # 메타데이터 수집
         metadata = {
@@ -277,85 +1008,484 @@ class BulkFIRFilterGenerator:
                 'total_filters': total_filters,
                 'fs': self.fs,
                 'numtaps': self.numtaps,
+                'engine': engine,
+                'wav_format': wav_format,
+                'window': window,
+                'phase': phase,
+                'max_error_db': max_error_db,
+                'generator_version': GENERATOR_VERSION,
                 'target_range': target_range,
                 'reference_range': reference_range
-            },
-            'filters': []
+            }
         }
+        if shard is not None:
+            metadata['generation_info']['shard'] = {'index': shard[0], 'count': shard[1],
+                                                    'grid_filters': len(grid_pairs)}
+        if self.device_correction is not None:
+            metadata['generation_info']['device_correction'] = self.device_correction.to_dict()
+        
+        # 메타데이터는 생성되는 대로 filter_metadata.jsonl / .sqlite에 기록 (실행마다 새로 시작)
+        metadata_store = None
+        if save_metadata:
+            metadata_store = MetadataStore(output_dir, reset=True)
+            metadata_store.set_generation_info(metadata['generation_info'])
+            for grid_index in sorted(reused_infos):
+                metadata_store.add(reused_infos[grid_index], grid_index)
         
         start_time = time.time()
         success_count = 0
         error_count = 0
         
+        if metrics is not None:
+            metrics.start()
+            metrics.count('filters_total', total_filters)
+            metrics.count('filters_skipped', skipped_count)
+            # 워커 프로세스에는 전달하지 않음 (설계 세부 단계는 직렬 모드에서만 측정)
+            if not (workers and workers > 1):
+                self._metrics = metrics
+        
+        # 필터 뱅크: 임시 파일에 기록한 뒤 완료 시 교체 (증분 모드에서는 최신 필터를 이전 뱅크에서 복사)
+        bank_writer = None
+        if bank_path:
+            bank_writer = FilterBankWriter(bank_path + ".tmp", self.fs, self.numtaps, total_filters, phase=phase)
+            for grid_index in sorted(reused_infos):
+                bank_writer.add(*grid_pairs[grid_index], previous_bank.get(*grid_pairs[grid_index]))
+        
+        pairs = [grid_pairs[grid_index] for grid_index in grid_indices]
+        pending_filters = len(pairs)
+        designed_filters = self._iter_designed_filters(pairs, debug_first=debug_first, workers=workers,
+                                                       engine=engine, batch_size=batch_size,
+                                                       window=window, phase=phase,
+                                                       max_error_db=max_error_db)
+        
+        def write_outputs(target_phon, ref_phon, base_filename, fir_coeff, stage, bank_turn=nullcontext):
+            """필터 하나의 WAV / CSV / 뱅크 출력 (메트릭 수집 시 기록한 바이트 수 딕셔너리 반환)"""
+            written = {}
+            if file_format in ["wav", "both"]:
+                wav_filename = os.path.join(output_dir, f"{base_filename}.wav")
+                with stage('convert.wav_samples'):
+                    samples = wav_samples(fir_coeff, sample_format=wav_format)
+                with stage('write.wav'):
+                    write_wav_samples(samples, wav_filename, self.fs, sample_format=wav_format)
+                if metrics is not None:
+                    written['bytes_written.wav'] = os.path.getsize(wav_filename)
+            
+            if file_format in ["csv", "both"]:
+                csv_filename = os.path.join(output_dir, f"{base_filename}.csv")
+                with stage('write.csv'):
+                    np.savetxt(csv_filename, fir_coeff, delimiter=',', 
+                             header=f'FIR Filter Coefficients: {target_phon:.1f} -> {ref_phon:.1f} phon')
+                if metrics is not None:
+                    written['bytes_written.csv'] = os.path.getsize(csv_filename)
+            
+            if bank_writer is not None:
+                # 뱅크 블록은 설계 순서대로 기록 (파이프라인 모드에서도 직렬 모드와 같은 파일)
+                with bank_turn(), stage('write.bank'):
+                    bank_writer.add(target_phon, ref_phon, fir_coeff)
+            return written
+        
+        def record_success(grid_index, base_filename, filter_info, filter_length, written, stage_seconds=None):
+            """출력이 모두 기록된 필터의 메타데이터 / 매니페스트 / 진행 상황 갱신"""
+            nonlocal success_count
+            
+            # 파이프라인 모드에서는 기록 시간을 이 필터의 기록 (stage_seconds)에 더함
+            record_timer = StageTimer() if stage_seconds is not None else None
+            record_stage = record_timer.stage if record_timer is not None else stage
+            
+            # 메타데이터 추가
+            filter_info['filename'] = base_filename
+            if metadata_store is not None:
+                with record_stage('write.metadata'):
+                    metadata_store.add(filter_info, grid_index)
+            
+            if manifest_file is not None:
+                with record_stage('write.manifest'):
+                    entry = {'filename': base_filename, 'hash': input_hashes[grid_index],
+                             'info': filter_info}
+                    manifest[base_filename] = entry
+                    manifest_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                    manifest_file.flush()
+            if record_timer is not None:
+                for name, seconds in record_timer.seconds.items():
+                    metrics.record(name, seconds, current=False)
+                    stage_seconds[name] = stage_seconds.get(name, 0.0) + seconds
+            
+            success_count += 1
+            if metrics is not None:
+                for name, amount in written.items():
+                    metrics.count(name, amount)
+                metrics.count('filters_written')
+                metrics.finish_filter(base_filename, stage_seconds=stage_seconds, filter_length=filter_length)
+            
+            # 진행 상황 보고
+            completed_filters = success_count + error_count
+            elapsed = time.time() - start_time
+            progress_callback({
+                'event': 'progress',
+                'current': completed_filters,
+                'total': pending_filters,
+                'success': success_count,
+                'errors': error_count,
+                'elapsed': elapsed,
+                'eta': elapsed / completed_filters * (pending_filters - completed_filters),
+                'filename': base_filename,
+            })
+        
+        def record_error(target_phon, ref_phon, base_filename, error, stage_seconds=None):
+            """설계 또는 출력에 실패한 필터 기록"""
+            nonlocal error_count
+            error_count += 1
+            if metrics is not None:
+                metrics.count('filters_failed')
+                metrics.finish_filter(base_filename, stage_seconds=stage_seconds, error=str(error))
+            progress_callback({'event': 'error', 'target_phon': target_phon,
+                               'reference_phon': ref_phon, 'error': error})
+        
+        # 파이프라인 모드: 설계는 이 스레드 / 워커 프로세스, 파일 기록은 백그라운드 스레드
+        writer_pool = None
+        if writer_threads:
+            def write_job(job, turn):
+                target_phon, ref_phon, base_filename, fir_coeff = job[:4]
+                timer = StageTimer()
+                written = write_outputs(target_phon, ref_phon, base_filename, fir_coeff, timer.stage, turn)
+                return timer.seconds, written
+            
+            writer_pool = OrderedWriterPool(write_job, threads=writer_threads, queue_size=write_queue_size)
+        
+        def handle_written(completed):
+            """기록 스레드에서 완료된 필터 반영 (이 스레드에서만 카운트 / 메타데이터 갱신)"""
+            for job, result, error in completed:
+                target_phon, ref_phon, base_filename, fir_coeff, grid_index, filter_info, stage_seconds = job
+                if error is None:
+                    write_seconds, written = result
+                else:
+                    write_seconds, written = {}, {}
+                if metrics is not None:
+                    for name, seconds in write_seconds.items():
+                        metrics.record(name, seconds, current=False)
+                        stage_seconds[name] = stage_seconds.get(name, 0.0) + seconds
+                if error is not None:
+                    record_error(target_phon, ref_phon, base_filename, error, stage_seconds=stage_seconds)
+                else:
+                    record_success(grid_index, base_filename, filter_info, len(fir_coeff), written,
+                                   stage_seconds=stage_seconds)
+        
         try:
-            for i, target_phon in enumerate(target_values):
-                for j, ref_phon in enumerate(ref_values):
-                    current_filter = i * len(ref_values) + j + 1
-                    
-                    try:
-                        # 필터 설계 (첫 번째 필터에만 디버그 적용)
-                        is_first_filter = (current_filter == 1)
-                        debug_mode = debug_first and is_first_filter
-                        
-                        fir_coeff, filter_info = self.design_single_filter(
-                            target_phon, ref_phon, debug=debug_mode
-                        )
-                        
-                        # 파일명 생성
-                        base_filename = f"{target_phon:.1f}-{ref_phon:.1f}_filter"
-                        
-                        # 파일 저장
-                        if file_format in ["wav", "both"]:
-                            wav_filename = os.path.join(output_dir, f"{base_filename}.wav")
-                            self.save_filter_to_wav(fir_coeff, wav_filename)
-                        
-                        if file_format in ["csv", "both"]:
-                            csv_filename = os.path.join(output_dir, f"{base_filename}.csv")
-                            np.savetxt(csv_filename, fir_coeff, delimiter=',', 
-                                     header=f'FIR Filter Coefficients: {target_phon:.1f} -> {ref_phon:.1f} phon')
-                        
-                        # 메타데이터 추가
-                        if save_metadata:
-                            filter_info['filename'] = base_filename
-                            metadata['filters'].append(filter_info)
-                        
-                        success_count += 1
-                        
-                        # 진행 상황 출력 (10% 단위)
-                        if current_filter % max(1, total_filters // 10) == 0:
-                            elapsed = time.time() - start_time
-                            progress = current_filter / total_filters * 100
-                            eta = elapsed / current_filter * (total_filters - current_filter)
-                            
-                            print(f"진행률: {progress:.1f}% ({current_filter}/{total_filters}) "
-                                  f"| 성공: {success_count} | 실패: {error_count} "
-                                  f"| 예상 남은 시간: {eta:.1f}초")
-                    
-                    except Exception as e:
-                        error_count += 1
-                        print(f"오류 발생 T={target_phon:.1f}, R={ref_phon:.1f}: {e}")
+            current_filter = 0
+            while True:
+                with stage('design'):
+                    next_result = next(designed_filters, None)
+                if next_result is None:
+                    break
+                target_phon, ref_phon, result = next_result
+                current_filter += 1
+                grid_index = grid_indices[current_filter - 1]
+                
+                # 파일명 생성
+                base_filename = f"{target_phon:.1f}-{ref_phon:.1f}_filter"
+                
+                if writer_pool is not None:
+                    handle_written(writer_pool.completed())
+                    stage_seconds = metrics.take_current() if metrics is not None else None
+                    if isinstance(result, Exception):
+                        record_error(target_phon, ref_phon, base_filename, result, stage_seconds=stage_seconds)
                         continue
+                    fir_coeff, filter_info = result
+                    blocked = writer_pool.submit((target_phon, ref_phon, base_filename, fir_coeff,
+                                                  grid_index, filter_info, stage_seconds))
+                    if metrics is not None:
+                        metrics.record('write.queue_wait', blocked, current=False)
+                        stage_seconds['write.queue_wait'] = blocked
+                    continue
+                
+                try:
+                    if isinstance(result, Exception):
+                        raise result
+                    fir_coeff, filter_info = result
+                    
+                    # 파일 저장
+                    written = write_outputs(target_phon, ref_phon, base_filename, fir_coeff, stage)
+                    record_success(grid_index, base_filename, filter_info, len(fir_coeff), written)
+                
+                except Exception as e:
+                    record_error(target_phon, ref_phon, base_filename, e)
+                    continue
+            
+            if writer_pool is not None:
+                handle_written(writer_pool.close())
         
         except KeyboardInterrupt:
-            print(f"\n사용자에 의해 중단됨. 현재까지 {success_count}개 필터 생성완료.")
+            designed_filters.close()
+            if writer_pool is not None:
+                # 이미 설계된 필터의 기록은 마저 끝내고 메타데이터 / 매니페스트에 반영
+                handle_written(writer_pool.close())
+            progress_callback({'event': 'interrupted', 'success': success_count})
         
-        # 메타데이터 저장
-        if save_metadata and metadata['filters']:
-            metadata_filename = os.path.join(output_dir, "filter_metadata.json")
-            with open(metadata_filename, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, indent=2, ensure_ascii=False)
+        finally:
+            if writer_pool is not None:
+                writer_pool.close()
+            self._metrics = None
+        
+        # 필터 뱅크 완료 (중단된 경우에도 그때까지의 필터로 유효한 파일)
+        if bank_writer is not None:
+            with stage('write.bank'):
+                bank_writer.close()
+            previous_bank = None
+            os.replace(bank_path + ".tmp", bank_path)
+        
+        # 매니페스트 정리 (파일명당 한 줄)
+        if manifest_file is not None:
+            manifest_file.close()
+            self._save_manifest(manifest_filename, manifest)
+        
+        # 기존 형식의 filter_metadata.json 내보내기 (격자 순서)
+        if metadata_store is not None:
+            metadata_store.commit()
+            if len(metadata_store):
+                with stage('write.metadata_export'):
+                    metadata_store.export_json()
+            metadata_store.close()
         
         # 완료 보고
         total_time = time.time() - start_time
         
-        print(f"\n=== 생성 완료 ===")
-        print(f"성공: {success_count}개")
-        print(f"실패: {error_count}개")
-        print(f"총 소요 시간: {total_time:.1f}초")
-        print(f"평균 필터당 시간: {total_time/max(1, success_count):.3f}초")
+        if metrics is not None:
+            metrics.stop()
+            metrics.save(os.path.join(output_dir, METRICS_FILENAME),
+                         os.path.join(output_dir, PROFILE_FILENAME) if metrics.profile else None)
+        
+        progress_callback({
+            'event': 'done',
+            'success': success_count,
+            'errors': error_count,
+            'skipped': skipped_count if incremental else None,
+            'total_time': total_time,
+        })
         
         return success_count, error_count
 
+    def generate_multi_rate(self, target_range, reference_range, sample_rates=MULTI_RATE_SAMPLE_RATES,
+                            output_dir="filters_multi_rate", file_format="wav", save_metadata=True,
+                            workers=None, batch_size=256, wav_format="int16", window='hann',
+                            bank_filename=None, phase='linear', scale_numtaps=False,
+                            progress_callback=None):
+        """
+        여러 샘플링 주파수의 필터를 한 번에 생성 (샘플링 주파수마다 output_dir/<fs>Hz 하위 디렉토리)
+
+        48kHz 필터를 다른 샘플링 주파수에서 쓰면 곡선 전체가 주파수 축에서 밀리므로
+        장치 샘플링 주파수마다 따로 설계해야 합니다. (타겟, 참조) 이득 행렬은 한 번만 계산하고,
+        배치 묶음 x 샘플링 주파수 작업을 한 번의 (병렬) 패스로 설계합니다.
+        하위 디렉토리마다 generate_filter_range와 같은 형식의 파일 / 메타데이터 / 필터 뱅크가 생기며,
+        output_dir의 multi_rate_index.json에 샘플링 주파수별 디렉토리와 결과가 기록됩니다.
+
+        Args:
+            sample_rates: 샘플링 주파수 목록 (기본: 44.1 / 48 / 88.2 / 96kHz)
+            scale_numtaps: True이면 탭 수를 fs / self.fs에 비례시켜 (홀수) 모든 샘플링 주파수에서
+                           같은 주파수 해상도 / 지연 시간 유지 (False이면 모두 self.numtaps)
+            나머지 인자는 generate_filter_range와 같음 (배치 엔진, 증분 / 샤드 / 탭 수 탐색 없음)
+
+        Returns:
+            (성공 수, 실패 수) - 샘플링 주파수별 필터 수의 합
+        """
+        if progress_callback is None:
+            progress_callback = print_progress_event
+        sample_rates = sorted({int(fs) for fs in sample_rates})
+        if not sample_rates:
+            raise ValueError("샘플링 주파수가 지정되지 않았습니다.")
+
+        grid_pairs = phon_grid(target_range, reference_range)
+        valid_indices = [index for index, (target_phon, ref_phon) in enumerate(grid_pairs)
+                         if round(target_phon, 1) in self.fine_curves and round(ref_phon, 1) in self.fine_curves]
+
+        # 이득 행렬과 최대 부스트 / 컷은 샘플링 주파수와 무관하므로 한 번만 계산
+        valid_pairs = [(float(grid_pairs[index][0]), float(grid_pairs[index][1])) for index in valid_indices]
+        relative_gains_linear = self._relative_gains_matrix(valid_pairs) if valid_pairs \
+            else np.empty((0, len(self.design_frequencies())))
+        base_infos = self._filter_infos(valid_pairs, relative_gains_linear, None, phase)
+
+        def rate_numtaps(fs):
+            if not scale_numtaps:
+                return self.numtaps
+            return int(round(self.numtaps * fs / self.fs)) | 1
+
+        os.makedirs(output_dir, exist_ok=True)
+        timestamp = datetime.now().isoformat()
+        rates = {}
+        for fs in sample_rates:
+            rate_dir = os.path.join(output_dir, rate_directory_name(fs))
+            os.makedirs(rate_dir, exist_ok=True)
+            generation_info = {
+                'timestamp': timestamp,
+                'total_filters': len(grid_pairs),
+                'fs': fs,
+                'numtaps': rate_numtaps(fs),
+                'engine': 'batch',
+                'wav_format': wav_format,
+                'window': window,
+                'phase': phase,
+                'max_error_db': None,
+                'generator_version': GENERATOR_VERSION,
+                'target_range': target_range,
+                'reference_range': reference_range,
+                'multi_rate': {'sample_rates': sample_rates},
+            }
+            if self.device_correction is not None:
+                generation_info['device_correction'] = self.device_correction.to_dict()
+            metadata_store = None
+            if save_metadata:
+                metadata_store = MetadataStore(rate_dir, reset=True)
+                metadata_store.set_generation_info(generation_info)
+            bank_writer = None
+            if bank_filename:
+                bank_writer = FilterBankWriter(os.path.join(rate_dir, bank_filename) + ".tmp", fs,
+                                               rate_numtaps(fs), len(grid_pairs), phase=phase)
+            rates[fs] = {'directory': rate_dir, 'numtaps': rate_numtaps(fs), 'metadata_store': metadata_store,
+                         'bank_writer': bank_writer, 'success': 0, 'errors': 0}
+
+        print(f"\n=== 다중 샘플링 주파수 FIR 필터 생성 시작 ===")
+        print(f"샘플링 주파수: {', '.join(str(fs) for fs in sample_rates)} Hz")
+        print(f"격자 필터 수: {len(grid_pairs)} x {len(sample_rates)} = {len(grid_pairs) * len(sample_rates)}")
+        print(f"필터 길이: " + ", ".join(f"{rates[fs]['numtaps']}" for fs in sample_rates) + " 탭")
+        print(f"출력 디렉토리: {output_dir}")
+        if workers and workers > 1:
+            print(f"병렬 프로세스 수: {workers}")
+
+        start_time = time.time()
+        total = len(grid_pairs) * len(sample_rates)
+        success_count = 0
+        error_count = 0
+
+        def record_error(fs, target_phon, ref_phon, error):
+            nonlocal error_count
+            error_count += 1
+            rates[fs]['errors'] += 1
+            progress_callback({'event': 'error', 'target_phon': target_phon,
+                               'reference_phon': ref_phon, 'error': error})
+
+        def record_progress(base_filename):
+            completed = success_count + error_count
+            elapsed = time.time() - start_time
+            progress_callback({
+                'event': 'progress',
+                'current': completed,
+                'total': total,
+                'success': success_count,
+                'errors': error_count,
+                'elapsed': elapsed,
+                'eta': elapsed / completed * (total - completed),
+                'filename': base_filename,
+            })
+
+        valid_set = set(valid_indices)
+        for grid_index, (target_phon, ref_phon) in enumerate(grid_pairs):
+            if grid_index not in valid_set:
+                for fs in sample_rates:
+                    record_error(fs, target_phon, ref_phon, ValueError(
+                        f"폰 레벨을 찾을 수 없습니다: T={round(target_phon, 1)}, R={round(ref_phon, 1)}"))
+                    record_progress(f"{target_phon:.1f}-{ref_phon:.1f}_filter")
+
+        # 작업 = (배치 묶음, 샘플링 주파수), 결과는 제출 순서대로 받음
+        chunk_size = max(1, batch_size)
+        chunk_starts = list(range(0, len(valid_indices), chunk_size))
+        tasks = [(relative_gains_linear[start:start + chunk_size],
+                  {'window': window, 'numtaps': rates[fs]['numtaps'], 'phase': phase, 'fs': fs})
+                 for start in chunk_starts for fs in sample_rates]
+        task_keys = [(start, fs) for start in chunk_starts for fs in sample_rates]
+
+        executor = None
+        if workers and workers > 1:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self,))
+            designed_chunks = executor.map(_design_gains_task, tasks)
+        else:
+            designed_chunks = (self._design_gains_safely(*task) for task in tasks)
+
+        try:
+            for (start, fs), result in zip(task_keys, designed_chunks):
+                rate = rates[fs]
+                chunk_indices = valid_indices[start:start + chunk_size]
+                for row, grid_index in enumerate(chunk_indices):
+                    target_phon, ref_phon = grid_pairs[grid_index]
+                    base_filename = f"{target_phon:.1f}-{ref_phon:.1f}_filter"
+                    try:
+                        if isinstance(result, Exception):
+                            raise RuntimeError(f"필터 설계 실패 T={round(target_phon, 1)}, "
+                                               f"R={round(ref_phon, 1)}, fs={fs}: {result}")
+                        fir_coeff = result[row]
+                        if file_format in ["wav", "both"]:
+                            write_wav_samples(wav_samples(fir_coeff, sample_format=wav_format),
+                                              os.path.join(rate['directory'], f"{base_filename}.wav"), fs,
+                                              sample_format=wav_format)
+                        if file_format in ["csv", "both"]:
+                            np.savetxt(os.path.join(rate['directory'], f"{base_filename}.csv"), fir_coeff,
+                                       delimiter=',',
+                                       header=f'FIR Filter Coefficients: {target_phon:.1f} -> {ref_phon:.1f} phon '
+                                              f'@ {fs} Hz')
+                        if rate['bank_writer'] is not None:
+                            rate['bank_writer'].add(target_phon, ref_phon, fir_coeff)
+                        if rate['metadata_store'] is not None:
+                            filter_info = dict(base_infos[start + row], filter_length=len(fir_coeff),
+                                               filename=base_filename)
+                            rate['metadata_store'].add(filter_info, grid_index)
+                    except Exception as e:
+                        record_error(fs, target_phon, ref_phon, e)
+                    else:
+                        success_count += 1
+                        rate['success'] += 1
+                    record_progress(base_filename)
+
+        except KeyboardInterrupt:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = None
+            progress_callback({'event': 'interrupted', 'success': success_count})
+
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+
+        # 샘플링 주파수별 뱅크 / 메타데이터 마무리 (중단된 경우에도 그때까지의 필터로 유효)
+        for fs in sample_rates:
+            rate = rates[fs]
+            if rate['bank_writer'] is not None:
+                rate['bank_writer'].close()
+                bank_path = os.path.join(rate['directory'], bank_filename)
+                os.replace(bank_path + ".tmp", bank_path)
+            if rate['metadata_store'] is not None:
+                rate['metadata_store'].commit()
+                if len(rate['metadata_store']):
+                    rate['metadata_store'].export_json()
+                rate['metadata_store'].close()
+
+        total_time = time.time() - start_time
+        index = {
+            'timestamp': timestamp,
+            'generator_version': GENERATOR_VERSION,
+            'target_range': target_range,
+            'reference_range': reference_range,
+            'total_time': total_time,
+            'sample_rates': [{'fs': fs, 'directory': rate_directory_name(fs), 'numtaps': rates[fs]['numtaps'],
+                              'success': rates[fs]['success'], 'errors': rates[fs]['errors']}
+                             for fs in sample_rates],
+        }
+        with open(os.path.join(output_dir, MULTI_RATE_INDEX_FILENAME), 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2, ensure_ascii=False)
+
+        progress_callback({
+            'event': 'done',
+            'success': success_count,
+            'errors': error_count,
+            'skipped': None,
+            'total_time': total_time,
+        })
+        return success_count, error_count
+
+    def _design_gains_safely(self, relative_gains_linear, design_options):
+        """이득 행렬 묶음 설계 (generate_multi_rate 작업 단위, 예외는 결과로 반환)"""
+        try:
+            return self._design_from_gains(relative_gains_linear, **design_options)
+        except Exception as e:
+            return e
+
 # === 사용 예제 ===
 def main():
     """
@@ -363,7 +1493,7 @@ def main():
     """
     
     # 필터 생성기 초기화
-    generator = BulkFIRFilterGenerator(fs=48000, numtaps=4095)
+    generator = BulkFIRFilterGenerator(fs=48000, numtaps=4095, verbose=True)
     """
     print("1. 소규모 테스트 (5x5 = 25개 필터)")
     success, error = generator.generate_filter_range(
@@ -0,0 +1,246 @@
+import hashlib
+
+import numpy as np
+
+from loudness_curves import cached_array
+
+# scipy.signal is imported lazily inside the functions that use it
+
+# --- Weighting Filter Functions (from provided script) ---
+def matched_z(z_analog, p_analog, fs_digital):
+    return np.exp(z_analog / fs_digital), np.exp(p_analog / fs_digital)
+
+def normalise_a2d(z_coeffs, p_coeffs, k_gain, fs_digital):
+    from scipy import signal
+    if fs_digital:
+        z_digital, p_digital = matched_z(z_coeffs, p_coeffs, fs_digital)
+        b_coeffs, a_coeffs = signal.zpk2tf(z_digital, p_digital, 1) # k=1 for initial tf
+        # No signal.freqz with just one frequency point and fs. Use freqz with w.
+        # w_1khz = 2 * np.pi * 1000 / fs_digital # Normalized angular frequency
+        # _, h_response = signal.freqz(b_coeffs, a_coeffs, worN=[w_1khz])
+        # Correct way with fs for freqz for a single point:
+        _, h_response = signal.freqz(b_coeffs, a_coeffs, worN=[1000], fs=fs_digital)
+        k_normalized = 1.0 / np.abs(h_response[0])
+        return z_digital, p_digital, k_normalized
+    else: # Analog
+        b_analog, a_analog = signal.zpk2tf(z_coeffs, p_coeffs, k_gain)
+        w_analog, h_analog = signal.freqs(b_analog, a_analog, worN=[2 * np.pi * 1000])
+        k_normalized = k_gain / np.abs(h_analog[0])
+        return z_coeffs, p_coeffs, k_normalized
+
+
+def get_zpk(curve='A', fs=False):
+    if curve not in 'ABC':
+        raise ValueError('Curve type not understood')
+    z = [0, 0]
+    p = [-2*np.pi*20.598997057568145,
+         -2*np.pi*20.598997057568145,
+         -2*np.pi*12194.21714799801,
+         -2*np.pi*12194.21714799801]
+    k = 1
+    if curve == 'A':
+        p.extend([-2*np.pi*107.65264864304628, -2*np.pi*737.8622307362899])
+        z.extend([0, 0])
+    elif curve == 'B':
+        p.append(-2*np.pi*10**2.2)
+        z.append(0)
+    p_arr = np.array(p)
+    z_arr = np.array(z)
+    return normalise_a2d(z_arr, p_arr, k, fs)
+
+# --- Helper Functions for SPL Change and Preamp Suggestion ---
+def get_accurate_c_weighting_gains_linear(frequencies_hz, fs_param):
+    from scipy import signal
+    z_c, p_c, k_c = get_zpk(curve='C', fs=fs_param)
+    sos_c = signal.zpk2sos(z_c, p_c, k_c)
+    # Ensure frequencies are valid for sosfreqz
+    valid_frequencies = np.maximum(frequencies_hz, 1e-6) # Avoid 0 Hz
+    valid_frequencies = np.minimum(valid_frequencies, fs_param/2 - 1e-6) # Avoid Nyquist
+
+    # Get complex frequency response
+    _, h_complex = signal.sosfreqz(sos_c, worN=valid_frequencies, fs=fs_param)
+    gain_linear_c = np.abs(h_complex)
+
+    # Interpolate back to original frequencies_hz to handle exact 0 or Nyquist if they were in input
+    # and to ensure output array matches input frequency array shape.
+    gain_interpolated = np.interp(frequencies_hz, valid_frequencies, gain_linear_c, left=0, right=0) # fill out-of-band with 0 gain
+    return gain_interpolated
+
+
+def get_cached_c_weighting_gains_linear(frequencies_hz, fs_param, use_cache=True):
+    """
+    get_accurate_c_weighting_gains_linear through the persisted array cache
+    (keyed by fs and the exact frequency grid; a cache hit does not import scipy)
+    """
+    frequencies_hz = np.asarray(frequencies_hz, dtype=float)
+    key = (float(fs_param), hashlib.sha256(frequencies_hz.tobytes()).hexdigest())
+    return cached_array("c_weighting", key,
+                        lambda: get_accurate_c_weighting_gains_linear(frequencies_hz, fs_param), use_cache)
+
+
+def get_eq_filter_relative_gains_linear(target_phon, reference_phon, iso_freq_list, fine_curves_data, target_frequencies_hz):
+    target_phon_key = round(float(target_phon), 1)
+    reference_phon_key = round(float(reference_phon), 1)
+    if target_phon_key not in fine_curves_data or reference_phon_key not in fine_curves_data: return None
+    target_curve_spl = np.array(fine_curves_data[target_phon_key])
+    reference_curve_spl = np.array(fine_curves_data[reference_phon_key])
+    db_diff = reference_curve_spl - target_curve_spl
+    try: idx_1khz = iso_freq_list.index(1000)
+    except ValueError: return None
+    reference_db_diff_at_1khz = db_diff[idx_1khz]
+    relative_gains_db_at_iso_freq = reference_db_diff_at_1khz - db_diff
+    relative_gains_linear_at_iso_freq = 10**(relative_gains_db_at_iso_freq / 20.0)
+
+    left_fill_value = relative_gains_linear_at_iso_freq[0]
+    right_fill_value = relative_gains_linear_at_iso_freq[-1]
+    interpolated_gains_linear = np.interp(target_frequencies_hz, iso_freq_list,
+                                          relative_gains_linear_at_iso_freq,
+                                          left=left_fill_value, right=right_fill_value)
+    return interpolated_gains_linear
+
+def get_pink_noise_power_spectrum_linear(frequencies_hz):
+    frequencies_hz = np.maximum(frequencies_hz, 1e-6)
+    power_spectrum = 1.0 / frequencies_hz
+    return power_spectrum / np.sum(power_spectrum) # Normalized
+
+def get_max_boost_from_relative_gains(relative_gains_linear):
+    # Convert linear gains to dB to find max boost
+    # Avoid log(0) if any gain is zero (though unlikely for these filters' relative gains)
+    gains_db = 20 * np.log10(np.maximum(relative_gains_linear, 1e-9))
+    return np.max(gains_db)
+
+# --- Batched (vectorized) preamp map pipeline ---
+def get_calculation_frequencies(fs_param, num_freq_points=512, min_freq=20.0):
+    # Same log-spaced grid as the original script: 20 Hz .. fs/2 - 1 Hz
+    max_freq = fs_param / 2.0 - 1
+    return np.logspace(np.log10(min_freq), np.log10(max_freq), num_freq_points)
+
+
+def get_eq_filter_relative_gains_linear_batch(target_phons, reference_phons, iso_freq_list, fine_curves_data, target_frequencies_hz):
+    """
+    Batched get_eq_filter_relative_gains_linear for every (reference, target) combination.
+
+    Returns:
+        gains (refs, targets, freqs) and a (refs, targets) validity mask. The interpolation
+        reproduces np.interp step by step, so values are bit-identical to the per-pair function.
+    """
+    reference_keys = np.round(np.asarray(reference_phons, dtype=float), 1)
+    target_keys = np.round(np.asarray(target_phons, dtype=float), 1)
+    table = fine_curves_data.table
+    reference_valid = np.array([key in fine_curves_data for key in reference_keys], dtype=bool)
+    target_valid = np.array([key in fine_curves_data for key in target_keys], dtype=bool)
+    reference_rows = np.array([fine_curves_data.index(key) if ok else 0 for key, ok in zip(reference_keys, reference_valid)], dtype=int)
+    target_rows = np.array([fine_curves_data.index(key) if ok else 0 for key, ok in zip(target_keys, target_valid)], dtype=int)
+
+    idx_1khz = iso_freq_list.index(1000)
+    db_diff = table[reference_rows][:, np.newaxis, :] - table[target_rows][np.newaxis, :, :]  # (refs, targets, iso)
+    relative_gains_db = db_diff[..., idx_1khz:idx_1khz + 1] - db_diff
+    relative_gains_linear = 10**(relative_gains_db / 20.0)
+
+    # np.interp(x, xp, fp, left=fp[0], right=fp[-1]) along the last axis
+    xp = np.asarray(iso_freq_list, dtype=float)
+    x = np.asarray(target_frequencies_hz, dtype=float)
+    segment = np.clip(np.searchsorted(xp, x, side='right') - 1, 0, len(xp) - 2)
+    slopes = (relative_gains_linear[..., segment + 1] - relative_gains_linear[..., segment]) / (xp[segment + 1] - xp[segment])
+    gains = slopes * (x - xp[segment]) + relative_gains_linear[..., segment]
+    gains = np.where(x < xp[0], relative_gains_linear[..., :1], gains)
+    gains = np.where(x >= xp[-1], relative_gains_linear[..., -1:], gains)
+
+    valid = reference_valid[:, np.newaxis] & target_valid[np.newaxis, :]
+    return gains, valid
+
+
+def compute_filter_loudness_stats(reference_phons, target_phons, iso_freq_list, fine_curves_data, fs_param=48000, num_freq_points=512):
+    """
+    SPL change (C-weighted pink noise, relative to the flat 80/80 filter) and max boost
+    for every (reference, target) filter as (refs, targets) arrays.
+
+    These do not depend on the calibration/desired SPL/headroom settings, so one call can be
+    reused for any number of preamp_matrix_from_stats sweeps.
+    """
+    calculation_frequencies_hz = get_calculation_frequencies(fs_param, num_freq_points)
+    pink_noise_power_spec = get_pink_noise_power_spectrum_linear(calculation_frequencies_hz)
+    c_weighting_gains_lin = get_cached_c_weighting_gains_linear(calculation_frequencies_hz, fs_param)
+    c_weighting_power = c_weighting_gains_lin**2
+
+    # Reference C-weighted power for a "flat" EQ filter (Target 80 / Ref 80)
+    eq_filter_flat_gains_lin = get_eq_filter_relative_gains_linear(80.0, 80.0, iso_freq_list, fine_curves_data, calculation_frequencies_hz)
+    level_ref_c_weighted_power_val = np.sum(pink_noise_power_spec * (eq_filter_flat_gains_lin**2) * c_weighting_power)
+    if level_ref_c_weighted_power_val == 0:
+        level_ref_c_weighted_power_val = 1e-12 # Avoid division by zero
+
+    eq_gains_lin, valid = get_eq_filter_relative_gains_linear_batch(target_phons, reference_phons, iso_freq_list, fine_curves_data, calculation_frequencies_hz)
+
+    level_final = np.sum(pink_noise_power_spec * (eq_gains_lin**2) * c_weighting_power, axis=-1)
+    with np.errstate(divide='ignore'):
+        spl_change_db = np.where(level_final > 0, 10 * np.log10(level_final / level_ref_c_weighted_power_val), -np.inf)
+    max_boost_db = np.max(20 * np.log10(np.maximum(eq_gains_lin, 1e-9)), axis=-1)
+    return {
+        'reference_phons': np.round(np.asarray(reference_phons, dtype=float), 1),
+        'target_phons': np.round(np.asarray(target_phons, dtype=float), 1),
+        'spl_change_db': spl_change_db,
+        'max_boost_db': max_boost_db,
+        'valid': valid,
+    }
+
+
+def preamp_matrix_from_stats(stats, calibrated_spl=80.0, desired_spl=70.0, true_peak_headroom=-1.0):
+    """(refs, targets) recommended preamp matrix (unrounded) for one set of calibration settings"""
+    preamp_for_spl_target = desired_spl - calibrated_spl - stats['spl_change_db']
+    preamp_for_spl_target = np.where(np.isinf(preamp_for_spl_target), -99.0, preamp_for_spl_target) # Cap if inf
+    preamp_for_clipping_avoidance = true_peak_headroom - np.maximum(0.0, stats['max_boost_db'])
+    return np.minimum(preamp_for_spl_target, preamp_for_clipping_avoidance)
+
+
+def preamp_matrix_to_map(stats, preamp_matrix):
+    """Convert a preamp matrix to the recommended_preamp_map {ref: {target: preamp}} layout"""
+    recommended_preamp_map = {}
+    for ref_index, ref_phon_key in enumerate(stats['reference_phons'].tolist()):
+        recommended_preamp_map[ref_phon_key] = {}
+        for target_index, target_phon_key in enumerate(stats['target_phons'].tolist()):
+            if not stats['valid'][ref_index, target_index]:
+                recommended_preamp_map[ref_phon_key][target_phon_key] = "EQ_Error"
+            else:
+                recommended_preamp_map[ref_phon_key][target_phon_key] = round(float(preamp_matrix[ref_index, target_index]), 2)
+    return recommended_preamp_map
+
+
+def compute_recommended_preamp_map(reference_phons, target_phons, iso_freq_list, fine_curves_data,
+                                   calibrated_spl=80.0, desired_spl=70.0, true_peak_headroom=-1.0,
+                                   fs_param=48000, num_freq_points=512):
+    """
+    Vectorized recommended preamp map for every (reference, target) pair.
+
+    Same values as the original per-pair loop: {ref_phon: {target_phon: preamp_db or "EQ_Error"}}
+    """
+    stats = compute_filter_loudness_stats(reference_phons, target_phons, iso_freq_list, fine_curves_data, fs_param, num_freq_points)
+    preamp_matrix = preamp_matrix_from_stats(stats, calibrated_spl, desired_spl, true_peak_headroom)
+    return preamp_matrix_to_map(stats, preamp_matrix)
+
+
+def format_preamp_map_cpp(recommended_preamp_map, calibrated_spl, desired_spl, true_peak_headroom,
+                          title="Recommended Preamp Map"):
+    """recommended_preamp_map as a C++ std::map literal (5 entries per line, errors as -99.0)"""
+    lines = ["", "", f"// --- {title} ---",
+             f"// Based on: CALIBRATED_SPL_AT_REF80_TARGET80 = {calibrated_spl:.1f} dB SPL(C)",
+             f"//           USER_DESIRED_ACTUAL_SPL = {desired_spl:.1f} dB SPL(C)",
+             f"//           TARGET_TRUE_PEAK_HEADROOM = {true_peak_headroom:.1f} dBTP",
+             "std::map<double, std::map<double, double>> recommended_preamp_map = {"]
+    for ref_ph, t_map in recommended_preamp_map.items():
+        lines.append(f"    {{{ref_ph:.1f}, {{ // For Reference Phon {ref_ph:.1f}")
+        cnt = 0
+        l_content = []
+        sorted_t_phons = sorted([k for k in t_map.keys() if isinstance(k, float)])
+        for t_ph in sorted_t_phons:
+            p_val = t_map.get(t_ph, "Error")
+            if isinstance(p_val, str):
+                l_content.append(f"{{{t_ph:.1f}, -99.0 /*{p_val}*/}}") # Error case
+            else:
+                l_content.append(f"{{{t_ph:.1f}, {p_val:.2f}}}")
+            cnt += 1
+            if cnt % 5 == 0 or t_ph == sorted_t_phons[-1]:
+                if l_content: lines.append(f"        {', '.join(l_content)},")
+                l_content = []
+        lines.append("    }},")
+    lines.append("};")
+    return "\n".join(lines)
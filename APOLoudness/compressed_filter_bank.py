@@ -0,0 +1,216 @@
+import os
+import time
+
+import numpy as np
+
+from bulk_fir_filter_generator import BulkFIRFilterGenerator, phon_grid
+from filter_bank import phon_key
+
+
+def _magnitude_response(fir_coeffs, fs, freqs):
+    """필터 묶음 (N, numtaps)의 지정 주파수 크기 응답 (N, len(freqs))"""
+    eval_matrix = np.exp(-1j * 2 * np.pi * np.outer(np.arange(fir_coeffs.shape[-1]), freqs) / fs)
+    return np.abs(fir_coeffs @ eval_matrix)
+
+
+def _randomized_svd(matrix, rank, power_iterations=2, oversampling=10, seed=0):
+    """
+    랜덤 투영 기반 절단 SVD (상위 rank개 성분)
+
+    Returns:
+        U (rows, rank), S (rank,), Vt (rank, cols)
+    """
+    rng = np.random.default_rng(seed)
+    sketch_size = min(rank + oversampling, min(matrix.shape))
+    sketch = matrix @ rng.standard_normal((matrix.shape[1], sketch_size))
+    basis, _ = np.linalg.qr(sketch)
+    for _ in range(power_iterations):
+        basis, _ = np.linalg.qr(matrix.T @ basis)
+        basis, _ = np.linalg.qr(matrix @ basis)
+    u_small, singular_values, vt = np.linalg.svd(basis.T @ matrix, full_matrices=False)
+    return (basis @ u_small)[:, :rank], singular_values[:rank], vt[:rank]
+
+
+class CompressedFilterBank:
+    """
+    저차원 근사 필터 뱅크 (.npz)
+
+    각 필터를 평균 필터 + 가중치 x 기저 필터로 저장하고 요청 시 복원합니다.
+    """
+
+    def __init__(self, filename):
+        with np.load(filename) as data:
+            self.fs = int(data['fs'])
+            self.numtaps = int(data['numtaps'])
+            self.max_error_db = float(data['max_error_db'])
+            self.mean = data['mean']
+            self.basis = data['basis']
+            self.weights = data['weights']
+            self.keys = data['keys']
+        self._rows = {(int(target_x10), int(reference_x10)): row
+                      for row, (target_x10, reference_x10) in enumerate(self.keys.tolist())}
+
+    @property
+    def rank(self):
+        return len(self.basis)
+
+    def get(self, target_phon, reference_phon):
+        """(타겟, 참조) 필터 계수 복원 (float64)"""
+        row = self._rows.get((phon_key(target_phon), phon_key(reference_phon)))
+        if row is None:
+            raise KeyError(f"압축 필터 뱅크에 없는 필터: T={target_phon}, R={reference_phon}")
+        return self.mean.astype(np.float64) + self.weights[row].astype(np.float64) @ self.basis
+
+    def pairs(self):
+        return [(target_x10 / 10.0, reference_x10 / 10.0) for target_x10, reference_x10 in self.keys.tolist()]
+
+    def __contains__(self, pair):
+        return (phon_key(pair[0]), phon_key(pair[1])) in self._rows
+
+    def __len__(self):
+        return len(self.keys)
+
+
+def build_compressed_bank(generator, target_range, reference_range, filename, max_error_db=0.1,
+                          max_rank=64, phase='linear', window='hann', batch_size=256,
+                          min_freq=20.0, max_freq=20000.0, num_points=256, spot_checks=8):
+    """
+    (타겟, 참조) 격자 전체를 SVD 기저 필터 + 필터별 가중치로 압축하여 .npz로 저장
+
+    각 필터의 복원 오차 (20Hz~20kHz 크기 응답, 설계 결과 대비 최대 dB 오차)가
+    max_error_db 이하가 되는 가장 작은 기저 수를 선택합니다. 오차는 float32로 저장한 값 기준입니다.
+    격자는 batch_size 청크로 두 번 설계하며 (그람 행렬 누적, 가중치 / 오차 계산),
+    메모리는 격자 크기가 아니라 numtaps x numtaps 그람 행렬과 필터당 가중치 / 오차 행에 비례합니다.
+
+    Args:
+        generator: BulkFIRFilterGenerator 인스턴스
+        target_range, reference_range: generate_filter_range와 같은 (start, end, step) 튜플 또는 {'values': [...]}
+        filename: 출력 .npz 파일
+        max_error_db: 허용 복원 오차 (dB)
+        max_rank: 최대 기저 수
+        spot_checks: design_single_filter 결과와 직접 비교할 필터 수
+
+    Returns:
+        압축 보고서 딕셔너리
+    """
+    start_time = time.time()
+
+    pairs = phon_grid(target_range, reference_range)
+
+    print(f"\n=== 압축 필터 뱅크 생성 ===")
+    print(f"필터 수: {len(pairs)} | 필터 길이: {generator.numtaps} 탭 | 허용 오차: {max_error_db} dB")
+
+    # 1. 청크 단위 설계로 평균과 그람 행렬 (numtaps x numtaps)만 누적 (격자 전체 계수는 메모리에 두지 않음)
+    chunks = [pairs[start:start + batch_size] for start in range(0, len(pairs), batch_size)]
+    coefficient_sum = np.zeros(generator.numtaps)
+    gram = np.zeros((generator.numtaps, generator.numtaps))
+    for chunk_pairs in chunks:
+        chunk_coeffs, _ = generator.design_filter_batch(chunk_pairs, window=window, phase=phase)
+        coefficient_sum += chunk_coeffs.sum(axis=0)
+        gram += chunk_coeffs.T @ chunk_coeffs
+
+    # 2. 평균 제거 그람 행렬의 상위 고유벡터 = 평균 제거 계수 행렬의 오른쪽 특이벡터 (기저 필터)
+    mean_filter = coefficient_sum / len(pairs)
+    gram -= len(pairs) * np.outer(mean_filter, mean_filter)
+    rank_limit = min(max_rank, len(pairs), generator.numtaps)
+    _, _, vt = _randomized_svd(gram, rank_limit)
+    all_basis = vt.astype(np.float32)
+    mean_filter_f32 = mean_filter.astype(np.float32)
+    gram = None
+
+    # 3. 두 번째 설계 패스: 청크마다 가중치 (저장할 float32 평균 / 기저에 대한 투영)와
+    #    기저 수별 복원 오차를 계산 (주파수 응답은 기저별로 선형 결합)
+    max_freq = min(max_freq, generator.fs / 2.0 * 0.999)
+    freqs = np.logspace(np.log10(min_freq), np.log10(max_freq), num_points)
+    eval_matrix = np.exp(-1j * 2 * np.pi * np.outer(np.arange(generator.numtaps), freqs) / generator.fs)
+    basis_f64 = all_basis.astype(np.float64)
+    mean_response = mean_filter_f32.astype(np.float64) @ eval_matrix
+    basis_response = basis_f64 @ eval_matrix
+
+    all_weights = np.empty((len(pairs), rank_limit), dtype=np.float32)
+    errors_by_rank = np.empty((len(pairs), rank_limit + 1))
+    start = 0
+    for chunk_pairs in chunks:
+        chunk_coeffs, _ = generator.design_filter_batch(chunk_pairs, window=window, phase=phase)
+        rows = slice(start, start + len(chunk_pairs))
+        all_weights[rows] = (chunk_coeffs - mean_filter_f32) @ basis_f64.T
+
+        # 최대 |dB 오차|는 전력비의 최대 / 최소에서 구함 (빈마다 로그를 계산하지 않음)
+        design_power = np.maximum(np.abs(chunk_coeffs @ eval_matrix) ** 2, 1e-24)
+        reconstructed = np.tile(mean_response, (len(chunk_pairs), 1))
+        for rank in range(0, rank_limit + 1):
+            if rank > 0:
+                reconstructed += np.outer(all_weights[rows, rank - 1].astype(np.float64), basis_response[rank - 1])
+            power_ratio = np.maximum(reconstructed.real ** 2 + reconstructed.imag ** 2, 1e-24) / design_power
+            errors_by_rank[rows, rank] = 10 * np.maximum(np.log10(np.max(power_ratio, axis=1)),
+                                                         -np.log10(np.min(power_ratio, axis=1)))
+        start += len(chunk_pairs)
+
+    # 복원 오차 기준을 만족하는 최소 기저 수
+    max_errors = np.max(errors_by_rank, axis=0)
+    passing = np.flatnonzero(max_errors <= max_error_db)
+    rank = int(passing[0]) if len(passing) else rank_limit
+    errors_db = errors_by_rank[:, rank]
+
+    within_bound = bool(np.max(errors_db) <= max_error_db)
+    if not within_bound:
+        print(f"경고: 기저 {rank_limit}개로 허용 오차를 만족하지 못했습니다 (최대 {np.max(errors_db):.4f} dB)")
+
+    basis = all_basis[:rank]
+    weights = all_weights[:, :rank]
+    keys = np.array([(phon_key(target_phon), phon_key(ref_phon)) for target_phon, ref_phon in pairs],
+                    dtype=np.int32)
+
+    np.savez(filename, fs=generator.fs, numtaps=generator.numtaps, max_error_db=max_error_db,
+             mean=mean_filter_f32, basis=basis, weights=weights, keys=keys)
+
+    # 4. design_single_filter 결과와 직접 비교 (표본)
+    bank = CompressedFilterBank(filename)
+    spot_indices = np.linspace(0, len(pairs) - 1, min(spot_checks, len(pairs))).astype(int)
+    spot_errors = []
+    for index in spot_indices:
+        reference_coeff, _ = generator.design_single_filter(*pairs[index], window=window, phase=phase)
+        reference_response = _magnitude_response(reference_coeff, generator.fs, freqs)
+        restored_response = _magnitude_response(bank.get(*pairs[index]), generator.fs, freqs)
+        spot_errors.append(float(np.max(np.abs(20 * np.log10(
+            np.maximum(restored_response, 1e-12) / np.maximum(reference_response, 1e-12))))))
+
+    # 5. 용량 보고 (현재 16비트 WAV 세트 대비)
+    wav_set_bytes = len(pairs) * (44 + generator.numtaps * 2)
+    compressed_bytes = os.path.getsize(filename)
+    report = {
+        'filters': len(pairs),
+        'rank': rank,
+        'max_error_db': max_error_db,
+        'achieved_max_error_db': float(np.max(errors_db)),
+        'achieved_rms_error_db': float(np.sqrt(np.mean(errors_db ** 2))),
+        'within_bound': within_bound,
+        'spot_check_max_error_db': max(spot_errors) if spot_errors else 0.0,
+        'wav_set_bytes': wav_set_bytes,
+        'compressed_bytes': compressed_bytes,
+        'compression_ratio': wav_set_bytes / compressed_bytes,
+        'elapsed_seconds': time.time() - start_time,
+    }
+
+    print(f"기저 필터 수: {rank}")
+    print(f"복원 오차: 최대 {report['achieved_max_error_db']:.4f} dB, RMS {report['achieved_rms_error_db']:.4f} dB")
+    print(f"design_single_filter 표본 비교 최대 오차: {report['spot_check_max_error_db']:.4f} dB")
+    print(f"WAV 세트 용량: {wav_set_bytes / 1e6:.2f} MB -> 압축 뱅크: {compressed_bytes / 1e6:.3f} MB "
+          f"(x{report['compression_ratio']:.0f})")
+    print(f"소요 시간: {report['elapsed_seconds']:.1f}초")
+    return report
+
+
+def main():
+    generator = BulkFIRFilterGenerator(fs=48000, numtaps=4095)
+    build_compressed_bank(
+        generator,
+        target_range=(40.0, 85.0, 0.1),     # 0.1 폰 단위 451개
+        reference_range=(75.0, 85.0, 1.0),  # 11개 -> 4961개 필터
+        filename="compressed_filters.npz",
+        max_error_db=0.1
+    )
+
+
+if __name__ == "__main__":
+    main()
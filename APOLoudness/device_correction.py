@@ -0,0 +1,164 @@
+import argparse
+import csv
+import hashlib
+import os
+import re
+
+import numpy as np
+
+from bulk_fir_filter_generator import BulkFIRFilterGenerator
+
+
+def parse_graphic_eq(text):
+    """
+    GraphicEQ 문자열의 (주파수, dB) 쌍 리스트
+
+    'GraphicEQ: 20 -1.2; 25 -0.8; ...' (Equalizer APO / AutoEq)과
+    'GraphicEQ: enabled bands="31 3.0; 62 2.0; ..."' (test-configs 설정 파일) 형식을 모두 읽습니다.
+    """
+    bands = re.search(r'bands="([^"]*)"', text)
+    if bands:
+        text = bands.group(1)
+    elif ':' in text:
+        text = text.split(':', 1)[1]
+    pairs = []
+    for band in text.replace("\n", " ").split(";"):
+        values = band.split()
+        if len(values) < 2:
+            continue
+        try:
+            pairs.append((float(values[0]), float(values[1])))
+        except ValueError:
+            continue
+    return pairs
+
+
+def parse_response_csv(lines):
+    """
+    주파수 / dB CSV의 (주파수, dB) 쌍 리스트
+
+    쉼표, 탭, 세미콜론, 공백 구분을 모두 받습니다. 머리글이 있으면 freq / frequency 열과
+    correction / gain / db / raw 열 (없으면 두 번째 열)을 쓰고, 없으면 앞의 두 열을 씁니다.
+    """
+    rows = [row for row in csv.reader((re.sub(r'[\t; ]+', ',', line.strip()) for line in lines
+                                       if line.strip() and not line.lstrip().startswith('#')))]
+    if not rows:
+        return []
+    freq_column, gain_column = 0, 1
+    try:
+        float(rows[0][0])
+    except (ValueError, IndexError):
+        header = [name.strip().lower() for name in rows[0]]
+        rows = rows[1:]
+        freq_column = next((index for index, name in enumerate(header) if name in ('freq', 'frequency', 'hz')), 0)
+        gain_column = next((index for name_set in (('correction', 'equalization'), ('gain', 'db'), ('raw',))
+                            for index, name in enumerate(header) if name in name_set),
+                           1 if freq_column != 1 else 0)
+    pairs = []
+    for row in rows:
+        try:
+            pairs.append((float(row[freq_column]), float(row[gain_column])))
+        except (ValueError, IndexError):
+            continue
+    return pairs
+
+
+class DeviceCorrection:
+    """
+    장치 (헤드폰 / 스피커) 보정 곡선
+
+    (주파수, dB) 점 사이는 로그 주파수에서 dB를 선형 보간하고, 범위 밖은 양 끝 값을 유지합니다
+    (Equalizer APO GraphicEQ와 같은 보간). BulkFIRFilterGenerator(device_correction=...)에 넘기면
+    모든 (타겟, 참조) 이득 곡선에 곱해져 보정이 포함된 필터 하나로 설계됩니다.
+    """
+
+    def __init__(self, freqs, gains_db, name=None):
+        freqs = np.asarray(freqs, dtype=float)
+        gains_db = np.asarray(gains_db, dtype=float)
+        if freqs.ndim != 1 or freqs.shape != gains_db.shape or len(freqs) == 0:
+            raise ValueError("보정 곡선의 주파수와 dB 배열 길이가 맞지 않습니다.")
+        if np.any(freqs <= 0) or not np.all(np.isfinite(gains_db)):
+            raise ValueError("보정 곡선에 0 이하 주파수 또는 유효하지 않은 dB 값이 있습니다.")
+        # 주파수 정렬, 같은 주파수는 마지막 값 사용
+        order = np.argsort(freqs, kind='stable')
+        freqs, gains_db = freqs[order], gains_db[order]
+        keep = np.append(freqs[1:] != freqs[:-1], True)
+        self.freqs = freqs[keep]
+        self.gains_db = gains_db[keep]
+        self.name = name
+
+    @classmethod
+    def from_file(cls, filename, invert=False):
+        """
+        CSV (주파수, dB) 또는 GraphicEQ 파일에서 보정 곡선 읽기
+
+        Args:
+            invert: True이면 측정 응답으로 보고 부호를 뒤집어 보정 곡선으로 사용
+        """
+        with open(filename, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        graphic_eq = [line for line in lines if line.strip().lower().startswith('graphiceq:')]
+        pairs = parse_graphic_eq(graphic_eq[0]) if graphic_eq else parse_response_csv(lines)
+        if not pairs:
+            raise ValueError(f"보정 곡선을 읽을 수 없습니다: {filename}")
+        freqs, gains_db = zip(*pairs)
+        gains_db = -np.asarray(gains_db) if invert else np.asarray(gains_db)
+        return cls(freqs, gains_db, name=os.path.basename(filename))
+
+    @classmethod
+    def from_dict(cls, info):
+        """to_dict() 결과 (generation_info['device_correction'])에서 보정 곡선 복원"""
+        if 'freqs' not in info or 'gains_db' not in info:
+            raise ValueError(f"보정 곡선 점이 기록되어 있지 않습니다 ({info.get('name')}): 보정 파일을 직접 지정하세요.")
+        return cls(info['freqs'], info['gains_db'], name=info.get('name'))
+
+    def gains_db_at(self, freqs):
+        """주어진 주파수의 보정 dB (로그 주파수 선형 보간, 범위 밖은 양 끝 값)"""
+        return np.interp(np.log10(np.asarray(freqs, dtype=float)), np.log10(self.freqs), self.gains_db)
+
+    def signature(self):
+        """보정 곡선 서명 (캐시 키 / 증분 생성 해시용)"""
+        digest = hashlib.sha256(self.freqs.tobytes())
+        digest.update(self.gains_db.tobytes())
+        return digest.hexdigest()[:12]
+
+    def to_dict(self):
+        """generation_info에 기록할 요약과 곡선 점 (검증 시 from_dict()로 복원)"""
+        return {
+            'name': self.name,
+            'signature': self.signature(),
+            'points': len(self.freqs),
+            'freq_range': [float(self.freqs[0]), float(self.freqs[-1])],
+            'gain_range_db': [float(self.gains_db.min()), float(self.gains_db.max())],
+            'freqs': self.freqs.tolist(),
+            'gains_db': self.gains_db.tolist(),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="장치 보정 곡선을 포함한 라우드니스 필터 뱅크 생성")
+    parser.add_argument("correction", help="보정 곡선 파일 (CSV 주파수/dB 또는 GraphicEQ)")
+    parser.add_argument("--invert", action="store_true", help="측정 응답으로 보고 반전하여 보정")
+    parser.add_argument("--output-dir", default="bulk_filters_device", help="출력 디렉토리")
+    parser.add_argument("--target-range", type=float, nargs=3, default=(40.0, 90.0, 0.1),
+                        metavar=("START", "END", "STEP"))
+    parser.add_argument("--reference-range", type=float, nargs=3, default=(75.0, 90.0, 1.0),
+                        metavar=("START", "END", "STEP"))
+    parser.add_argument("--fs", type=int, default=48000)
+    parser.add_argument("--numtaps", type=int, default=4095)
+    parser.add_argument("--workers", type=int, help="병렬 설계 프로세스 수")
+    parser.add_argument("--bank", help="필터 뱅크 파일명 (출력 디렉토리 안)")
+    parser.add_argument("--format", default="wav", choices=("wav", "csv", "both"), help="필터별 파일 형식")
+    args = parser.parse_args()
+
+    correction = DeviceCorrection.from_file(args.correction, invert=args.invert)
+    print(f"보정 곡선: {correction.name} ({len(correction.freqs)}개 점, "
+          f"{correction.gains_db.min():.1f} ~ {correction.gains_db.max():.1f} dB)")
+    generator = BulkFIRFilterGenerator(fs=args.fs, numtaps=args.numtaps, device_correction=correction)
+    generator.generate_filter_range(tuple(args.target_range), tuple(args.reference_range),
+                                    output_dir=args.output_dir, file_format=args.format,
+                                    workers=args.workers, bank_filename=args.bank)
+
+
+if __name__ == "__main__":
+    main()
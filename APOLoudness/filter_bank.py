@@ -0,0 +1,211 @@
+import argparse
+import os
+import struct
+
+import numpy as np
+
+from filter_wav import write_filter_wav
+
+
+# 필터 뱅크 파일 형식 (리틀 엔디언)
+#
+#   [헤더 64바이트]
+#     magic(8) version(u32) fs(u32) numtaps(u32) count(u32) capacity(u32) block_stride(u32)
+#     index_offset(u64) data_offset(u64) phase(u32, 0 = 선형 위상, 1 = 최소 위상) 나머지 0 채움
+#     (phase가 없던 파일은 0으로 읽혀 선형 위상)
+#   [인덱스] capacity x (target_x10 i32, reference_x10 i32, offset u64) - 앞의 count개가 유효
+#   [데이터] 64바이트 정렬된 float32 계수 블록 (block_stride 개 float, 앞의 numtaps개가 계수,
+#            numtaps보다 짧은 필터는 뒤를 0으로 채움)
+BANK_MAGIC = b'JLFBANK\0'
+BANK_VERSION = 1
+BANK_ALIGNMENT = 64
+BANK_HEADER_FORMAT = '<8sIIIIIIQQI'
+BANK_HEADER_SIZE = 64
+BANK_INDEX_DTYPE = np.dtype([('target_x10', '<i4'), ('reference_x10', '<i4'), ('offset', '<u8')])
+BANK_PHASES = ('linear', 'minimum')  # 헤더 phase 값 순서
+
+
+def _align(value, alignment=BANK_ALIGNMENT):
+    return (value + alignment - 1) // alignment * alignment
+
+
+def phon_key(phon):
+    """폰 레벨을 정수 키 (폰 x 10)로 변환"""
+    return int(round(float(phon) * 10))
+
+
+class FilterBankWriter:
+    """
+    필터 뱅크 파일 순차 기록기
+
+    capacity만큼 인덱스 공간을 예약한 뒤 add()로 계수 블록을 추가하고,
+    close()에서 헤더와 인덱스를 기록합니다. 중간에 닫아도 그때까지의 필터로 유효한 파일이 됩니다.
+    """
+
+    def __init__(self, filename, fs, numtaps, capacity, phase='linear'):
+        if phase not in BANK_PHASES:
+            raise ValueError(f"알 수 없는 위상: {phase}")
+        self.filename = filename
+        self.fs = fs
+        self.numtaps = numtaps
+        self.phase = phase
+        self.capacity = max(1, capacity)
+        self.block_stride = _align(numtaps * 4) // 4
+        self.index_offset = BANK_HEADER_SIZE
+        self.data_offset = _align(self.index_offset + self.capacity * BANK_INDEX_DTYPE.itemsize)
+        self.index = np.zeros(self.capacity, dtype=BANK_INDEX_DTYPE)
+        self.count = 0
+        self._keys = set()
+        self._block = np.zeros(self.block_stride, dtype='<f4')
+
+        self._file = open(filename, 'wb')
+        self._file.truncate(self.data_offset)
+        self._file.seek(self.data_offset)
+
+    def add(self, target_phon, reference_phon, coefficients):
+        """필터 계수 블록 추가"""
+        if self.count >= self.capacity:
+            raise ValueError(f"필터 뱅크 용량 초과: {self.capacity}")
+        if len(coefficients) > self.numtaps:
+            raise ValueError(f"필터 길이 초과: {len(coefficients)} > {self.numtaps}")
+
+        key = (phon_key(target_phon), phon_key(reference_phon))
+        if key in self._keys:
+            raise ValueError(f"중복된 필터: T={target_phon}, R={reference_phon}")
+
+        self._block[:] = 0.0
+        self._block[:len(coefficients)] = coefficients
+        offset = self.data_offset + self.count * self.block_stride * 4
+        self._file.write(memoryview(self._block).cast('B'))
+
+        self.index[self.count] = (key[0], key[1], offset)
+        self._keys.add(key)
+        self.count += 1
+
+    def close(self):
+        """헤더와 인덱스 기록 후 파일 닫기"""
+        if self._file is None:
+            return
+        header = struct.pack(BANK_HEADER_FORMAT, BANK_MAGIC, BANK_VERSION, self.fs, self.numtaps,
+                             self.count, self.capacity, self.block_stride,
+                             self.index_offset, self.data_offset, BANK_PHASES.index(self.phase))
+        self._file.seek(0)
+        self._file.write(header.ljust(BANK_HEADER_SIZE, b'\0'))
+        self._file.seek(self.index_offset)
+        self._file.write(memoryview(self.index).cast('B'))
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class FilterBank:
+    """
+    필터 뱅크 파일 리더 (np.memmap 기반)
+
+    get()은 파일을 복사하지 않는 float32 뷰를 O(1)로 반환합니다.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            header = f.read(BANK_HEADER_SIZE)
+        if len(header) < BANK_HEADER_SIZE or header[:8] != BANK_MAGIC:
+            raise ValueError(f"필터 뱅크 파일이 아닙니다: {filename}")
+
+        (_, self.version, self.fs, self.numtaps, self.count, self.capacity,
+         self.block_stride, self.index_offset, self.data_offset, phase) = struct.unpack_from(BANK_HEADER_FORMAT, header)
+        if self.version != BANK_VERSION:
+            raise ValueError(f"지원하지 않는 필터 뱅크 버전: {self.version}")
+        if phase >= len(BANK_PHASES):
+            raise ValueError(f"알 수 없는 필터 뱅크 위상: {phase}")
+        self.phase = BANK_PHASES[phase]
+
+        self.index = np.memmap(filename, dtype=BANK_INDEX_DTYPE, mode='r',
+                               offset=self.index_offset, shape=(self.count,))
+        if self.count:
+            self.blocks = np.memmap(filename, dtype='<f4', mode='r', offset=self.data_offset,
+                                    shape=(self.count, self.block_stride))
+        else:
+            self.blocks = np.empty((0, self.block_stride), dtype='<f4')
+
+        block_bytes = self.block_stride * 4
+        slots = (self.index['offset'].astype(np.int64) - self.data_offset) // block_bytes
+        self._slots = {
+            (int(target_x10), int(reference_x10)): int(slot)
+            for target_x10, reference_x10, slot in zip(self.index['target_x10'], self.index['reference_x10'], slots)
+        }
+
+    def get(self, target_phon, reference_phon):
+        """(타겟, 참조) 필터 계수 (numtaps 길이 float32 읽기 전용 뷰)"""
+        slot = self._slots.get((phon_key(target_phon), phon_key(reference_phon)))
+        if slot is None:
+            raise KeyError(f"필터 뱅크에 없는 필터: T={target_phon}, R={reference_phon}")
+        return self.blocks[slot, :self.numtaps]
+
+    def pairs(self):
+        """뱅크에 포함된 (타겟, 참조) 폰 쌍 (기록 순서)"""
+        return [(target_x10 / 10.0, reference_x10 / 10.0)
+                for target_x10, reference_x10 in zip(self.index['target_x10'].tolist(),
+                                                     self.index['reference_x10'].tolist())]
+
+    def __contains__(self, pair):
+        target_phon, reference_phon = pair
+        return (phon_key(target_phon), phon_key(reference_phon)) in self._slots
+
+    def __len__(self):
+        return self.count
+
+    def export_wav(self, target_phon, reference_phon, filename, sample_format="int16"):
+        """뱅크의 필터 하나를 WAV 파일로 내보내기"""
+        write_filter_wav(self.get(target_phon, reference_phon), filename, self.fs,
+                         sample_format=sample_format)
+
+
+def export_filters(bank_filename, output_dir, pairs=None, sample_format="int16"):
+    """
+    필터 뱅크에서 개별 WAV 파일 내보내기 (파일명은 generate_filter_range와 동일)
+
+    Args:
+        pairs: 내보낼 (타겟, 참조) 쌍 리스트 (None이면 전체)
+
+    Returns:
+        기록한 파일 수
+    """
+    bank = FilterBank(bank_filename)
+    os.makedirs(output_dir, exist_ok=True)
+    if pairs is None:
+        pairs = bank.pairs()
+
+    for target_phon, reference_phon in pairs:
+        wav_filename = os.path.join(output_dir, f"{target_phon:.1f}-{reference_phon:.1f}_filter.wav")
+        bank.export_wav(target_phon, reference_phon, wav_filename, sample_format=sample_format)
+    return len(pairs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="필터 뱅크에서 WAV 필터 내보내기")
+    parser.add_argument("bank", help="필터 뱅크 파일")
+    parser.add_argument("output_dir", help="WAV 출력 디렉토리")
+    parser.add_argument("--target", type=float, help="타겟 폰 (생략 시 전체)")
+    parser.add_argument("--reference", type=float, help="참조 폰 (생략 시 전체)")
+    parser.add_argument("--format", choices=["int16", "float32"], default="int16", help="WAV 샘플 형식")
+    args = parser.parse_args()
+
+    pairs = None
+    if args.target is not None or args.reference is not None:
+        bank = FilterBank(args.bank)
+        pairs = [(target_phon, reference_phon) for target_phon, reference_phon in bank.pairs()
+                 if (args.target is None or phon_key(target_phon) == phon_key(args.target))
+                 and (args.reference is None or phon_key(reference_phon) == phon_key(args.reference))]
+
+    count = export_filters(args.bank, args.output_dir, pairs=pairs, sample_format=args.format)
+    print(f"내보내기 완료: {count}개 필터 -> {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
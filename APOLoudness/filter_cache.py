@@ -0,0 +1,145 @@
+import os
+import re
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+# 이보다 오래된 임시 파일만 강제 종료로 남은 것으로 보고 삭제 (디스크 계층을 공유하는 다른 프로세스가
+# 기록 중인 임시 파일은 그대로 둠, 필터 하나의 기록은 수 밀리초)
+STALE_TEMP_SECONDS = 3600
+
+
+class FilterCache:
+    """
+    크기 제한 LRU 필터 캐시 (메모리 + 선택적 디스크 계층)
+
+    메모리 계층에서 밀려난 필터는 디스크 계층 (.npy 파일)으로 내려가고,
+    디스크 계층도 용량을 넘으면 가장 오래 사용하지 않은 파일부터 삭제합니다.
+    디스크에서 찾은 필터는 다시 메모리 계층으로 올립니다.
+    """
+
+    def __init__(self, max_memory_bytes=64 * 1024 * 1024, disk_dir=None, max_disk_bytes=512 * 1024 * 1024):
+        self.max_memory_bytes = max_memory_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk = OrderedDict()  # 파일명 -> 크기 (오래된 순)
+        self._disk_bytes = 0
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0,
+                      'memory_evictions': 0, 'disk_evictions': 0}
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            now = time.time()
+            for entry in os.scandir(disk_dir):
+                if re.search(r'\.npy\.\d+\.tmp$', entry.name):
+                    # 기록 도중 강제 종료로 남은 임시 파일
+                    try:
+                        if now - entry.stat().st_mtime > STALE_TEMP_SECONDS:
+                            os.remove(entry.path)
+                    except OSError:
+                        pass
+            entries = [entry for entry in os.scandir(disk_dir) if entry.name.endswith('.npy')]
+            for entry in sorted(entries, key=lambda entry: entry.stat().st_mtime):
+                self._disk[entry.name] = entry.stat().st_size
+                self._disk_bytes += entry.stat().st_size
+
+    @staticmethod
+    def _disk_name(key):
+        return re.sub(r'[^0-9A-Za-z_.-]+', '-', "_".join(str(part) for part in key)) + ".npy"
+
+    def get(self, key):
+        """캐시된 계수 (읽기 전용 배열) 또는 None"""
+        coefficients = self._memory.get(key)
+        if coefficients is not None:
+            self._memory.move_to_end(key)
+            self.stats['memory_hits'] += 1
+            return coefficients
+
+        name = self._disk_name(key)
+        if self.disk_dir and name in self._disk:
+            path = os.path.join(self.disk_dir, name)
+            try:
+                coefficients = np.load(path)
+            except (OSError, ValueError):
+                self._drop_disk(name)
+            else:
+                os.utime(path)
+                self._disk.move_to_end(name)
+                self.stats['disk_hits'] += 1
+                self._put_memory(key, coefficients)
+                return self._memory[key]
+
+        self.stats['misses'] += 1
+        return None
+
+    def put(self, key, coefficients):
+        """필터 추가 (읽기 전용 복사본을 저장하고 반환)"""
+        coefficients = np.array(coefficients, dtype=np.float64)
+        self._put_memory(key, coefficients)
+        return self._memory[key]
+
+    def _put_memory(self, key, coefficients):
+        coefficients.flags.writeable = False
+        if key in self._memory:
+            self._memory_bytes -= self._memory.pop(key).nbytes
+        self._memory[key] = coefficients
+        self._memory_bytes += coefficients.nbytes
+
+        while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+            evicted_key, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+            self.stats['memory_evictions'] += 1
+            self._put_disk(evicted_key, evicted)
+
+    def _put_disk(self, key, coefficients):
+        if not self.disk_dir:
+            return
+        name = self._disk_name(key)
+        if name in self._disk:
+            self._disk.move_to_end(name)
+            return
+        path = os.path.join(self.disk_dir, name)
+        temp_path = f"{path}.{os.getpid()}.tmp"  # 디스크 계층 스캔 (.npy)에 잡히지 않는 이름
+        with open(temp_path, 'wb') as f:
+            np.save(f, coefficients)
+        try:
+            os.replace(temp_path, path)
+        except FileNotFoundError:
+            return  # 다른 프로세스가 임시 파일을 지움: 이 필터는 디스크 계층에 넣지 않음
+        self._disk[name] = os.path.getsize(path)
+        self._disk_bytes += self._disk[name]
+
+        while self._disk_bytes > self.max_disk_bytes and len(self._disk) > 1:
+            self._drop_disk(next(iter(self._disk)))
+            self.stats['disk_evictions'] += 1
+
+    def _drop_disk(self, name):
+        self._disk_bytes -= self._disk.pop(name)
+        try:
+            os.remove(os.path.join(self.disk_dir, name))
+        except OSError:
+            pass
+
+    def flush(self):
+        """메모리 계층의 필터를 모두 디스크 계층에 기록 (다음 실행에서 재사용)"""
+        for key, coefficients in self._memory.items():
+            self._put_disk(key, coefficients)
+
+    def summary(self):
+        """캐시 통계 (적중률, 항목 수, 용량 포함)"""
+        lookups = self.stats['memory_hits'] + self.stats['disk_hits'] + self.stats['misses']
+        summary = dict(self.stats)
+        summary.update({
+            'lookups': lookups,
+            'hit_rate': (lookups - self.stats['misses']) / lookups if lookups else 0.0,
+            'memory_entries': len(self._memory),
+            'memory_bytes': self._memory_bytes,
+            'disk_entries': len(self._disk),
+            'disk_bytes': self._disk_bytes,
+        })
+        return summary
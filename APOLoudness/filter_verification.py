@@ -0,0 +1,240 @@
+import argparse
+import csv
+import json
+import os
+import re
+import struct
+import sys
+import time
+
+import numpy as np
+
+from bulk_fir_filter_generator import BulkFIRFilterGenerator
+from device_correction import DeviceCorrection
+from filter_bank import FilterBank
+from metadata_store import METADATA_JSON_FILENAME, METADATA_JSONL_FILENAME
+
+
+VERIFICATION_DTYPE = np.dtype([
+    ('target_phon', 'f8'),
+    ('reference_phon', 'f8'),
+    ('max_error_db', 'f8'),      # 목표 곡선 대비 최대 절대 오차
+    ('rms_error_db', 'f8'),      # 목표 곡선 대비 RMS 오차
+    ('ripple_db', 'f8'),         # 오차 곡선의 최대 - 최소 (통과 대역 리플)
+    ('peak_gain_db', 'f8'),      # 0Hz ~ 나이퀴스트 전체에서 실제 최대 이득
+    ('peak_freq_hz', 'f8'),      # 최대 이득 주파수
+    ('gain_1khz_db', 'f8'),      # 1kHz 이득 (정규화 확인)
+])
+
+FILTER_FILENAME_PATTERN = re.compile(r'^(\d+(?:\.\d+)?)-(\d+(?:\.\d+)?)_filter\.wav$')
+
+
+def verify_filters(generator, fir_coeffs, pairs, min_freq=20.0, max_freq=20000.0, n_fft=None,
+                   batch_size=256, normalize_1khz=False):
+    """
+    필터 묶음의 주파수 응답을 배치 FFT로 계산하여 ISO 차이 목표 곡선과 비교
+
+    목표 곡선은 설계와 같은 방식 (ISO 주파수 사이 선형 보간, 1kHz 0dB)으로 FFT 빈마다 계산하고,
+    min_freq ~ max_freq 범위의 빈에서 오차를 평가합니다.
+
+    Args:
+        generator: 곡선 데이터를 제공할 BulkFIRFilterGenerator 인스턴스 (fs 포함)
+        fir_coeffs: (N, numtaps) 계수 배열 (np.memmap 가능, batch_size 단위로 읽음)
+        pairs: 각 행의 (target_phon, reference_phon)
+        n_fft: FFT 길이 (None이면 numtaps x 4 이상의 2의 거듭제곱)
+        normalize_1khz: True이면 비교 전에 1kHz 이득을 0dB로 맞춤 (16비트 WAV처럼 스케일이 바뀐 필터용)
+
+    Returns:
+        VERIFICATION_DTYPE 구조 배열 (필터당 한 행)
+    """
+    numtaps = fir_coeffs.shape[1]
+    if n_fft is None:
+        n_fft = 2 ** int(np.ceil(np.log2(numtaps * 4)))
+
+    freqs = np.fft.rfftfreq(n_fft, d=1.0 / generator.fs)
+    max_freq = min(max_freq, generator.fs / 2.0 * 0.999)
+    band = (freqs >= min_freq) & (freqs <= max_freq)
+    band_freqs = freqs[band]
+
+    plan = generator._batch_design_plan('hann', numtaps)
+    band_interp_matrix = generator._interp_matrix(band_freqs, plan['breakpoints'])
+    eval_1khz = np.exp(-1j * 2 * np.pi * 1000 / generator.fs * np.arange(numtaps))
+
+    results = np.zeros(len(pairs), dtype=VERIFICATION_DTYPE)
+    for start in range(0, len(pairs), batch_size):
+        chunk_pairs = pairs[start:start + batch_size]
+        chunk_coeffs = np.asarray(fir_coeffs[start:start + batch_size], dtype=np.float64)
+
+        relative_gains_linear = generator._relative_gains_matrix(chunk_pairs)
+        target_db = 20 * np.log10(generator._breakpoint_gains(relative_gains_linear, plan) @ band_interp_matrix.T)
+
+        gain_1khz = np.abs(chunk_coeffs @ eval_1khz)
+        magnitude = np.abs(np.fft.rfft(chunk_coeffs, n=n_fft, axis=1))
+        if normalize_1khz:
+            scale = np.where(gain_1khz > 1e-12, gain_1khz, 1.0)
+            magnitude /= scale[:, np.newaxis]
+            gain_1khz = gain_1khz / scale
+        magnitude_db = 20 * np.log10(np.maximum(magnitude, 1e-12))
+
+        error_db = magnitude_db[:, band] - target_db
+        peak_bins = np.argmax(magnitude_db, axis=1)
+
+        rows = results[start:start + len(chunk_pairs)]
+        rows['target_phon'] = [pair[0] for pair in chunk_pairs]
+        rows['reference_phon'] = [pair[1] for pair in chunk_pairs]
+        rows['max_error_db'] = np.max(np.abs(error_db), axis=1)
+        rows['rms_error_db'] = np.sqrt(np.mean(error_db ** 2, axis=1))
+        rows['ripple_db'] = np.max(error_db, axis=1) - np.min(error_db, axis=1)
+        rows['peak_gain_db'] = magnitude_db[np.arange(len(chunk_pairs)), peak_bins]
+        rows['peak_freq_hz'] = freqs[peak_bins]
+        rows['gain_1khz_db'] = 20 * np.log10(np.maximum(gain_1khz, 1e-12))
+    return results
+
+
+def load_filter_bank(filename):
+    """필터 뱅크 파일에서 (계수 2차원 memmap 뷰, (타겟, 참조) 쌍 리스트, fs)"""
+    bank = FilterBank(filename)
+    return bank.blocks[:, :bank.numtaps], bank.pairs(), bank.fs
+
+
+def _read_filter_wav(filename):
+    """filter_wav로 기록한 모노 WAV (16비트 PCM 또는 32비트 float)의 (샘플, fs)"""
+    with open(filename, 'rb') as f:
+        data = f.read()
+    audio_format, _, fs = struct.unpack_from('<HHL', data, 20)
+    data_offset = data.index(b'data', 36) + 8
+    if audio_format == 3:
+        return np.frombuffer(data, dtype='<f4', offset=data_offset).astype(np.float64), fs
+    return np.frombuffer(data, dtype='<i2', offset=data_offset) / 32767.0, fs
+
+
+def load_wav_directory(directory):
+    """
+    generate_filter_range 출력 디렉토리의 WAV 필터를 하나의 2차원 배열로 읽기
+
+    탭 수가 섞여 있으면 (search_min_numtaps, 부분 재생성) 가장 긴 필터 길이에 맞추고
+    짧은 필터는 뒤를 0으로 채웁니다 (주파수 응답은 그대로).
+
+    Returns:
+        (N, numtaps) float64 계수 배열, (타겟, 참조) 쌍 리스트, fs
+    """
+    entries = []
+    for name in sorted(os.listdir(directory)):
+        match = FILTER_FILENAME_PATTERN.match(name)
+        if match:
+            entries.append((float(match.group(1)), float(match.group(2)), name))
+    if not entries:
+        raise ValueError(f"필터 WAV 파일이 없습니다: {directory}")
+
+    filters = []
+    sample_rates = set()
+    for _, _, name in entries:
+        samples, fs = _read_filter_wav(os.path.join(directory, name))
+        filters.append(samples)
+        sample_rates.add(fs)
+    if len(sample_rates) > 1:
+        raise ValueError(f"샘플링 주파수가 다른 필터가 섞여 있습니다: {sorted(sample_rates)}")
+
+    fir_coeffs = np.zeros((len(filters), max(len(samples) for samples in filters)))
+    for row, samples in enumerate(filters):
+        fir_coeffs[row, :len(samples)] = samples
+    return fir_coeffs, [(target_phon, reference_phon) for target_phon, reference_phon, _ in entries], fs
+
+
+def load_generation_info(directory):
+    """
+    출력 디렉토리 메타데이터의 generation_info (없으면 None)
+
+    filter_metadata.jsonl이 있으면 첫 줄만 읽고, 없으면 (샤드 병합 출력 등) filter_metadata.json을 읽습니다.
+    """
+    jsonl_filename = os.path.join(directory, METADATA_JSONL_FILENAME)
+    if os.path.exists(jsonl_filename):
+        with open(jsonl_filename, 'r', encoding='utf-8') as f:
+            try:
+                return json.loads(f.readline())['generation_info']
+            except (ValueError, KeyError, TypeError):
+                pass
+    json_filename = os.path.join(directory, METADATA_JSON_FILENAME)
+    if os.path.exists(json_filename):
+        with open(json_filename, 'r', encoding='utf-8') as f:
+            return json.load(f).get('generation_info')
+    return None
+
+
+def write_verification_table(results, filename):
+    """검증 결과를 CSV 표로 저장 (dB 값은 소수점 3자리)"""
+    with open(filename, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(VERIFICATION_DTYPE.names)
+        for row in results:
+            writer.writerow([f"{row['target_phon']:.1f}", f"{row['reference_phon']:.1f}",
+                             f"{row['max_error_db']:.3f}", f"{row['rms_error_db']:.3f}",
+                             f"{row['ripple_db']:.3f}", f"{row['peak_gain_db']:.3f}",
+                             f"{row['peak_freq_hz']:.1f}", f"{row['gain_1khz_db']:.3f}"])
+
+
+def print_summary(results, max_error_db=None, worst=5):
+    """검증 요약 출력 (최대 오차가 큰 순서로 worst개)"""
+    print(f"\n=== 필터 검증 결과: {len(results)}개 ===")
+    print(f"최대 오차: 최대 {np.max(results['max_error_db']):.3f} dB | "
+          f"평균 {np.mean(results['max_error_db']):.3f} dB")
+    print(f"RMS 오차: 최대 {np.max(results['rms_error_db']):.3f} dB")
+    print(f"리플: 최대 {np.max(results['ripple_db']):.3f} dB")
+    print(f"실제 최대 이득: 최대 {np.max(results['peak_gain_db']):.2f} dB")
+    print(f"1kHz 이득 편차: 최대 {np.max(np.abs(results['gain_1khz_db'])):.4f} dB")
+
+    print(f"\n오차가 가장 큰 필터:")
+    for row in results[np.argsort(results['max_error_db'])[::-1][:worst]]:
+        print(f"  T={row['target_phon']:.1f}, R={row['reference_phon']:.1f}: "
+              f"최대 {row['max_error_db']:.3f} dB, RMS {row['rms_error_db']:.3f} dB, "
+              f"리플 {row['ripple_db']:.3f} dB, 최대 이득 {row['peak_gain_db']:.2f} dB")
+
+    if max_error_db is not None:
+        failed = int(np.sum(results['max_error_db'] > max_error_db))
+        print(f"\n허용 오차 {max_error_db} dB 초과: {failed}개")
+        return failed
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="필터 뱅크 / WAV 필터 전체의 주파수 응답 검증")
+    parser.add_argument("source", help="필터 뱅크 파일 또는 WAV 필터 디렉토리")
+    parser.add_argument("--output", default="filter_verification.csv", help="결과 CSV 파일")
+    parser.add_argument("--max-error-db", type=float, help="허용 최대 오차 (초과 시 종료 코드 1)")
+    parser.add_argument("--min-freq", type=float, default=20.0)
+    parser.add_argument("--max-freq", type=float, default=20000.0)
+    parser.add_argument("--correction", help="장치 보정 곡선 파일 (없으면 메타데이터에 기록된 보정 사용)")
+    parser.add_argument("--invert", action="store_true", help="--correction을 측정 응답으로 보고 반전")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    if os.path.isdir(args.source):
+        fir_coeffs, pairs, fs = load_wav_directory(args.source)
+        normalize_1khz = True  # 16비트 WAV는 최대값 기준으로 스케일되어 있음
+    else:
+        fir_coeffs, pairs, fs = load_filter_bank(args.source)
+        normalize_1khz = False
+
+    # 장치 보정이 포함된 뱅크는 같은 보정을 목표 곡선에 넣어야 보정 곡선이 오차로 잡히지 않음
+    if args.correction:
+        correction = DeviceCorrection.from_file(args.correction, invert=args.invert)
+    else:
+        metadata_dir = args.source if os.path.isdir(args.source) else os.path.dirname(os.path.abspath(args.source))
+        generation_info = load_generation_info(metadata_dir) or {}
+        correction_info = generation_info.get('device_correction')
+        correction = DeviceCorrection.from_dict(correction_info) if correction_info else None
+    if correction is not None:
+        print(f"장치 보정: {correction.name} ({correction.signature()})")
+
+    generator = BulkFIRFilterGenerator(fs=fs, numtaps=fir_coeffs.shape[1], device_correction=correction)
+    results = verify_filters(generator, fir_coeffs, pairs, min_freq=args.min_freq, max_freq=args.max_freq,
+                             normalize_1khz=normalize_1khz)
+    write_verification_table(results, args.output)
+
+    failed = print_summary(results, args.max_error_db)
+    print(f"\n결과 저장: {args.output} ({time.time() - start_time:.1f}초)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+import numpy as np
+import struct
+
+
+def wav_header(num_samples, fs, sample_format="int16"):
+    """
+    모노 WAV 헤더 생성
+
+    int16: wave 모듈과 동일한 44바이트 PCM 헤더
+    float32: IEEE float 형식 (fmt 18바이트 + fact 청크)
+    """
+    if sample_format == "int16":
+        data_size = num_samples * 2
+        return struct.pack('<4sL4s4sLHHLLHH4sL',
+                           b'RIFF', 36 + data_size, b'WAVE',
+                           b'fmt ', 16, 1, 1, fs, fs * 2, 2, 16,
+                           b'data', data_size)
+    if sample_format == "float32":
+        data_size = num_samples * 4
+        return struct.pack('<4sL4s4sLHHLLHHH4sLL4sL',
+                           b'RIFF', 50 + data_size, b'WAVE',
+                           b'fmt ', 18, 3, 1, fs, fs * 4, 4, 32, 0,
+                           b'fact', 4, num_samples,
+                           b'data', data_size)
+    raise ValueError(f"지원하지 않는 WAV 형식: {sample_format}")
+
+
+def wav_samples(coefficients, normalize=True, sample_format="int16"):
+    """FIR 계수를 WAV 샘플 버퍼 (리틀 엔디언 int16 또는 float32 배열)로 변환"""
+    if sample_format == "float32":
+        return np.ascontiguousarray(coefficients, dtype='<f4')
+    if normalize:
+        # 16비트 범위로 정규화
+        max_val = np.max(np.abs(coefficients))
+        if max_val > 0:
+            scaled_coeff = np.int16(coefficients / max_val * 32767 * 0.9)  # 약간의 헤드룸
+        else:
+            scaled_coeff = np.zeros_like(coefficients, dtype=np.int16)
+    else:
+        scaled_coeff = np.int16(np.clip(coefficients * 32767, -32767, 32767))
+    return np.ascontiguousarray(scaled_coeff, dtype='<i2')
+
+
+def write_wav_samples(samples, filename, fs, sample_format="int16"):
+    """wav_samples로 변환한 샘플 버퍼를 모노 WAV 파일로 저장 (헤더와 버퍼를 한 번에 기록)"""
+    header = wav_header(len(samples), fs, sample_format)
+    with open(filename, 'wb') as wav_file:
+        wav_file.writelines((header, memoryview(samples).cast('B')))
+
+
+def write_filter_wav(coefficients, filename, fs, normalize=True, sample_format="int16"):
+    """FIR 계수를 모노 WAV 파일로 저장 (헤더와 샘플 버퍼를 한 번에 기록)"""
+    write_wav_samples(wav_samples(coefficients, normalize, sample_format), filename, fs, sample_format)
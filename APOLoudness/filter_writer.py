@@ -0,0 +1,111 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """GenerationMetrics.stage와 같은 형태의 스레드 로컬 단계 타이머 (결과는 seconds 딕셔너리)"""
+
+    def __init__(self):
+        self.seconds = {}
+
+    @contextmanager
+    def stage(self, name):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start_time
+
+
+class OrderedWriterPool:
+    """
+    백그라운드 파일 기록 스레드 풀
+
+    submit()은 크기 제한 큐에 작업을 넣고, 큐가 차 있으면 기록이 따라올 때까지 기다립니다
+    (역압, 대기 중인 계수 메모리는 queue_size + 스레드 수 이내).
+    기록 함수는 (작업, turn)으로 호출되며, `with turn():` 구간은 제출 순서대로 하나씩 실행됩니다
+    (필터 뱅크처럼 순서가 정해진 출력용). 기록 함수가 turn을 쓰지 않거나 먼저 실패해도 순서는 넘어갑니다.
+    완료된 작업은 completed() / close()가 (작업, 결과, 예외) 튜플로 돌려주므로
+    카운트와 메타데이터는 호출한 스레드에서만 갱신됩니다.
+    """
+
+    def __init__(self, write_function, threads=2, queue_size=None):
+        self.write_function = write_function
+        self.queue_size = queue_size or threads * 4
+        self.blocked_seconds = 0.0
+
+        self._jobs = queue.Queue(maxsize=self.queue_size)
+        self._done = queue.Queue()
+        self._turn_condition = threading.Condition()
+        self._next_turn = 0
+        self._submitted = 0
+        self._threads = [threading.Thread(target=self._run, name=f"filter-writer-{index}", daemon=True)
+                         for index in range(max(1, threads))]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, job):
+        """작업 제출 (큐가 차 있으면 대기), 대기 시간 반환"""
+        if self._threads is None:
+            raise RuntimeError("이미 닫힌 기록 스레드 풀입니다.")
+        start_time = time.perf_counter()
+        self._jobs.put((self._submitted, job))
+        self._submitted += 1
+        blocked = time.perf_counter() - start_time
+        self.blocked_seconds += blocked
+        return blocked
+
+    def _advance_turn(self, sequence):
+        with self._turn_condition:
+            self._turn_condition.wait_for(lambda: self._next_turn == sequence)
+            self._next_turn += 1
+            self._turn_condition.notify_all()
+
+    def _run(self):
+        while True:
+            item = self._jobs.get()
+            if item is None:
+                return
+            sequence, job = item
+            turn_taken = [False]
+
+            @contextmanager
+            def turn():
+                with self._turn_condition:
+                    self._turn_condition.wait_for(lambda: self._next_turn == sequence)
+                turn_taken[0] = True
+                try:
+                    yield
+                finally:
+                    with self._turn_condition:
+                        self._next_turn += 1
+                        self._turn_condition.notify_all()
+
+            try:
+                result, error = self.write_function(job, turn), None
+            except Exception as e:
+                result, error = None, e
+            if not turn_taken[0]:
+                self._advance_turn(sequence)
+            self._done.put((job, result, error))
+
+    def completed(self):
+        """지금까지 완료된 작업 (기다리지 않음)"""
+        results = []
+        while True:
+            try:
+                results.append(self._done.get_nowait())
+            except queue.Empty:
+                return results
+
+    def close(self):
+        """대기 중인 작업을 모두 기록하고 스레드 종료, 남은 완료 작업 반환 (여러 번 호출 가능)"""
+        if self._threads is not None:
+            for _ in self._threads:
+                self._jobs.put(None)
+            for thread in self._threads:
+                thread.join()
+            self._threads = None
+        return self.completed()
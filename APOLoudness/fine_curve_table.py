@@ -0,0 +1,91 @@
+import numpy as np
+from collections.abc import Mapping
+
+
+def build_fine_curve_table(base_curves, step=0.1, max_phon=100.0, decimals=4):
+    """
+    기준 등라우드니스 곡선을 폰 축으로 선형 보간한 연속 배열 생성
+
+    Args:
+        base_curves: {폰 레벨: ISO 주파수별 SPL 리스트} 딕셔너리
+        step: 폰 간격 (기본 0.1)
+        max_phon: 최대 폰 레벨 (0 ~ max_phon 범위 생성)
+        decimals: 반올림 자릿수
+
+    Returns:
+        (폰 레벨 수, ISO 주파수 수) float 배열 - 행 i는 i * step 폰 곡선
+    """
+    levels = np.array(sorted(base_curves.keys()), dtype=float)
+    level_curves = np.array([base_curves[level] for level in sorted(base_curves.keys())], dtype=float)
+
+    num_levels = int(round(max_phon / step)) + 1
+    phon_values = np.round(np.arange(num_levels) * step, 1)
+
+    # 보간 구간 찾기 (범위 밖은 양 끝 곡선 유지)
+    lower_index = np.clip(np.searchsorted(levels, phon_values, side='right') - 1, 0, len(levels) - 1)
+    upper_index = np.minimum(lower_index + 1, len(levels) - 1)
+    span = levels[upper_index] - levels[lower_index]
+    weight = np.divide(phon_values - levels[lower_index], span,
+                       out=np.zeros_like(phon_values), where=span > 0)
+    weight = np.clip(weight, 0.0, 1.0)[:, np.newaxis]
+
+    table = level_curves[lower_index] * (1 - weight) + level_curves[upper_index] * weight
+
+    # 반올림: np.round는 x.xxxx5 근처에서 파이썬 round()와 다를 수 있으므로
+    # 경계 근처 값만 파이썬 round()로 다시 계산하여 기존 결과와 동일하게 유지
+    rounded = np.round(table, decimals)
+    scaled = table * 10**decimals
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    rounded[near_tie] = [round(val, decimals) for val in table[near_tie].tolist()]
+
+    rounded.setflags(write=False)
+    return rounded
+
+
+class FineCurveView(Mapping):
+    """
+    보간 곡선 배열에 대한 {폰 레벨: 곡선} 딕셔너리 호환 뷰
+
+    키는 step 단위 폰 레벨 (예: 60.3), 값은 배열의 해당 행 (읽기 전용 뷰)입니다.
+    index()로 폰 레벨을 행 번호로 O(1) 변환할 수 있습니다.
+    """
+
+    def __init__(self, table, step=0.1):
+        self.table = table
+        self.step = step
+
+    def index(self, phon):
+        """폰 레벨을 배열 행 번호로 변환 (격자에 없으면 KeyError)"""
+        try:
+            row = int(round(float(phon) / self.step))
+        except (TypeError, ValueError):
+            raise KeyError(phon)
+        if row < 0 or row >= len(self.table) or abs(row * self.step - float(phon)) > 1e-9:
+            raise KeyError(phon)
+        return row
+
+    def indices(self, phons):
+        """폰 레벨 배열을 행 번호 배열로 변환 (격자에 없는 값이 있으면 KeyError)"""
+        phons = np.asarray(phons, dtype=float)
+        rows = np.round(phons / self.step).astype(int)
+        invalid = (rows < 0) | (rows >= len(self.table)) | (np.abs(rows * self.step - phons) > 1e-9)
+        if np.any(invalid):
+            raise KeyError(phons[invalid][0])
+        return rows
+
+    def __getitem__(self, phon):
+        return self.table[self.index(phon)]
+
+    def __contains__(self, phon):
+        try:
+            self.index(phon)
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        for row in range(len(self.table)):
+            yield round(row * self.step, 1)
+
+    def __len__(self):
+        return len(self.table)
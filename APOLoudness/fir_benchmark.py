@@ -0,0 +1,363 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import wave
+
+import numpy as np
+
+from bulk_fir_filter_generator import BulkFIRFilterGenerator
+from c_weighting_preamp import compute_recommended_preamp_map
+from loudness_curves import CACHE_DIR_ENV
+
+
+BENCHMARK_VERSION = 1
+
+# 고정 벤치마크 격자 (결과를 기준선과 비교할 수 있도록 크기를 바꾸지 않음)
+DESIGN_SETTINGS = [(1023, 'hann'), (4095, 'hann'), (4095, 'hamming'), (8191, 'hann')]
+GENERATE_TARGET_RANGE = (60.0, 64.5, 0.5)     # 10개
+GENERATE_REFERENCE_RANGE = (80.0, 82.0, 1.0)  # 3개 -> 30개 필터
+PREAMP_REFERENCE_PHONS = np.arange(80, 91, 1)
+PREAMP_TARGET_PHONS = np.round(np.arange(40.0, 90.0 + 0.01, 0.1), 1)
+
+# 새 인터프리터에서 모듈 import + 생성기 + 첫 필터 (get_filter)까지의 시간 측정 스크립트
+COLD_START_SCRIPT = """
+import json, sys, time, tracemalloc
+trace = sys.argv[1] == 'trace'
+if trace:
+    tracemalloc.start()
+start_time = time.perf_counter()
+from bulk_fir_filter_generator import BulkFIRFilterGenerator
+import_time = time.perf_counter()
+generator = BulkFIRFilterGenerator(fs=48000, numtaps=4095)
+init_time = time.perf_counter()
+generator.get_filter(60.0, 80.0)
+end_time = time.perf_counter()
+print(json.dumps({
+    'seconds': end_time - start_time,
+    'import_seconds': import_time - start_time,
+    'init_seconds': init_time - import_time,
+    'first_filter_seconds': end_time - init_time,
+    'scipy_imported': 'scipy' in sys.modules,
+    'peak_bytes': tracemalloc.get_traced_memory()[1] if trace else None,
+}))
+"""
+
+
+def save_filter_to_wav_per_sample(generator, coefficients, filename):
+    """이전 방식의 WAV 저장 (샘플별 struct.pack + writeframes) - 비교 기준용"""
+    max_val = np.max(np.abs(coefficients))
+    scaled_coeff = np.int16(coefficients / max_val * 32767 * 0.9)
+    with wave.open(filename, 'w') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(generator.fs)
+        for sample in scaled_coeff:
+            wav_file.writeframes(struct.pack('h', sample))
+
+
+def benchmark_wav_writer(generator=None, repeats=200):
+    """
+    WAV 저장 마이크로 벤치마크: 샘플별 저장 vs 일괄 저장
+
+    Returns:
+        {방식: 파일당 평균 시간(초)} 딕셔너리와 int16 출력 바이트 일치 여부
+    """
+    if generator is None:
+        generator = BulkFIRFilterGenerator(fs=48000, numtaps=4095)
+    fir_coeff, _ = generator.design_single_filter(60.0, 80.0)
+
+    writers = {
+        'per_sample_int16': lambda path: save_filter_to_wav_per_sample(generator, fir_coeff, path),
+        'bulk_int16': lambda path: generator.save_filter_to_wav(fir_coeff, path),
+        'bulk_float32': lambda path: generator.save_filter_to_wav(fir_coeff, path, sample_format="float32"),
+    }
+
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for name, writer in writers.items():
+            path = os.path.join(temp_dir, f"{name}.wav")
+            writer(path)  # 워밍업
+            start_time = time.perf_counter()
+            for _ in range(repeats):
+                writer(path)
+            results[name] = (time.perf_counter() - start_time) / repeats
+
+        with open(os.path.join(temp_dir, "per_sample_int16.wav"), 'rb') as f:
+            legacy_bytes = f.read()
+        with open(os.path.join(temp_dir, "bulk_int16.wav"), 'rb') as f:
+            bulk_bytes = f.read()
+
+    return results, legacy_bytes == bulk_bytes
+
+
+def _measure(func, repeats=1, warmup=1):
+    """
+    함수 실행 시간 (호출당 초)과 최대 메모리 (tracemalloc) 측정
+
+    tracemalloc 오버헤드가 시간에 섞이지 않도록 시간 측정과 메모리 측정을 따로 실행합니다.
+    """
+    for _ in range(warmup):
+        func()
+
+    start_time = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    seconds = (time.perf_counter() - start_time) / repeats
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {'seconds_per_call': seconds, 'calls': repeats, 'peak_memory_mb': peak_bytes / 1e6}
+
+
+def _run_cold_start(cache_dir, trace=False):
+    """COLD_START_SCRIPT를 새 파이썬 프로세스에서 실행 (캐시 디렉토리 지정)"""
+    env = dict(os.environ)
+    env[CACHE_DIR_ENV] = cache_dir
+    output = subprocess.run([sys.executable, "-c", COLD_START_SCRIPT, "trace" if trace else "time"],
+                            cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _measure_cold_start(repeats, warm_cache):
+    """
+    import + 첫 필터 지연 시간 (프로세스 시작 시간 제외)
+
+    warm_cache=True이면 미리 채운 캐시 디렉토리, False이면 실행마다 빈 캐시 디렉토리를 씁니다.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        def run(index, trace=False):
+            cache_dir = os.path.join(temp_dir, "warm" if warm_cache else f"cold{index}")
+            return _run_cold_start(cache_dir, trace)
+
+        run(-1)  # 워밍업 (캐시 채우기, 파일 시스템 캐시)
+        runs = [run(index) for index in range(repeats)]
+        peak_bytes = run(repeats, trace=True)['peak_bytes']
+
+    stage = {'seconds_per_call': float(np.mean([r['seconds'] for r in runs])), 'calls': repeats,
+             'peak_memory_mb': peak_bytes / 1e6}
+    for key in ('import_seconds', 'init_seconds', 'first_filter_seconds'):
+        stage[key] = float(np.mean([r[key] for r in runs]))
+    stage['scipy_imported'] = any(r['scipy_imported'] for r in runs)
+    return stage
+
+
+def _directory_bytes(path):
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+def run_benchmarks(repeats=3, stages=None):
+    """
+    필터 생성 / 프리앰프 파이프라인 벤치마크
+
+    Args:
+        repeats: 단계별 반복 횟수 (가벼운 단계는 이 값의 배수로 반복)
+        stages: 실행할 단계 이름 접두어 리스트 (None이면 전체)
+
+    Returns:
+        단계별 결과가 들어 있는 JSON 직렬화 가능한 딕셔너리
+    """
+    def enabled(name):
+        return stages is None or any(name.startswith(prefix) for prefix in stages)
+
+    quiet = contextlib.redirect_stdout(io.StringIO())
+    with quiet:
+        generator = BulkFIRFilterGenerator(fs=48000, numtaps=4095)
+
+    results = {}
+
+    # 0. import + 첫 필터 (새 프로세스, 캐시 없음 / 캐시 있음)
+    for name, warm_cache in (('cold_start[no_cache]', False), ('cold_start[cached]', True)):
+        if enabled(name):
+            results[name] = _measure_cold_start(repeats, warm_cache)
+
+    # 1. 곡선 보간
+    if enabled('setup_interpolated_curves'):
+        with contextlib.redirect_stdout(io.StringIO()):
+            results['setup_interpolated_curves'] = _measure(generator.setup_interpolated_curves, repeats)
+
+    # 2. 단일 필터 설계 (탭 수 / 윈도우별)
+    for numtaps, window in DESIGN_SETTINGS:
+        name = f"design_single_filter[{numtaps},{window}]"
+        if not enabled(name):
+            continue
+        with contextlib.redirect_stdout(io.StringIO()):
+            design_generator = BulkFIRFilterGenerator(fs=48000, numtaps=numtaps)
+        stage = _measure(lambda: design_generator.design_single_filter(60.0, 80.0, window=window), repeats * 5)
+        stage['filters_per_second'] = 1.0 / stage['seconds_per_call']
+        results[name] = stage
+
+    # 3. 배치 설계
+    if enabled('design_filter_batch'):
+        batch_pairs = [(target, 80.0) for target in np.round(np.arange(40.0, 65.6, 0.1), 1)]
+        stage = _measure(lambda: generator.design_filter_batch(batch_pairs), repeats)
+        stage['filters_per_second'] = len(batch_pairs) / stage['seconds_per_call']
+        results['design_filter_batch[256]'] = stage
+
+    # 4. WAV 저장
+    fir_coeff, _ = generator.design_single_filter(60.0, 80.0)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for sample_format in ("int16", "float32"):
+            name = f"save_filter_to_wav[{sample_format}]"
+            if not enabled(name):
+                continue
+            path = os.path.join(temp_dir, f"{sample_format}.wav")
+            stage = _measure(lambda: generator.save_filter_to_wav(fir_coeff, path, sample_format=sample_format),
+                             repeats * 50)
+            stage['filters_per_second'] = 1.0 / stage['seconds_per_call']
+            stage['mb_per_second'] = os.path.getsize(path) / 1e6 / stage['seconds_per_call']
+            results[name] = stage
+
+    # 5. 고정 격자 일괄 생성 (설계 + WAV + 메타데이터)
+    if enabled('generate_filter_range'):
+        output_root = tempfile.mkdtemp()
+        run_counter = iter(range(1000000))
+
+        def generate():
+            output_dir = os.path.join(output_root, f"run{next(run_counter)}")
+            with contextlib.redirect_stdout(io.StringIO()):
+                generator.generate_filter_range(GENERATE_TARGET_RANGE, GENERATE_REFERENCE_RANGE,
+                                                output_dir=output_dir)
+            return output_dir
+
+        try:
+            stage = _measure(generate, repeats)
+            output_dir = generate()
+            filter_count = sum(1 for name in os.listdir(output_dir) if name.endswith('.wav'))
+            stage['filters'] = filter_count
+            stage['filters_per_second'] = filter_count / stage['seconds_per_call']
+            stage['mb_per_second'] = _directory_bytes(output_dir) / 1e6 / stage['seconds_per_call']
+            results['generate_filter_range'] = stage
+        finally:
+            shutil.rmtree(output_root, ignore_errors=True)
+
+    # 6. 추천 프리앰프 맵 (C-weighting SPL 스크립트와 같은 계산)
+    if enabled('preamp_map'):
+        stage = _measure(lambda: compute_recommended_preamp_map(
+            PREAMP_REFERENCE_PHONS, PREAMP_TARGET_PHONS, generator.iso_freq, generator.fine_curves), repeats)
+        pair_count = len(PREAMP_REFERENCE_PHONS) * len(PREAMP_TARGET_PHONS)
+        stage['pairs'] = pair_count
+        stage['pairs_per_second'] = pair_count / stage['seconds_per_call']
+        results['preamp_map'] = stage
+
+    return {
+        'benchmark_version': BENCHMARK_VERSION,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'repeats': repeats,
+        'stages': results,
+    }
+
+
+def compare_with_baseline(report, baseline, tolerance=0.10):
+    """
+    기준선 대비 단계별 시간 비교
+
+    Returns:
+        [(단계, 기준 초, 현재 초, 비율, 회귀 여부)] 리스트 (기준선에 없는 단계는 제외)
+    """
+    comparisons = []
+    for name, stage in report['stages'].items():
+        baseline_stage = baseline.get('stages', {}).get(name)
+        if baseline_stage is None:
+            continue
+        ratio = stage['seconds_per_call'] / baseline_stage['seconds_per_call']
+        comparisons.append((name, baseline_stage['seconds_per_call'], stage['seconds_per_call'],
+                            ratio, ratio > 1.0 + tolerance))
+    return comparisons
+
+
+def print_report(report, comparisons=None):
+    print(f"\n=== 벤치마크 결과 (반복 {report['repeats']}회) ===")
+    for name, stage in report['stages'].items():
+        throughput = ""
+        if 'filters_per_second' in stage:
+            throughput += f" | {stage['filters_per_second']:10.1f} 필터/s"
+        if 'pairs_per_second' in stage:
+            throughput += f" | {stage['pairs_per_second']:10.0f} 쌍/s"
+        if 'mb_per_second' in stage:
+            throughput += f" | {stage['mb_per_second']:8.1f} MB/s"
+        if 'first_filter_seconds' in stage:
+            throughput += (f" | import {stage['import_seconds'] * 1000:.1f} ms + 첫 필터 "
+                           f"{stage['first_filter_seconds'] * 1000:.1f} ms"
+                           f"{' (scipy 로드)' if stage['scipy_imported'] else ''}")
+        print(f"{name:>34}: {stage['seconds_per_call'] * 1000:10.3f} ms"
+              f" | 최대 메모리 {stage['peak_memory_mb']:8.2f} MB{throughput}")
+
+    if comparisons:
+        print("\n=== 기준선 비교 ===")
+        for name, baseline_seconds, seconds, ratio, regressed in comparisons:
+            marker = "  <-- 회귀" if regressed else ""
+            print(f"{name:>34}: {baseline_seconds * 1000:10.3f} ms -> {seconds * 1000:10.3f} ms (x{ratio:.2f}){marker}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="필터 생성 / 프리앰프 파이프라인 벤치마크")
+    parser.add_argument("--repeats", type=int, default=3, help="단계별 반복 횟수")
+    parser.add_argument("--stage", action="append", help="실행할 단계 이름 접두어 (여러 번 지정 가능)")
+    parser.add_argument("--output", help="결과 JSON 파일")
+    parser.add_argument("--baseline", help="비교할 기준선 JSON 파일")
+    parser.add_argument("--save-baseline", help="결과를 기준선 JSON으로 저장")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="회귀로 판단할 시간 증가 비율")
+    parser.add_argument("--wav-writers", action="store_true",
+                        help="WAV 저장 방식 비교 (샘플별 저장 vs 일괄 저장)만 실행")
+    args = parser.parse_args()
+
+    if args.wav_writers:
+        results, identical = benchmark_wav_writer()
+        print("\n=== WAV 저장 마이크로 벤치마크 (4095 탭) ===")
+        baseline = results['per_sample_int16']
+        for name, seconds in results.items():
+            print(f"{name:>18}: {seconds * 1000:8.3f} ms/파일 (x{baseline / seconds:.1f})")
+        print(f"int16 출력 바이트 일치: {identical}")
+        return 0
+
+    report = run_benchmarks(repeats=args.repeats, stages=args.stage)
+
+    comparisons = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            comparisons = compare_with_baseline(report, json.load(f), args.tolerance)
+        report['baseline'] = {
+            'file': args.baseline,
+            'tolerance': args.tolerance,
+            'comparisons': [{'stage': name, 'baseline_seconds': baseline_seconds, 'seconds': seconds,
+                             'ratio': ratio, 'regressed': regressed}
+                            for name, baseline_seconds, seconds, ratio, regressed in comparisons],
+        }
+
+    print_report(report, comparisons)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            print(f"결과 저장: {path}")
+
+    if comparisons and any(regressed for *_, regressed in comparisons):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
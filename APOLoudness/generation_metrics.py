@@ -0,0 +1,162 @@
+import cProfile
+import io
+import json
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+METRICS_FILENAME = "filter_metrics.json"
+PROFILE_FILENAME = "filter_profile.prof"
+
+
+class GenerationMetrics:
+    """
+    필터 생성 단계별 타이머 / 카운터 (generate_filter_range의 metrics 옵션)
+
+    stage()로 측정한 시간은 전체 합계와 필터별 기록에 함께 더해집니다.
+    배치 엔진에서는 묶음 설계 시간이 묶음의 첫 필터에 기록됩니다.
+    """
+
+    def __init__(self, per_filter=True, profile=False, trace_memory=False, top_n=25):
+        """
+        Args:
+            per_filter: 필터별 단계 시간 기록 여부
+            profile: cProfile 프로파일 수집 (통계 파일은 메트릭 파일 옆에 저장)
+            trace_memory: tracemalloc 최대 메모리 / 상위 할당 위치 수집
+            top_n: 프로파일 / 메모리 스냅샷에 남길 상위 항목 수
+        """
+        self.per_filter = per_filter
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.top_n = top_n
+
+        self.stages = {}
+        self.counters = {}
+        self.filters = []
+        self.elapsed_seconds = 0.0
+        self.profile_stats = None
+        self.memory = None
+
+        self._current = {}
+        self._start_time = None
+        self._profiler = None
+        self._owns_tracemalloc = False
+
+    @contextmanager
+    def stage(self, name):
+        """단계 시간 측정"""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start_time)
+
+    def record(self, name, seconds, current=True):
+        """다른 곳 (기록 스레드 등)에서 측정한 단계 시간 추가 (current=False이면 전체 합계에만)"""
+        total = self.stages.setdefault(name, {'seconds': 0.0, 'calls': 0})
+        total['seconds'] += seconds
+        total['calls'] += 1
+        if self.per_filter and current:
+            self._current[name] = self._current.get(name, 0.0) + seconds
+
+    def take_current(self):
+        """현재 필터의 단계 시간을 꺼내고 초기화 (나중에 finish_filter(stage_seconds=...)로 마감)"""
+        current, self._current = self._current, {}
+        return current
+
+    def count(self, name, amount=1):
+        """카운터 증가"""
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def finish_filter(self, filename, stage_seconds=None, **extra):
+        """
+        현재까지 측정한 단계 시간을 필터 하나의 기록으로 마감
+
+        stage_seconds를 주면 현재 단계 시간 대신 사용합니다 (파이프라인 모드에서 제출 시점에 꺼내 둔 시간).
+        """
+        if self.per_filter:
+            record = {'filename': filename}
+            record.update(extra)
+            if stage_seconds is None:
+                stage_seconds = self._current
+            record.update({name: round(seconds, 6) for name, seconds in stage_seconds.items()})
+            self.filters.append(record)
+        if stage_seconds is None or stage_seconds is self._current:
+            self._current = {}
+
+    def start(self):
+        """전체 측정 시작 (프로파일러 / tracemalloc 포함, 이전 측정 결과는 초기화)"""
+        self.stages = {}
+        self.counters = {}
+        self.filters = []
+        self.profile_stats = None
+        self.memory = None
+        self._current = {}
+        self._start_time = time.perf_counter()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        if self.profile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def stop(self):
+        """전체 측정 종료 및 프로파일 / 메모리 스냅샷 정리"""
+        if self._start_time is not None:
+            self.elapsed_seconds = time.perf_counter() - self._start_time
+            self._start_time = None
+
+        if self._profiler is not None:
+            self._profiler.disable()
+            stream = io.StringIO()
+            pstats.Stats(self._profiler, stream=stream).sort_stats('cumulative').print_stats(self.top_n)
+            self.profile_stats = stream.getvalue()
+
+        if self.trace_memory and tracemalloc.is_tracing():
+            current_bytes, peak_bytes = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            self.memory = {
+                'current_mb': current_bytes / 1e6,
+                'peak_mb': peak_bytes / 1e6,
+                'top_allocations': [
+                    {'location': str(stat.traceback), 'size_mb': stat.size / 1e6, 'count': stat.count}
+                    for stat in snapshot.statistics('lineno')[:self.top_n]
+                ],
+            }
+            if self._owns_tracemalloc:
+                tracemalloc.stop()
+                self._owns_tracemalloc = False
+
+    def to_dict(self):
+        """JSON 직렬화용 딕셔너리"""
+        stages = {}
+        for name, total in self.stages.items():
+            stages[name] = {
+                'seconds': total['seconds'],
+                'calls': total['calls'],
+                'mean_ms': total['seconds'] / total['calls'] * 1000 if total['calls'] else 0.0,
+                'share': total['seconds'] / self.elapsed_seconds if self.elapsed_seconds else 0.0,
+            }
+        data = {
+            'elapsed_seconds': self.elapsed_seconds,
+            'stages': stages,
+            'counters': dict(self.counters),
+        }
+        if self.memory is not None:
+            data['memory'] = self.memory
+        if self.profile_stats is not None:
+            data['profile'] = self.profile_stats
+        if self.per_filter:
+            data['filters'] = self.filters
+        return data
+
+    def save(self, filename, profile_filename=None):
+        """메트릭 JSON 저장 (profile_filename이 있으면 cProfile 통계도 저장)"""
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+        if profile_filename and self._profiler is not None:
+            self._profiler.dump_stats(profile_filename)
@@ -0,0 +1,118 @@
+import hashlib
+import os
+
+import numpy as np
+
+from fine_curve_table import build_fine_curve_table, FineCurveView
+
+
+# 미리 계산한 배열 캐시 형식이 바뀌면 올려서 기존 캐시 파일을 무시하도록 함
+CACHE_VERSION = 1
+
+# 캐시 디렉토리 환경 변수 (빈 문자열이면 캐시 사용 안 함)
+CACHE_DIR_ENV = "APOLOUDNESS_CACHE_DIR"
+
+# ISO 226 등라우드니스 곡선 데이터 (생성기와 SPL 스크립트 공용)
+ISO_FREQ = (20, 25, 31.5, 40, 50, 63, 80, 100, 125, 160, 200, 250, 315, 400, 500, 630, 800, 1000, 1250, 1600, 2000, 2500, 3150, 4000, 5000, 6300, 8000, 10000, 12500, 16000, 20000)
+
+ISO_CURVES = {
+    0: [76.5517, 65.6189, 55.1228, 45.5340, 37.6321, 30.8650, 25.0238, 20.5100, 16.6458, 13.1160, 10.0883, 7.5436, 5.1137, 3.0589, 1.4824, 0.3029, -0.3026, -0.0103, 1.0335, -1.1863, -4.1116, -7.0462, -9.0260, -8.4944, -4.4829, 3.2817, 9.8291, 10.4757, 8.3813, 14.1000, 79.6500],
+    10: [83.7500, 75.7579, 68.2089, 61.1365, 54.9638, 49.0098, 43.2377, 38.1338, 33.4772, 28.7734, 24.8417, 21.3272, 18.0522, 15.1379, 12.9768, 11.1791, 9.9918, 9.9996, 11.2621, 10.4291, 7.2744, 4.4508, 3.0404, 3.7961, 7.4583, 14.3483, 20.9841, 23.4306, 22.3269, 25.1700, 81.4700],
+    20: [89.5781, 82.6513, 75.9764, 69.6171, 64.0178, 58.5520, 53.1898, 48.3809, 43.9414, 39.3702, 35.5126, 31.9922, 28.6866, 25.6703, 23.4263, 21.4825, 20.1011, 20.0052, 21.4618, 21.4013, 18.1515, 15.3844, 14.2559, 15.1415, 18.6349, 25.0196, 31.5227, 34.4256, 33.0444, 34.6700, 84.1800],
+    40: [99.8539, 93.9444, 88.1659, 82.6287, 77.7849, 73.0825, 68.4779, 64.3711, 60.5855, 56.7022, 53.4087, 50.3992, 47.5775, 44.9766, 43.0507, 41.3392, 40.0618, 40.0100, 41.8195, 42.5076, 39.2296, 36.5090, 35.6089, 36.6492, 40.0077, 45.8283, 51.7968, 54.2841, 51.4859, 51.9600, 92.7700],
+    60: [109.5113, 104.2279, 99.0779, 94.1773, 89.9635, 85.9434, 82.0534, 78.6546, 75.5635, 72.4743, 69.8643, 67.5348, 65.3917, 63.4510, 62.0512, 60.8150, 59.8867, 60.0116, 62.1549, 63.1894, 59.9616, 57.2552, 56.4239, 57.5699, 60.8882, 66.3613, 71.6640, 73.1551, 68.6308, 68.4300, 104.9200],
+    80: [118.9900, 114.2326, 109.6457, 105.3367, 101.7214, 98.3618, 95.1729, 92.4797, 90.0892, 87.8162, 85.9166, 84.3080, 82.8934, 81.6786, 80.8634, 80.1736, 79.6691, 80.0121, 82.4834, 83.7408, 80.5867, 77.8847, 77.0748, 78.3124, 81.6182, 86.8087, 91.4062, 91.7361, 85.4068, 84.6700, 118.9500],
+    100: [128.4100, 124.1500, 120.1100, 116.3800, 113.3500, 110.6500, 108.1600, 106.1700, 104.4800, 103.0300, 101.8500, 100.9700, 100.300, 99.8300, 99.6200, 99.500, 99.4400, 100.0100, 102.8100, 104.2500, 101.1800, 98.4800, 97.6700, 99.00, 102.300, 107.2300, 111.1100, 110.2300, 102.0700, 100.8300, 133.7300]
+}
+
+# 1차 보간으로 만드는 중간 폰 레벨 (위아래 10 폰 곡선의 평균)
+MIDPOINT_PHONS = (30, 50, 70, 90)
+
+
+def primary_curves(iso_curves=None):
+    """ISO 곡선에 중간 폰 레벨 (30, 50, 70, 90)을 더한 {폰: 곡선} 딕셔너리"""
+    iso_curves = ISO_CURVES if iso_curves is None else iso_curves
+    curves = dict(iso_curves)
+    for phon_level in MIDPOINT_PHONS:
+        lower_phon = phon_level - 10
+        upper_phon = phon_level + 10
+        if lower_phon in iso_curves and upper_phon in iso_curves:
+            weight = 0.5
+            lower_curve = np.array(iso_curves[lower_phon])
+            upper_curve = np.array(iso_curves[upper_phon])
+            curves[phon_level] = (lower_curve * (1 - weight) + upper_curve * weight).tolist()
+    return curves
+
+
+def cache_directory():
+    """
+    미리 계산한 배열을 저장할 디렉토리 (None이면 캐시 사용 안 함)
+
+    APOLOUDNESS_CACHE_DIR 환경 변수, 없으면 ~/.cache/apoloudness (XDG_CACHE_HOME 우선)
+    """
+    directory = os.environ.get(CACHE_DIR_ENV)
+    if directory is None:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        directory = os.path.join(base, "apoloudness")
+    return directory or None
+
+
+def cached_array(name, key, build, use_cache=True):
+    """
+    캐시 디렉토리의 .npy 파일에서 배열을 읽고, 없으면 build()로 만들어 저장
+
+    파일명은 name과 (CACHE_VERSION, key)의 해시이므로 입력이 바뀌면 다른 파일을 씁니다.
+    캐시 디렉토리를 쓸 수 없거나 파일이 손상되었으면 조용히 build() 결과를 그대로 반환합니다.
+
+    Returns:
+        읽기 전용 배열
+    """
+    directory = cache_directory() if use_cache else None
+    filename = None
+    if directory is not None:
+        digest = hashlib.sha256(repr((CACHE_VERSION, key)).encode('utf-8')).hexdigest()[:16]
+        filename = os.path.join(directory, f"{name}-{digest}.npy")
+        try:
+            array = np.load(filename, allow_pickle=False)
+            array.setflags(write=False)
+            return array
+        except (OSError, ValueError):
+            pass
+
+    array = np.array(build())
+    if filename is not None:
+        temp_filename = f"{filename}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with open(temp_filename, 'wb') as f:
+                np.save(f, array, allow_pickle=False)
+            os.replace(temp_filename, filename)
+        except OSError:
+            if os.path.exists(temp_filename):
+                os.remove(temp_filename)
+    array.setflags(write=False)
+    return array
+
+
+def fine_curve_table(iso_curves=None, step=0.1, max_phon=100.0, use_cache=True):
+    """
+    (폰 레벨 수, ISO 주파수 수) 보간 곡선 배열 (build_fine_curve_table 결과, 캐시 사용)
+    """
+    curves = primary_curves(iso_curves)
+    key = (sorted((level, list(curve)) for level, curve in curves.items()), step, max_phon)
+    return cached_array("fine_curves", key, lambda: build_fine_curve_table(curves, step=step, max_phon=max_phon),
+                        use_cache)
+
+
+def fine_curve_view(iso_curves=None, step=0.1, max_phon=100.0, use_cache=True):
+    """fine_curve_table의 {폰: 곡선} 딕셔너리 호환 뷰"""
+    return FineCurveView(fine_curve_table(iso_curves, step, max_phon, use_cache), step=step)
+
+
+def window_array(window, numtaps, use_cache=True):
+    """signal.get_window(window, numtaps, fftbins=False) (캐시에 있으면 scipy를 불러오지 않음)"""
+    def build():
+        from scipy import signal
+        return signal.get_window(window, numtaps, fftbins=False)
+
+    return cached_array("window", (window, int(numtaps)), build, use_cache)
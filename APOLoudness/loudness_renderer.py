@@ -0,0 +1,335 @@
+import argparse
+import csv
+import os
+import time
+import wave
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from filter_bank import FilterBank, phon_key
+
+
+class PartitionedConvolver:
+    """
+    균일 분할 overlap-save 컨볼루션 (다채널)
+
+    필터를 block_size 길이 구간으로 나눠 2 x block_size FFT 스펙트럼으로 준비하고,
+    입력 블록 스펙트럼의 주파수 영역 지연선(FDL)과 곱해 더합니다.
+    FDL은 필터와 무관하므로 크로스페이드 중에는 두 필터가 같은 FDL을 공유합니다.
+    """
+
+    def __init__(self, block_size, num_partitions, channels):
+        self.block_size = block_size
+        self.num_partitions = num_partitions
+        self.channels = channels
+        self.fft_size = 2 * block_size
+        self._input = np.zeros((channels, self.fft_size))
+        self._fdl = np.zeros((num_partitions, channels, block_size + 1), dtype=np.complex128)
+        self._head = 0
+
+    def partition(self, coefficients, gain=1.0):
+        """필터 계수를 (num_partitions, block_size + 1) 구간 스펙트럼으로 변환 (gain 포함)"""
+        padded = np.zeros(self.num_partitions * self.block_size)
+        padded[:len(coefficients)] = np.asarray(coefficients, dtype=np.float64) * gain
+        segments = padded.reshape(self.num_partitions, self.block_size)
+        return np.fft.rfft(segments, n=self.fft_size, axis=1)
+
+    def push(self, block):
+        """입력 블록 (channels, block_size)을 FDL에 추가"""
+        self._input[:, :self.block_size] = self._input[:, self.block_size:]
+        self._input[:, self.block_size:] = block
+        self._head = (self._head + 1) % self.num_partitions
+        self._fdl[self._head] = np.fft.rfft(self._input, axis=1)
+
+    def convolve(self, partitions):
+        """현재 FDL과 필터 구간 스펙트럼으로 출력 블록 (channels, block_size) 계산"""
+        order = (self._head - np.arange(self.num_partitions)) % self.num_partitions
+        spectrum = np.einsum('pcf,pf->cf', self._fdl[order], partitions)
+        return np.fft.irfft(spectrum, n=self.fft_size, axis=1)[:, self.block_size:]
+
+
+def load_schedule(filename):
+    """
+    폰 스케줄 CSV 읽기: 줄마다 "초,타겟 폰[,참조 폰]" (# 주석 허용)
+
+    Returns:
+        시간순 (초, 타겟 폰, 참조 폰 또는 None) 리스트
+    """
+    schedule = []
+    with open(filename, 'r', encoding='utf-8') as f:
+        for row in csv.reader(f):
+            if not row or row[0].strip().startswith('#'):
+                continue
+            seconds, target_phon = float(row[0]), float(row[1])
+            reference_phon = float(row[2]) if len(row) > 2 and row[2].strip() else None
+            schedule.append((seconds, target_phon, reference_phon))
+    return sorted(schedule)
+
+
+class LoudnessRenderer:
+    """
+    오프라인 라우드니스 보상 렌더러
+
+    WAV 파일을 블록 단위로 읽어 분할 컨볼루션으로 필터링하고, 프리앰프를 적용해 16비트 WAV로 기록합니다.
+    메모리 사용량은 파일 길이와 무관합니다 (블록 버퍼, FDL, 최근 필터 캐시만 유지).
+    출력은 필터 지연 (latency)만큼 앞당겨 입력과 정렬하고, 입력이 끝나면 0 블록으로 필터 꼬리를 모두 내보냅니다.
+    """
+
+    def __init__(self, filter_provider, fs, numtaps, preamp_lookup=None, block_size=1024,
+                 crossfade_ms=50.0, cache_size=16, latency=None, phase='linear'):
+        """
+        Args:
+            filter_provider: (target_phon, reference_phon) -> FIR 계수 (1kHz 0dB 정규화)
+            fs: 필터 샘플링 주파수 (입력 WAV와 같아야 함)
+            numtaps: 최대 필터 길이
+            preamp_lookup: (target_phon, reference_phon) -> 프리앰프 dB (None이면 0dB)
+            block_size: 처리 블록 길이 (지연 / 분할 크기)
+            crossfade_ms: 필터 전환 크로스페이드 길이
+            cache_size: 구간 스펙트럼으로 준비해 둘 최근 필터 수
+            latency: 출력에서 앞당길 필터 지연 샘플 수 (None이면 phase에 따라 선형 위상 군지연
+                     (numtaps - 1) // 2 또는 최소 위상 0)
+            phase: 필터 위상 ("linear" 또는 "minimum", latency 기본값 결정)
+        """
+        self.filter_provider = filter_provider
+        self.fs = fs
+        self.numtaps = numtaps
+        self.preamp_lookup = preamp_lookup
+        self.block_size = block_size
+        self.num_partitions = -(-numtaps // block_size)
+        self.crossfade_samples = max(1, int(round(crossfade_ms / 1000.0 * fs)))
+        self.cache_size = cache_size
+        self.phase = phase
+        if latency is None:
+            latency = 0 if phase == 'minimum' else (numtaps - 1) // 2
+        self.latency = latency
+        self._partition_cache = OrderedDict()
+
+    def _filter_partitions(self, convolver, key):
+        """(타겟 x 10, 참조 x 10) 키의 구간 스펙트럼 (프리앰프 포함, LRU 캐시)"""
+        if key in self._partition_cache:
+            self._partition_cache.move_to_end(key)
+            return self._partition_cache[key]
+
+        target_phon, reference_phon = key[0] / 10.0, key[1] / 10.0
+        preamp_db = self.preamp_lookup(target_phon, reference_phon) if self.preamp_lookup else 0.0
+        partitions = convolver.partition(self.filter_provider(target_phon, reference_phon),
+                                         gain=10**(preamp_db / 20.0))
+        self._partition_cache[key] = partitions
+        if len(self._partition_cache) > self.cache_size:
+            self._partition_cache.popitem(last=False)
+        return partitions
+
+    @staticmethod
+    def _scheduled_key(schedule, seconds, default_reference):
+        """시간 seconds에 적용할 (타겟 x 10, 참조 x 10) 키 (스케줄의 마지막 지난 항목)"""
+        current = schedule[0]
+        for entry in schedule:
+            if entry[0] > seconds:
+                break
+            current = entry
+        reference_phon = current[2] if current[2] is not None else default_reference
+        return phon_key(current[1]), phon_key(reference_phon)
+
+    def render(self, input_path, output_path, schedule, reference_phon=80.0):
+        """
+        WAV 파일 렌더링
+
+        Args:
+            schedule: (초, 타겟 폰, 참조 폰 또는 None) 리스트 또는 고정 (타겟 폰, 참조 폰) 튜플
+            reference_phon: 스케줄에 참조 폰이 없을 때 사용할 값
+
+        Returns:
+            렌더링 통계 딕셔너리
+        """
+        if isinstance(schedule, tuple):
+            schedule = [(0.0, schedule[0], schedule[1])]
+        if not schedule:
+            raise ValueError("폰 스케줄이 비어 있습니다.")
+
+        start_time = time.perf_counter()
+        block_size = self.block_size
+        tail_samples = self.numtaps - 1
+        frames_done = 0    # 읽은 입력 프레임
+        position = 0       # 현재 블록 첫 샘플의 컨볼루션 출력 위치
+        frames_written = 0
+        switches = 0
+        clipped_samples = 0
+        peak = 0.0
+
+        with wave.open(input_path, 'rb') as reader:
+            if reader.getsampwidth() != 2:
+                raise ValueError(f"16비트 PCM WAV만 지원합니다: {input_path}")
+            if reader.getframerate() != self.fs:
+                raise ValueError(f"샘플링 주파수 불일치: {reader.getframerate()} != {self.fs}")
+            channels = reader.getnchannels()
+            total_frames = reader.getnframes()
+
+            convolver = PartitionedConvolver(block_size, self.num_partitions, channels)
+            current_key = None
+            previous_key = None
+            fade_position = 0
+            input_done = total_frames == 0
+
+            with wave.open(output_path, 'wb') as writer:
+                writer.setnchannels(channels)
+                writer.setsampwidth(2)
+                writer.setframerate(self.fs)
+
+                while True:
+                    block = np.zeros((channels, block_size))
+                    if not input_done:
+                        frames = reader.readframes(block_size)
+                        samples = np.frombuffer(frames, dtype='<i2').reshape(-1, channels)
+                        block[:, :len(samples)] = samples.T / 32768.0
+                        frames_done += len(samples)
+                        # 헤더보다 짧게 잘린 파일은 읽기가 비는 시점에서 끝
+                        input_done = len(samples) == 0 or frames_done >= total_frames
+                    # 입력이 끝난 뒤에는 0 블록으로 필터 꼬리 (numtaps - 1 샘플)를 내보냄
+                    end = frames_done + tail_samples if frames_done else 0
+                    if input_done and position >= end:
+                        break
+                    convolver.push(block)
+
+                    # 크로스페이드 중에는 전환을 미루고, 페이드가 끝난 뒤 최신 스케줄 키로 다시 전환 (클릭 방지)
+                    key = self._scheduled_key(schedule, position / self.fs, reference_phon)
+                    if key != current_key and previous_key is None:
+                        if current_key is not None:
+                            previous_key = current_key
+                            fade_position = 0
+                            switches += 1
+                        current_key = key
+
+                    output = convolver.convolve(self._filter_partitions(convolver, current_key))
+                    if previous_key is not None:
+                        ramp = np.clip((fade_position + np.arange(block_size)) / self.crossfade_samples, 0.0, 1.0)
+                        previous_output = convolver.convolve(self._filter_partitions(convolver, previous_key))
+                        output = previous_output * (1.0 - ramp) + output * ramp
+                        fade_position += block_size
+                        if fade_position >= self.crossfade_samples:
+                            previous_key = None
+
+                    # 지연 보상: 출력 위치 latency 이전 샘플은 버림
+                    first = min(max(self.latency - position, 0), block_size)
+                    last = min(block_size, end - position) if input_done else block_size
+                    position += block_size
+                    if last <= first:
+                        continue
+                    output = output[:, first:last]
+                    peak = max(peak, float(np.max(np.abs(output))))
+                    scaled = np.round(output.T * 32768.0)
+                    clipped_samples += int(np.count_nonzero((scaled > 32767) | (scaled < -32768)))
+                    writer.writeframes(np.clip(scaled, -32768, 32767).astype('<i2').tobytes())
+                    frames_written += last - first
+
+        elapsed = time.perf_counter() - start_time
+        audio_seconds = frames_done / self.fs
+        return {
+            'input': input_path,
+            'output': output_path,
+            'frames': frames_done,
+            'output_frames': frames_written,
+            'latency_samples': self.latency,
+            'tail_samples': max(frames_written - frames_done, 0),
+            'channels': channels,
+            'audio_seconds': audio_seconds,
+            'elapsed_seconds': elapsed,
+            'realtime_factor': audio_seconds / elapsed if elapsed > 0 else float('inf'),
+            'filter_switches': switches,
+            'peak_dbfs': float(20 * np.log10(peak)) if peak > 0 else float('-inf'),
+            'clipped_samples': clipped_samples,
+        }
+
+def make_renderer(bank_filename=None, preamp_table_filename=None, fs=48000, numtaps=4095, phase=None, **options):
+    """
+    필터 뱅크 (없으면 BulkFIRFilterGenerator.get_filter 즉석 설계)와 프리앰프 테이블로 렌더러 생성
+
+    경로만 받으므로 배치 모드의 워커 프로세스에서 그대로 호출할 수 있습니다.
+    뱅크의 위상은 뱅크 헤더에서 읽고, 즉석 설계는 phase (None이면 "linear")로 설계합니다.
+    """
+    if bank_filename:
+        bank = FilterBank(bank_filename)
+        if phase is not None and phase != bank.phase:
+            raise ValueError(f"필터 뱅크 위상 불일치: {bank.phase} != {phase}")
+        filter_provider, fs, numtaps, phase = bank.get, bank.fs, bank.numtaps, bank.phase
+    else:
+        from bulk_fir_filter_generator import BulkFIRFilterGenerator
+        generator = BulkFIRFilterGenerator(fs=fs, numtaps=numtaps)
+        phase = phase or 'linear'
+        filter_provider = partial(generator.get_filter, phase=phase)
+        numtaps = generator.numtaps
+
+    preamp_lookup = None
+    if preamp_table_filename:
+        from preamp_codegen import load_binary
+        preamp_lookup = load_binary(preamp_table_filename).lookup
+
+    return LoudnessRenderer(filter_provider, fs, numtaps, preamp_lookup=preamp_lookup, phase=phase, **options)
+
+
+def _render_job(job):
+    """배치 모드 워커: (입력, 출력, 스케줄, 참조 폰, 렌더러 옵션)"""
+    input_path, output_path, schedule, reference_phon, renderer_options = job
+    renderer = make_renderer(**renderer_options)
+    return renderer.render(input_path, output_path, schedule, reference_phon=reference_phon)
+
+
+def render_files(input_paths, output_dir, schedule, reference_phon=80.0, workers=None, **renderer_options):
+    """
+    여러 WAV 파일을 프로세스 풀에서 렌더링 (workers가 None이면 CPU 코어 수)
+
+    Returns:
+        파일별 렌더링 통계 리스트 (입력 순서)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = [(input_path, os.path.join(output_dir, os.path.basename(input_path)), schedule,
+             reference_phon, renderer_options) for input_path in input_paths]
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(jobs) <= 1:
+        return [_render_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+        return list(executor.map(_render_job, jobs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="오프라인 라우드니스 보상 렌더러 (분할 컨볼루션)")
+    parser.add_argument("inputs", nargs="+", help="입력 16비트 WAV 파일")
+    parser.add_argument("--output", help="출력 WAV 파일 (입력이 하나일 때)")
+    parser.add_argument("--output-dir", default="rendered", help="출력 디렉토리 (입력이 여러 개일 때)")
+    parser.add_argument("--bank", help="필터 뱅크 파일 (생략 시 필터를 즉석 설계)")
+    parser.add_argument("--preamp-table", help="preamp_codegen.py 바이너리 프리앰프 테이블")
+    parser.add_argument("--target", type=float, default=60.0, help="고정 타겟 폰")
+    parser.add_argument("--reference", type=float, default=80.0, help="참조 폰")
+    parser.add_argument("--schedule", help="폰 스케줄 CSV (초,타겟 폰[,참조 폰])")
+    parser.add_argument("--block-size", type=int, default=1024)
+    parser.add_argument("--crossfade-ms", type=float, default=50.0)
+    parser.add_argument("--phase", choices=("linear", "minimum"),
+                        help="즉석 설계 필터 위상 (기본: linear, --bank는 뱅크 헤더의 위상 사용)")
+    parser.add_argument("--latency", type=int,
+                        help="보상할 필터 지연 샘플 수 (기본: 선형 위상 (numtaps - 1) // 2, 최소 위상은 0)")
+    parser.add_argument("--workers", type=int, help="배치 모드 프로세스 수 (기본: CPU 코어 수)")
+    args = parser.parse_args()
+
+    schedule = load_schedule(args.schedule) if args.schedule else [(0.0, args.target, args.reference)]
+    renderer_options = {'bank_filename': args.bank, 'preamp_table_filename': args.preamp_table,
+                        'block_size': args.block_size, 'crossfade_ms': args.crossfade_ms,
+                        'latency': args.latency, 'phase': args.phase}
+
+    if args.output and len(args.inputs) == 1:
+        results = [_render_job((args.inputs[0], args.output, schedule, args.reference, renderer_options))]
+    else:
+        results = render_files(args.inputs, args.output_dir, schedule, args.reference,
+                               workers=args.workers, **renderer_options)
+
+    for result in results:
+        print(f"{result['input']} -> {result['output']}: {result['audio_seconds']:.1f}초 오디오, "
+              f"{result['elapsed_seconds']:.2f}초 (실시간 x{result['realtime_factor']:.0f}), "
+              f"지연 보상 {result['latency_samples']}샘플, 꼬리 {result['tail_samples']}샘플, "
+              f"필터 전환 {result['filter_switches']}회, 최대 {result['peak_dbfs']:.2f} dBFS, "
+              f"클리핑 {result['clipped_samples']}샘플")
+
+
+if __name__ == "__main__":
+    main()
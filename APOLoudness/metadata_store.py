@@ -0,0 +1,258 @@
+import argparse
+import json
+import os
+import sqlite3
+
+from filter_bank import phon_key
+
+
+METADATA_JSONL_FILENAME = "filter_metadata.jsonl"
+METADATA_DB_FILENAME = "filter_metadata.sqlite"
+METADATA_JSON_FILENAME = "filter_metadata.json"
+
+# 범위 질의 / 정렬에 쓸 수 있는 열 (나머지 필드는 info JSON에만 있음)
+QUERY_COLUMNS = ('target_phon', 'reference_phon', 'max_boost_db', 'max_cut_db', 'filter_length')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS generation_info (id INTEGER PRIMARY KEY CHECK (id = 0), info TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS filters (
+    target_x10 INTEGER NOT NULL,
+    reference_x10 INTEGER NOT NULL,
+    grid_index INTEGER,
+    filename TEXT,
+    target_phon REAL,
+    reference_phon REAL,
+    max_boost_db REAL,
+    max_cut_db REAL,
+    filter_length INTEGER,
+    info TEXT NOT NULL,
+    PRIMARY KEY (target_x10, reference_x10)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS filters_max_boost ON filters (max_boost_db);
+CREATE INDEX IF NOT EXISTS filters_max_cut ON filters (max_cut_db);
+CREATE INDEX IF NOT EXISTS filters_grid ON filters (grid_index);
+"""
+
+
+class MetadataStore:
+    """
+    필터 메타데이터 스트리밍 저장소
+
+    필터 정보는 생성되는 즉시 두 곳에 기록됩니다.
+      - filter_metadata.jsonl: 추가 전용 줄 형식 (첫 줄 generation_info, 이후 필터당 한 줄, 매번 flush)
+      - filter_metadata.sqlite: (타겟 x 10, 참조 x 10) 기본 키 조회와 max_boost_db 등 범위 질의용 색인
+    SQLite는 commit_every개마다 커밋하며, 강제 종료로 색인이 뒤처지면 rebuild_index()로 JSONL에서 다시 만듭니다.
+    filter_metadata.json은 export_json()으로 내보냅니다 (격자 순서, 기존 형식과 동일).
+    """
+
+    def __init__(self, directory, reset=False, commit_every=256):
+        """
+        Args:
+            directory: 저장소 디렉토리 (보통 generate_filter_range의 output_dir)
+            reset: True이면 기존 JSONL / 색인을 비우고 새로 시작 (생성 실행마다)
+            commit_every: SQLite 커밋 간격 (필터 수)
+        """
+        self.directory = directory
+        self.jsonl_filename = os.path.join(directory, METADATA_JSONL_FILENAME)
+        self.db_filename = os.path.join(directory, METADATA_DB_FILENAME)
+        self.commit_every = commit_every
+        self._pending = 0
+        self._jsonl = None
+
+        os.makedirs(directory, exist_ok=True)
+        if reset:
+            for filename in (self.jsonl_filename, self.db_filename):
+                if os.path.exists(filename):
+                    os.remove(filename)
+        self._db = sqlite3.connect(self.db_filename)
+        self._db.executescript(_SCHEMA)
+
+    # --- 기록 ---
+    def _open_jsonl(self):
+        if self._jsonl is None:
+            self._jsonl = open(self.jsonl_filename, 'a', encoding='utf-8')
+        return self._jsonl
+
+    def set_generation_info(self, generation_info):
+        """생성 설정 기록 (JSONL에는 generation_info 줄로 추가)"""
+        line = json.dumps({'generation_info': generation_info}, ensure_ascii=False)
+        jsonl = self._open_jsonl()
+        jsonl.write(line + "\n")
+        jsonl.flush()
+        self._db.execute("INSERT OR REPLACE INTO generation_info (id, info) VALUES (0, ?)",
+                         (json.dumps(generation_info, ensure_ascii=False),))
+        self._db.commit()
+
+    def _insert(self, filter_info, grid_index):
+        self._db.execute(
+            "INSERT OR REPLACE INTO filters VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (phon_key(filter_info['target_phon']), phon_key(filter_info['reference_phon']), grid_index,
+             filter_info.get('filename'), float(filter_info['target_phon']), float(filter_info['reference_phon']),
+             filter_info.get('max_boost_db'), filter_info.get('max_cut_db'), filter_info.get('filter_length'),
+             json.dumps(filter_info, ensure_ascii=False)))
+
+    def add(self, filter_info, grid_index=None):
+        """필터 정보 하나 추가 (같은 (타겟, 참조)는 덮어씀, grid_index는 내보내기 순서)"""
+        record = {'grid_index': grid_index, 'info': filter_info}
+        jsonl = self._open_jsonl()
+        jsonl.write(json.dumps(record, ensure_ascii=False) + "\n")
+        jsonl.flush()
+
+        self._insert(filter_info, grid_index)
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.commit()
+
+    def commit(self):
+        """대기 중인 색인 변경 커밋"""
+        self._db.commit()
+        self._pending = 0
+
+    def close(self):
+        """JSONL을 닫고 색인 커밋"""
+        if self._jsonl is not None:
+            self._jsonl.close()
+            self._jsonl = None
+        if self._db is not None:
+            self.commit()
+            self._db.close()
+            self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def rebuild_index(self):
+        """
+        JSONL에서 SQLite 색인 다시 만들기 (강제 종료로 커밋되지 않은 필터 복구)
+
+        Returns:
+            색인된 필터 수
+        """
+        if self._jsonl is not None:
+            self._jsonl.flush()
+        self._db.execute("DELETE FROM filters")
+        self._db.execute("DELETE FROM generation_info")
+        if os.path.exists(self.jsonl_filename):
+            with open(self.jsonl_filename, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # 중단된 실행이 남긴 불완전한 줄
+                    if 'generation_info' in record:
+                        self._db.execute("INSERT OR REPLACE INTO generation_info (id, info) VALUES (0, ?)",
+                                         (json.dumps(record['generation_info'], ensure_ascii=False),))
+                    elif 'info' in record:
+                        self._insert(record['info'], record.get('grid_index'))
+        self.commit()
+        return len(self)
+
+    # --- 조회 ---
+    def generation_info(self):
+        """생성 설정 딕셔너리 (없으면 None)"""
+        row = self._db.execute("SELECT info FROM generation_info WHERE id = 0").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get(self, target_phon, reference_phon):
+        """(타겟, 참조) 필터 정보 (기본 키 조회, 없으면 None)"""
+        row = self._db.execute("SELECT info FROM filters WHERE target_x10 = ? AND reference_x10 = ?",
+                               (phon_key(target_phon), phon_key(reference_phon))).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def __contains__(self, pair):
+        return self.get(*pair) is not None
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM filters").fetchone()[0]
+
+    def query(self, column, min_value=None, max_value=None, order_by=None, limit=None):
+        """
+        범위 질의: min_value < column, column <= max_value (None이면 해당 쪽 제한 없음)
+
+        예: store.query('max_boost_db', min_value=20) -> max_boost_db > 20인 모든 필터 정보
+
+        Args:
+            column: QUERY_COLUMNS 중 하나
+            order_by: QUERY_COLUMNS 중 하나 (None이면 격자 순서)
+            limit: 최대 결과 수
+        """
+        if column not in QUERY_COLUMNS or (order_by is not None and order_by not in QUERY_COLUMNS):
+            raise ValueError(f"질의할 수 없는 열: {column if column not in QUERY_COLUMNS else order_by} "
+                             f"(가능: {', '.join(QUERY_COLUMNS)})")
+        conditions, params = [], []
+        if min_value is not None:
+            conditions.append(f"{column} > ?")
+            params.append(min_value)
+        if max_value is not None:
+            conditions.append(f"{column} <= ?")
+            params.append(max_value)
+        sql = "SELECT info FROM filters"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += f" ORDER BY {order_by or 'grid_index'}, target_x10, reference_x10"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return [json.loads(row[0]) for row in self._db.execute(sql, params)]
+
+    def iter_filters(self):
+        """모든 필터 정보 (격자 순서, 한 줄씩 읽음)"""
+        for row in self._db.execute("SELECT info FROM filters ORDER BY grid_index, target_x10, reference_x10"):
+            yield json.loads(row[0])
+
+    def export_json(self, filename=None):
+        """
+        기존 형식의 filter_metadata.json 내보내기 (필터는 한 줄씩 써서 전체를 메모리에 올리지 않음)
+
+        Returns:
+            기록한 파일 경로
+        """
+        if filename is None:
+            filename = os.path.join(self.directory, METADATA_JSON_FILENAME)
+        self.commit()
+        generation_info = json.dumps(self.generation_info() or {}, indent=2, ensure_ascii=False)
+
+        temp_filename = filename + ".tmp"
+        with open(temp_filename, 'w', encoding='utf-8') as f:
+            f.write('{\n  "generation_info": ' + generation_info.replace("\n", "\n  ") + ',\n  "filters": [')
+            count = 0
+            for filter_info in self.iter_filters():
+                entry = json.dumps(filter_info, indent=2, ensure_ascii=False).replace("\n", "\n    ")
+                f.write(("," if count else "") + "\n    " + entry)
+                count += 1
+            f.write("\n  ]\n}" if count else "]\n}")
+        os.replace(temp_filename, filename)
+        return filename
+
+
+def main():
+    parser = argparse.ArgumentParser(description="필터 메타데이터 저장소 조회 / 내보내기")
+    parser.add_argument("directory", help="generate_filter_range 출력 디렉토리")
+    parser.add_argument("--get", nargs=2, type=float, metavar=("TARGET", "REFERENCE"), help="필터 하나 조회")
+    parser.add_argument("--column", choices=QUERY_COLUMNS, help="범위 질의 열")
+    parser.add_argument("--min", type=float, help="열 값 하한 (초과)")
+    parser.add_argument("--max", type=float, help="열 값 상한 (이하)")
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--rebuild", action="store_true", help="JSONL에서 색인 다시 만들기")
+    parser.add_argument("--export", action="store_true", help="filter_metadata.json 다시 내보내기")
+    args = parser.parse_args()
+
+    with MetadataStore(args.directory) as store:
+        if args.rebuild:
+            print(f"색인 재생성: {store.rebuild_index()}개 필터")
+        if args.get:
+            print(json.dumps(store.get(*args.get), indent=2, ensure_ascii=False))
+        if args.column:
+            results = store.query(args.column, args.min, args.max, limit=args.limit)
+            for filter_info in results:
+                print(json.dumps(filter_info, ensure_ascii=False))
+            print(f"{len(results)}개 필터")
+        if args.export:
+            print(f"내보내기 완료: {store.export_json()}")
+
+
+if __name__ == "__main__":
+    main()
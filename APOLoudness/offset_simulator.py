@@ -0,0 +1,573 @@
+import argparse
+import configparser
+import os
+import re
+import sys
+
+import numpy as np
+
+from preamp_codegen import PreampTable, generate_preamp_outputs, phon_axis
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PREAMP_DATA_FILE = os.path.join(HERE, "preamp_data_v032.h")
+MAINWINDOW_FILE = os.path.join(HERE, "mainwindow.cpp")
+CONTROLLER_FILE = os.path.join(HERE, "..", "app", "src", "main", "java", "me", "timschneeberger",
+                               "rootlessjamesdsp", "utils", "LoudnessController.kt")
+
+# optimaloffsetcalculator.cpp / mainwindow.cpp 상수
+DEFAULT_MEASUREMENTS = {40.0: 59.3, 50.0: 65.4, 60.0: 71.8, 70.0: 77.7, 80.0: 83.0, 90.0: 88.3}
+FALLBACK_DB_SPL = 59.3
+LEGACY_REFERENCE_PHON = 80.0
+OFFSET_SEARCH_START = -30.0
+OFFSET_SEARCH_END = 30.0
+OFFSET_SEARCH_STEP = 0.1
+OFFSET_TOLERANCE = 0.1
+FALLBACK_PREAMP = -23.0
+TARGET_PHON_MIN = 40.0
+TARGET_PHON_MAX = 90.0
+PREAMP_MIN = -60.0
+PREAMP_MAX = 0.0
+OFFSET_MIN = -30.0
+OFFSET_MAX = 30.0
+
+# LoudnessController.kt: FIR 보정값 선택에 쓰는 실제 폰 범위
+FIR_PHON_MIN = 40.0
+FIR_PHON_MAX = 90.0
+
+_PAIR_PATTERN = re.compile(r"\{\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*\}")
+_REFERENCE_BLOCK_PATTERN = re.compile(r"\{\s*(\d+(?:\.\d+)?)\s*,\s*\{")
+_KOTLIN_ROW_PATTERN = re.compile(r"(\d+(?:\.\d+)?)f\s+to\s+mapOf\(([^)]*)\)")
+_KOTLIN_PAIR_PATTERN = re.compile(r"(\d+(?:\.\d+)?)f\s+to\s+(-?\d+(?:\.\d+)?)f")
+
+
+# --- 앱 소스 / 설정 읽기 ---
+def _initializer_text(source, name):
+    """C++ 소스에서 `name = { ... };` 초기화 목록 본문"""
+    start = source.index(name)
+    start = source.index("{", start)
+    depth = 0
+    for position in range(start, len(source)):
+        if source[position] == "{":
+            depth += 1
+        elif source[position] == "}":
+            depth -= 1
+            if depth == 0:
+                return source[start + 1:position]
+    raise ValueError(f"초기화 목록이 닫히지 않았습니다: {name}")
+
+
+def load_preamp_maps(preamp_data_file=PREAMP_DATA_FILE, mainwindow_file=MAINWINDOW_FILE):
+    """
+    mainwindow.cpp가 쓰는 프리앰프 맵 읽기
+
+    Returns:
+        ({참조 폰: {타겟 폰: 프리앰프}} - recommendedPreampMultiReference,
+         {타겟 폰: 프리앰프} - recommendedPreampMap)
+    """
+    with open(preamp_data_file, 'r', encoding='utf-8') as f:
+        body = _initializer_text(f.read(), "recommendedPreampMultiReference")
+    multi_reference = {}
+    blocks = list(_REFERENCE_BLOCK_PATTERN.finditer(body))
+    for index, block in enumerate(blocks):
+        end = blocks[index + 1].start() if index + 1 < len(blocks) else len(body)
+        multi_reference[float(block.group(1))] = {float(target): float(preamp) for target, preamp
+                                                  in _PAIR_PATTERN.findall(body[block.end():end])}
+
+    with open(mainwindow_file, 'r', encoding='utf-8') as f:
+        body = _initializer_text(f.read(), "recommendedPreampMap")
+    single_reference = {float(target): float(preamp) for target, preamp in _PAIR_PATTERN.findall(body)}
+    return multi_reference, single_reference
+
+
+def load_fir_preamp_table(controller_file=CONTROLLER_FILE):
+    """LoudnessController.kt의 filterPreampTable ({참조 폰: {타겟 폰: 프리앰프}}) 읽기"""
+    with open(controller_file, 'r', encoding='utf-8') as f:
+        source = f.read()
+    start = source.index("filterPreampTable")
+    table = {}
+    for reference, row in _KOTLIN_ROW_PATTERN.findall(source[start:]):
+        table[float(reference)] = {float(target): float(preamp)
+                                   for target, preamp in _KOTLIN_PAIR_PATTERN.findall(row)}
+    if not table:
+        raise ValueError(f"filterPreampTable을 찾을 수 없습니다: {controller_file}")
+    return table
+
+
+def load_calibration(filename=None):
+    """
+    OptimalOffsetCalculator::loadMeasurements와 같은 방식으로 calibration.ini 읽기
+
+    [Measurements] 다음 [CustomMeasurements]가 덮어쓰고, [RefTargetMeasurements]의
+    Ref_<참조>_Target_<타겟> 키는 (참조, 타겟) 쌍 측정값입니다. 타겟 측정값이 없으면 기본값을 씁니다.
+
+    Returns:
+        ({타겟 폰: dB SPL}, {(참조 폰, 타겟 폰): dB SPL})
+    """
+    target_measurements = {}
+    pair_measurements = {}
+    if filename and os.path.exists(filename):
+        parser = configparser.ConfigParser(interpolation=None)
+        parser.optionxform = str
+        parser.read(filename, encoding='utf-8')
+        for section in ("Measurements", "CustomMeasurements"):
+            if parser.has_section(section):
+                for key, value in parser.items(section):
+                    try:
+                        target_measurements[float(key)] = float(value)
+                    except ValueError:
+                        continue
+        if parser.has_section("RefTargetMeasurements"):
+            for key, value in parser.items("RefTargetMeasurements"):
+                parts = key.split("_")
+                if len(parts) == 4 and parts[0] == "Ref" and parts[2] == "Target":
+                    try:
+                        pair_measurements[(float(parts[1]), float(parts[3]))] = float(value)
+                    except ValueError:
+                        continue
+    if not target_measurements:
+        target_measurements = dict(DEFAULT_MEASUREMENTS)
+    return target_measurements, pair_measurements
+
+
+# --- 벡터화 시뮬레이터 ---
+def qround(values):
+    """Qt 5 qRound (양수는 0.5 올림, 음수는 int(d - int(d-1) + 0.5) + int(d-1))"""
+    values = np.asarray(values, dtype=float)
+    lower = np.trunc(values - 1)
+    return np.where(values >= 0.0, np.trunc(values + 0.5), np.trunc(values - lower + 0.5) + lower)
+
+
+def qround_tenth(values):
+    """qRound(x * 10) / 10.0"""
+    return qround(np.asarray(values, dtype=float) * 10) / 10.0
+
+
+def offset_effect_db(base_preamp, offset_preamp):
+    """OptimalOffsetCalculator::calculateOffsetEffect (범위가 0 이하이면 0)"""
+    base_range = (np.asarray(base_preamp, dtype=float) + 40.0) * 2.5
+    offset_range = (np.asarray(offset_preamp, dtype=float) + 40.0) * 2.5
+    valid = (base_range > 0) & (offset_range > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        effect = 20.0 * np.log10(offset_range / base_range)
+    return np.where(valid, effect, 0.0)
+
+
+def base_db_spl(target_phons, reference_phons, measurements):
+    """
+    calculateRealDbSpl의 기본 실측값: (참조, 타겟) 쌍 측정값 -> 참조 80의 타겟 측정값
+    -> 타겟 측정값 선형 보간 / 양 끝 외삽 (참조와 무관) 순서
+    """
+    target_measurements, pair_measurements = measurements
+    target_phons, reference_phons = np.broadcast_arrays(np.asarray(target_phons, dtype=float),
+                                                        np.asarray(reference_phons, dtype=float))
+    keys = np.array(sorted(target_measurements))
+    values = np.array([target_measurements[key] for key in keys])
+
+    if len(keys) >= 2:
+        segment = np.clip(np.searchsorted(keys, target_phons, side='left') - 1, 0, len(keys) - 2)
+        x1, x2 = keys[segment], keys[segment + 1]
+        y1, y2 = values[segment], values[segment + 1]
+        result = y1 + (y2 - y1) * (target_phons - x1) / (x2 - x1)
+    elif len(keys) == 1:
+        result = np.full(target_phons.shape, values[0])
+    else:
+        result = np.full(target_phons.shape, FALLBACK_DB_SPL)
+
+    # 정확히 같은 키만 인정 (QMap<double>::contains)
+    legacy = reference_phons == LEGACY_REFERENCE_PHON
+    for key, value in target_measurements.items():
+        result = np.where(legacy & (target_phons == key), value, result)
+    for (reference, target), value in pair_measurements.items():
+        result = np.where((reference_phons == reference) & (target_phons == target), value, result)
+    return result
+
+
+def real_db_spl(target_phons, reference_phons, base_preamps, final_preamps, measurements):
+    """OptimalOffsetCalculator::calculateRealDbSpl (기본 실측값 + offset 효과)"""
+    return base_db_spl(target_phons, reference_phons, measurements) + offset_effect_db(base_preamps, final_preamps)
+
+
+def offset_candidates():
+    """findOptimalOffset이 탐색하는 offset 값 (C++ 루프처럼 0.1을 누적하여 같은 부동소수점 값)"""
+    candidates = []
+    offset = OFFSET_SEARCH_START
+    while offset <= OFFSET_SEARCH_END:
+        candidates.append(offset)
+        offset += OFFSET_SEARCH_STEP
+    return np.array(candidates)
+
+
+def optimal_offsets(target_phons, base_preamps, measurements, tolerance=OFFSET_TOLERANCE, chunk_size=4096):
+    """
+    OptimalOffsetCalculator::getOptimalOffset 벡터화 (참조는 C++과 같이 80으로 고정)
+
+    모든 후보 offset의 오차를 한 번에 계산한 뒤, 오차가 tolerance 미만인 첫 후보
+    (C++ 조기 종료), 없으면 오차가 가장 작은 첫 후보를 고릅니다.
+    """
+    target_phons, base_preamps = np.broadcast_arrays(np.asarray(target_phons, dtype=float),
+                                                     np.asarray(base_preamps, dtype=float))
+    shape = target_phons.shape
+    target_phons = target_phons.ravel()
+    base_preamps = base_preamps.ravel()
+    candidates = offset_candidates()
+    result = np.empty(len(target_phons))
+
+    for start in range(0, len(target_phons), chunk_size):
+        targets = target_phons[start:start + chunk_size, np.newaxis]
+        bases = base_preamps[start:start + chunk_size, np.newaxis]
+        spl = base_db_spl(targets, LEGACY_REFERENCE_PHON, measurements) + \
+            offset_effect_db(bases, bases + candidates)
+        errors = np.abs(spl - targets)
+        within = errors < tolerance
+        first_within = np.argmax(within, axis=1)
+        best = np.argmin(errors, axis=1)
+        result[start:start + chunk_size] = candidates[np.where(within.any(axis=1), first_within, best)]
+    return result.reshape(shape)
+
+
+def recommended_preamps(target_phons, reference_phons, preamp_maps):
+    """
+    MainWindow::getRecommendedPreamp 벡터화
+
+    참조 폰 맵의 같은 타겟 -> 더 작은 가장 가까운 타겟 (40 이상) -> 참조 80 맵 -> 단일 참조 맵 -> -23 순서
+    """
+    multi_reference, single_reference = preamp_maps
+    target_keys, reference_keys = np.broadcast_arrays(qround_tenth(target_phons), qround_tenth(reference_phons))
+    result = np.full(target_keys.shape, np.nan)
+
+    def lookup_reference(reference, mask):
+        row = multi_reference[reference]
+        keys = np.array(sorted(row))
+        values = np.array([row[key] for key in keys])
+        position = np.searchsorted(keys, target_keys, side='left')
+        exact = (position < len(keys)) & (keys[np.minimum(position, len(keys) - 1)] == target_keys)
+        previous = np.maximum(position - 1, 0)
+        lower = (~exact) & (position > 0) & (keys[previous] >= TARGET_PHON_MIN)
+        found = mask & np.isnan(result)
+        result[found & exact] = values[np.minimum(position, len(keys) - 1)][found & exact]
+        result[found & lower] = values[previous][found & lower]
+
+    for reference in multi_reference:
+        lookup_reference(reference, reference_keys == reference)
+    if LEGACY_REFERENCE_PHON in multi_reference:
+        lookup_reference(LEGACY_REFERENCE_PHON, reference_keys != LEGACY_REFERENCE_PHON)
+    for target, value in single_reference.items():
+        result[np.isnan(result) & (target_keys == target)] = value
+    result[np.isnan(result)] = FALLBACK_PREAMP
+    return result
+
+
+def simulate_auto_offset(target_phons, reference_phons, preamp_maps, measurements):
+    """
+    Auto Offset 모드 상태 전이 시뮬레이션 (handleAutoOffsetWheel -> calculateAndApplyOptimalOffset -> updateConfig)
+
+    타겟은 updateConfig처럼 [40, 참조]로 제한하고 0.1 단위로 반올림합니다.
+
+    Returns:
+        {'target_phon', 'base_preamp', 'offset', 'final_preamp', 'real_spl'} 배열 딕셔너리
+    """
+    target_phons, reference_phons = np.broadcast_arrays(np.asarray(target_phons, dtype=float),
+                                                        np.asarray(reference_phons, dtype=float))
+    targets = qround_tenth(np.maximum(TARGET_PHON_MIN, np.minimum(target_phons, reference_phons)))
+    base = recommended_preamps(targets, reference_phons, preamp_maps)
+
+    # calculateAndApplyOptimalOffset
+    offset = qround_tenth(optimal_offsets(targets, base, measurements))
+    offset = np.where(base + offset > PREAMP_MAX, qround_tenth(PREAMP_MAX - base), offset)
+    offset = np.clip(offset, OFFSET_MIN, OFFSET_MAX)
+
+    # updateConfig
+    final = qround_tenth(np.clip(base + offset, PREAMP_MIN, PREAMP_MAX))
+    return {
+        'target_phon': targets,
+        'base_preamp': base,
+        'offset': offset,
+        'final_preamp': final,
+        'real_spl': real_db_spl(targets, reference_phons, base, final, measurements),
+    }
+
+
+def fir_compensation(target_phons, reference_phons, fir_preamp_table):
+    """
+    LoudnessController.getFirCompensation 벡터화 (Kotlin과 같은 float32 연산)
+
+    가장 가까운 참조 키 (같으면 먼저 나온 키), 타겟은 양 옆 키 선형 보간 (범위 밖은 양 끝 값)
+    """
+    target_phons, reference_phons = np.broadcast_arrays(np.asarray(target_phons, dtype=np.float32),
+                                                        np.asarray(reference_phons, dtype=np.float32))
+    reference_keys = np.array(list(fir_preamp_table), dtype=np.float32)
+    nearest = np.argmin(np.abs(reference_phons[..., np.newaxis] - reference_keys), axis=-1)
+    result = np.zeros(target_phons.shape, dtype=np.float32)
+
+    for index, reference in enumerate(fir_preamp_table):
+        mask = nearest == index
+        row = fir_preamp_table[reference]
+        keys = np.array(sorted(row), dtype=np.float32)
+        values = np.array([row[key] for key in sorted(row)], dtype=np.float32)
+        targets = target_phons[mask]
+        lower = np.clip(np.searchsorted(keys, targets, side='right') - 1, 0, len(keys) - 1)
+        upper = np.clip(np.searchsorted(keys, targets, side='left'), 0, len(keys) - 1)
+        ratio = np.where(keys[upper] == keys[lower], np.float32(0),
+                         (targets - keys[lower]) / np.where(keys[upper] == keys[lower], np.float32(1),
+                                                            keys[upper] - keys[lower]))
+        result[mask] = values[lower] + (values[upper] - values[lower]) * ratio.astype(np.float32)
+    return result
+
+
+# --- C++ / Kotlin 코드를 그대로 옮긴 스칼라 구현 (교차 검증용) ---
+def _qround_scalar(value):
+    if value >= 0.0:
+        return int(value + 0.5)
+    return int(value - float(int(value - 1)) + 0.5) + int(value - 1)
+
+
+def reference_real_db_spl(target_phon, reference_phon, base_preamp, offset_preamp, measurements):
+    """OptimalOffsetCalculator::calculateRealDbSpl 한 줄씩 옮긴 버전"""
+    target_measurements, pair_measurements = measurements
+    base_spl = FALLBACK_DB_SPL
+    if (reference_phon, target_phon) in pair_measurements:
+        base_spl = pair_measurements[(reference_phon, target_phon)]
+    elif reference_phon == 80.0 and target_phon in target_measurements:
+        base_spl = target_measurements[target_phon]
+    else:
+        targets = sorted(target_measurements)
+        if targets:
+            if target_phon < targets[0]:
+                if len(targets) >= 2:
+                    x1, x2 = targets[0], targets[1]
+                    y1, y2 = target_measurements[x1], target_measurements[x2]
+                    base_spl = y1 + (y2 - y1) * (target_phon - x1) / (x2 - x1)
+                else:
+                    base_spl = target_measurements[targets[0]]
+            elif target_phon > targets[-1]:
+                if len(targets) >= 2:
+                    x1, x2 = targets[-2], targets[-1]
+                    y1, y2 = target_measurements[x1], target_measurements[x2]
+                    base_spl = y1 + (y2 - y1) * (target_phon - x1) / (x2 - x1)
+                else:
+                    base_spl = target_measurements[targets[-1]]
+            else:
+                for i in range(len(targets) - 1):
+                    if targets[i] <= target_phon <= targets[i + 1]:
+                        x1, x2 = targets[i], targets[i + 1]
+                        y1, y2 = target_measurements[x1], target_measurements[x2]
+                        base_spl = y1 + (y2 - y1) * (target_phon - x1) / (x2 - x1)
+                        break
+
+    base_range = (base_preamp + 40.0) * 2.5
+    offset_range = (offset_preamp + 40.0) * 2.5
+    effect = 20.0 * np.log10(offset_range / base_range) if base_range > 0 and offset_range > 0 else 0.0
+    return base_spl + effect
+
+
+def reference_optimal_offset(target_phon, base_preamp, measurements, tolerance=OFFSET_TOLERANCE):
+    """OptimalOffsetCalculator::findOptimalOffset 한 줄씩 옮긴 버전"""
+    best_offset = 0.0
+    min_error = 999.0
+    offset = OFFSET_SEARCH_START
+    while offset <= OFFSET_SEARCH_END:
+        real_spl = reference_real_db_spl(target_phon, LEGACY_REFERENCE_PHON, base_preamp,
+                                         base_preamp + offset, measurements)
+        error = abs(real_spl - target_phon)
+        if error < min_error:
+            min_error = error
+            best_offset = offset
+        if error < tolerance:
+            break
+        offset += OFFSET_SEARCH_STEP
+    return best_offset
+
+
+def reference_recommended_preamp(target_phon, reference_phon, preamp_maps):
+    """MainWindow::getRecommendedPreamp 한 줄씩 옮긴 버전"""
+    multi_reference, single_reference = preamp_maps
+    target_key = _qround_scalar(target_phon * 10) / 10.0
+    reference_key = _qround_scalar(reference_phon * 10) / 10.0
+    if reference_key in multi_reference:
+        row = multi_reference[reference_key]
+        if target_key in row:
+            return row[target_key]
+        lower_keys = [key for key in sorted(row) if key < target_key]
+        if lower_keys and lower_keys[-1] >= TARGET_PHON_MIN:
+            return row[lower_keys[-1]]
+    if reference_key != 80.0 and 80.0 in multi_reference:
+        return reference_recommended_preamp(target_phon, 80.0, preamp_maps)
+    if target_key in single_reference:
+        return single_reference[target_key]
+    return FALLBACK_PREAMP
+
+
+def reference_auto_offset_state(target_phon, reference_phon, preamp_maps, measurements):
+    """simulate_auto_offset의 스칼라 버전 (앱 함수 호출 순서 그대로)"""
+    target_phon = max(TARGET_PHON_MIN, min(target_phon, reference_phon))
+    target_phon = _qround_scalar(target_phon * 10) / 10.0
+    base = reference_recommended_preamp(target_phon, reference_phon, preamp_maps)
+    offset = reference_optimal_offset(target_phon, base, measurements)
+    offset = _qround_scalar(offset * 10) / 10.0
+    if base + offset > PREAMP_MAX:
+        offset = _qround_scalar((PREAMP_MAX - base) * 10) / 10.0
+    offset = max(OFFSET_MIN, min(offset, OFFSET_MAX))
+    final = max(PREAMP_MIN, min(base + offset, PREAMP_MAX))
+    final = _qround_scalar(final * 10) / 10.0
+    return {
+        'target_phon': target_phon,
+        'base_preamp': base,
+        'offset': offset,
+        'final_preamp': final,
+        'real_spl': reference_real_db_spl(target_phon, reference_phon, base, final, measurements),
+    }
+
+
+def reference_fir_compensation(target_phon, reference_phon, fir_preamp_table):
+    """LoudnessController.getFirCompensation 한 줄씩 옮긴 버전 (float32)"""
+    target_phon = np.float32(target_phon)
+    reference_phon = np.float32(reference_phon)
+    reference_key = min(fir_preamp_table, key=lambda key: abs(np.float32(key) - reference_phon))
+    row = {np.float32(key): np.float32(value) for key, value in fir_preamp_table[reference_key].items()}
+    sorted_targets = sorted(row)
+    lower = next((key for key in reversed(sorted_targets) if key <= target_phon), sorted_targets[0])
+    upper = next((key for key in sorted_targets if key >= target_phon), sorted_targets[-1])
+    if lower == upper:
+        return row[lower]
+    ratio = np.float32((target_phon - lower) / (upper - lower))
+    return np.float32(row[lower] + (row[upper] - row[lower]) * ratio)
+
+
+# --- 조회 테이블 ---
+def build_offset_tables(preamp_maps, measurements, fir_preamp_table=None,
+                        reference_range=(75.0, 90.0, 1.0), target_range=(40.0, 90.0, 0.1)):
+    """
+    모든 (참조, 타겟) 상태의 조회 테이블 생성 (preamp_codegen.PreampTable 형식)
+
+    Returns:
+        {'offset': Auto Offset 모드 offset, 'real_spl': 표시되는 Real dB SPL,
+         'fir_compensation': LoudnessController FIR 보정값 (fir_preamp_table이 있을 때, 타겟 축 = 실제 폰)}
+    """
+    ref_min_x10, ref_step_x10, reference_phons = phon_axis(reference_range)
+    target_min_x10, target_step_x10, target_phons = phon_axis(target_range)
+    reference_grid, target_grid = np.meshgrid(reference_phons, target_phons, indexing='ij')
+
+    state = simulate_auto_offset(target_grid, reference_grid, preamp_maps, measurements)
+    description = ["Simulated from optimaloffsetcalculator.cpp / mainwindow.cpp (Auto Offset mode)",
+                   "Targets above the reference are clamped to the reference, as in updateConfig()"]
+    tables = {
+        'offset': PreampTable(ref_min_x10, ref_step_x10, target_min_x10, target_step_x10,
+                              np.round(state['offset'], 2),
+                              {'generator': "offset_simulator.py", 'description': description}),
+        'real_spl': PreampTable(ref_min_x10, ref_step_x10, target_min_x10, target_step_x10,
+                                np.round(state['real_spl'], 2),
+                                {'generator': "offset_simulator.py", 'description': description}),
+    }
+    if fir_preamp_table is not None:
+        compensation = fir_compensation(target_grid, reference_grid, fir_preamp_table)
+        tables['fir_compensation'] = PreampTable(
+            ref_min_x10, ref_step_x10, target_min_x10, target_step_x10, np.round(compensation, 2),
+            {'generator': "offset_simulator.py",
+             'description': ["Simulated from LoudnessController.getFirCompensation()",
+                             f"Target axis = actual phon (target - RMS offset), clamped to "
+                             f"{FIR_PHON_MIN:.0f}..{FIR_PHON_MAX:.0f} by the caller"]})
+    return tables
+
+
+TABLE_OUTPUTS = {
+    'offset': ("auto_offset_table", "AutoOffsetTable", "Auto offset (dB)"),
+    'real_spl': ("real_spl_table", "RealSplTable", "Real dB SPL"),
+    'fir_compensation': ("fir_compensation_table", "FirCompensationTable", "FIR compensation (dB)"),
+}
+
+
+def generate_offset_outputs(tables, output_dir):
+    """테이블마다 preamp_codegen과 같은 C++ / Kotlin / 바이너리 / 일관성 테스트 출력"""
+    outputs = {}
+    for key, table in tables.items():
+        basename, name, value_description = TABLE_OUTPUTS[key]
+        outputs[key] = generate_preamp_outputs(table, output_dir, basename=basename, name=name,
+                                               value_description=value_description)
+    return outputs
+
+
+def cross_check(tables, preamp_maps, measurements, fir_preamp_table=None, num_samples=256, seed=0):
+    """
+    무작위 상태 (격자점 + 격자 밖 값)에서 벡터화 시뮬레이터 / 테이블을 스칼라 구현과 비교
+
+    Returns:
+        {'samples', 'state_mismatches', 'table_max_error', ...} 보고서 딕셔너리
+    """
+    rng = np.random.default_rng(seed)
+    offset_table = tables['offset']
+    reference_phons = offset_table.ref_min_x10 / 10.0 + \
+        offset_table.ref_step_x10 / 10.0 * rng.integers(offset_table.ref_count, size=num_samples)
+    target_phons = np.round(rng.uniform(TARGET_PHON_MIN - 2, TARGET_PHON_MAX + 2, num_samples), 2)
+
+    state = simulate_auto_offset(target_phons, reference_phons, preamp_maps, measurements)
+    report = {'samples': num_samples, 'state_mismatches': [], 'table_max_error': {}}
+    table_errors = {'offset': 0.0, 'real_spl': 0.0}
+    for index, (target_phon, reference_phon) in enumerate(zip(target_phons, reference_phons)):
+        expected = reference_auto_offset_state(float(target_phon), float(reference_phon), preamp_maps,
+                                               measurements)
+        for key, value in expected.items():
+            if abs(state[key][index] - value) > 1e-9:
+                report['state_mismatches'].append({'target_phon': float(target_phon),
+                                                   'reference_phon': float(reference_phon), 'field': key,
+                                                   'expected': float(value), 'simulated': float(state[key][index])})
+        # 앱은 0.1 단위로 반올림한 타겟으로 조회
+        app_target = expected['target_phon']
+        table_errors['offset'] = max(table_errors['offset'],
+                                     abs(offset_table.lookup(app_target, reference_phon) - expected['offset']))
+        table_errors['real_spl'] = max(table_errors['real_spl'], abs(
+            tables['real_spl'].lookup(app_target, reference_phon) - expected['real_spl']))
+
+    if fir_preamp_table is not None and 'fir_compensation' in tables:
+        actual_phons = np.round(rng.uniform(FIR_PHON_MIN, FIR_PHON_MAX, num_samples), 1)
+        simulated = fir_compensation(actual_phons, reference_phons, fir_preamp_table)
+        table_errors['fir_compensation'] = 0.0
+        report['fir_mismatches'] = 0
+        for index, (actual_phon, reference_phon) in enumerate(zip(actual_phons, reference_phons)):
+            expected = reference_fir_compensation(actual_phon, reference_phon, fir_preamp_table)
+            report['fir_mismatches'] += int(simulated[index] != expected)
+            table_errors['fir_compensation'] = max(table_errors['fir_compensation'], abs(
+                tables['fir_compensation'].lookup(actual_phon, reference_phon) - float(expected)))
+    report['table_max_error'] = table_errors
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Auto Offset / FIR 보정 조회 테이블 생성 (앱 로직 벡터화 시뮬레이션)")
+    parser.add_argument("--output-dir", default="generated_offset", help="출력 디렉토리")
+    parser.add_argument("--calibration", help="calibration.ini (없으면 기본 측정값)")
+    parser.add_argument("--preamp-data", default=PREAMP_DATA_FILE, help="preamp_data_v032.h")
+    parser.add_argument("--mainwindow", default=MAINWINDOW_FILE, help="mainwindow.cpp (recommendedPreampMap)")
+    parser.add_argument("--controller", default=CONTROLLER_FILE, help="LoudnessController.kt (filterPreampTable)")
+    parser.add_argument("--reference-range", type=float, nargs=3, default=(75.0, 90.0, 1.0),
+                        metavar=("START", "END", "STEP"), help="참조 폰 범위")
+    parser.add_argument("--target-range", type=float, nargs=3, default=(40.0, 90.0, 0.1),
+                        metavar=("START", "END", "STEP"), help="타겟 폰 범위")
+    parser.add_argument("--samples", type=int, default=256, help="교차 검증 표본 수")
+    args = parser.parse_args()
+
+    preamp_maps = load_preamp_maps(args.preamp_data, args.mainwindow)
+    measurements = load_calibration(args.calibration)
+    fir_preamp_table = load_fir_preamp_table(args.controller) if os.path.exists(args.controller) else None
+
+    tables = build_offset_tables(preamp_maps, measurements, fir_preamp_table,
+                                 tuple(args.reference_range), tuple(args.target_range))
+    outputs = generate_offset_outputs(tables, args.output_dir)
+    for key, table in tables.items():
+        print(f"{key}: 참조 {table.ref_count}개 x 타겟 {table.target_count}개")
+        for name, path in outputs[key].items():
+            print(f"  {name}: {path}")
+
+    report = cross_check(tables, preamp_maps, measurements, fir_preamp_table, num_samples=args.samples)
+    print(f"\n교차 검증 ({report['samples']}개 상태): 불일치 {len(report['state_mismatches'])}개"
+          + (f", FIR 보정 불일치 {report['fir_mismatches']}개" if 'fir_mismatches' in report else ""))
+    for key, error in report['table_max_error'].items():
+        print(f"  {key} 테이블 최대 오차: {error:.4f}")
+    for mismatch in report['state_mismatches'][:10]:
+        print(f"  T={mismatch['target_phon']}, R={mismatch['reference_phon']} {mismatch['field']}: "
+              f"{mismatch['simulated']} != {mismatch['expected']}")
+    return 1 if report['state_mismatches'] or report.get('fir_mismatches') else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
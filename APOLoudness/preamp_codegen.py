@@ -0,0 +1,367 @@
+import argparse
+import os
+import struct
+
+import numpy as np
+
+from bulk_fir_filter_generator import BulkFIRFilterGenerator
+from c_weighting_preamp import compute_filter_loudness_stats, preamp_matrix_from_stats
+
+
+# 바이너리 프리앰프 테이블 형식 (리틀 엔디언)
+#   magic(4) version(u16) ref_min_x10(i16) ref_step_x10(i16) ref_count(u16)
+#   target_min_x10(i16) target_step_x10(i16) target_count(u16) + float32 [ref_count x target_count]
+TABLE_MAGIC = b'JLPT'
+TABLE_VERSION = 1
+TABLE_HEADER_FORMAT = '<4sHhhHhhH'
+
+# 곡선 계산이 불가능한 조합에 쓰는 값 (기존 std::map 출력과 동일)
+ERROR_PREAMP = -99.0
+
+KOTLIN_PACKAGE = "me.timschneeberger.rootlessjamesdsp.utils"
+
+
+class PreampTable:
+    """
+    폰 x 10 정수 인덱스로 접근하는 고정 간격 프리앰프 테이블
+
+    values[ref_index, target_index] = 프리앰프 (dB, 소수점 2자리)
+    ref_index = (round(referencePhon x 10) - ref_min_x10) / ref_step_x10
+    """
+
+    def __init__(self, ref_min_x10, ref_step_x10, target_min_x10, target_step_x10, values, settings=None):
+        self.ref_min_x10 = ref_min_x10
+        self.ref_step_x10 = ref_step_x10
+        self.target_min_x10 = target_min_x10
+        self.target_step_x10 = target_step_x10
+        self.values = np.asarray(values, dtype=np.float32)
+        self.settings = settings or {}
+
+    @property
+    def ref_count(self):
+        return self.values.shape[0]
+
+    @property
+    def target_count(self):
+        return self.values.shape[1]
+
+    def lookup(self, target_phon, reference_phon):
+        """가장 가까운 격자점의 프리앰프 (범위 밖은 양 끝 값)"""
+        ref_index = int(round((round(reference_phon * 10) - self.ref_min_x10) / self.ref_step_x10))
+        target_index = int(round((round(target_phon * 10) - self.target_min_x10) / self.target_step_x10))
+        ref_index = min(max(ref_index, 0), self.ref_count - 1)
+        target_index = min(max(target_index, 0), self.target_count - 1)
+        return float(self.values[ref_index, target_index])
+
+
+def phon_axis(phon_range):
+    """고정 간격 테이블 축: (start, end, step) -> (최소 폰 x 10, 간격 x 10, 폰 값 배열)"""
+    start, end, step = phon_range
+    min_x10 = int(round(start * 10))
+    step_x10 = int(round(step * 10))
+    count = int(round((end - start) / step)) + 1
+    return min_x10, step_x10, np.round((min_x10 + step_x10 * np.arange(count)) / 10.0, 1)
+
+
+def build_preamp_table(generator, reference_range=(75.0, 90.0, 1.0), target_range=(40.0, 90.0, 0.1),
+                       calibrated_spl=80.0, desired_spl=70.0, true_peak_headroom=-1.0,
+                       num_freq_points=512):
+    """
+    C-weighting SPL 스크립트와 같은 계산으로 고정 간격 프리앰프 테이블 생성
+
+    Args:
+        generator: 곡선 데이터를 제공할 BulkFIRFilterGenerator 인스턴스 (fs도 사용)
+        reference_range, target_range: (start, end, step) 튜플
+    """
+    ref_min_x10, ref_step_x10, reference_phons = phon_axis(reference_range)
+    target_min_x10, target_step_x10, target_phons = phon_axis(target_range)
+
+    stats = compute_filter_loudness_stats(reference_phons, target_phons, generator.iso_freq,
+                                          generator.fine_curves, generator.fs, num_freq_points)
+    preamp_matrix = preamp_matrix_from_stats(stats, calibrated_spl, desired_spl, true_peak_headroom)
+
+    values = np.array([[round(float(value), 2) for value in row] for row in preamp_matrix])
+    values[~stats['valid']] = ERROR_PREAMP
+
+    settings = {
+        'calibrated_spl': calibrated_spl,
+        'desired_spl': desired_spl,
+        'true_peak_headroom': true_peak_headroom,
+        'fs': generator.fs,
+    }
+    return PreampTable(ref_min_x10, ref_step_x10, target_min_x10, target_step_x10, values, settings)
+
+
+def _format_value(value):
+    return f"{float(value):.2f}"
+
+
+def _settings_comment(table, prefix):
+    """생성 정보 주석 (settings의 description 줄이 있으면 프리앰프 설정 대신 사용)"""
+    settings = table.settings
+    lines = [f"{prefix} Generated by {settings.get('generator', 'preamp_codegen.py')} - do not edit by hand"]
+    if 'description' in settings:
+        lines += [f"{prefix} {line}" for line in settings['description']]
+    else:
+        lines += [
+            f"{prefix} Based on: CALIBRATED_SPL_AT_REF80_TARGET80 = {settings.get('calibrated_spl', 0):.1f} dB SPL(C)",
+            f"{prefix}           USER_DESIRED_ACTUAL_SPL = {settings.get('desired_spl', 0):.1f} dB SPL(C)",
+            f"{prefix}           TARGET_TRUE_PEAK_HEADROOM = {settings.get('true_peak_headroom', 0):.1f} dBTP",
+        ]
+    lines.append(f"{prefix} Layout: table[refIndex * TARGET_COUNT + targetIndex], "
+                 f"index = (round(phon * 10) - MIN_X10) / STEP_X10")
+    return lines
+
+
+def emit_cpp_header(table, filename, guard="PREAMP_TABLE_GENERATED_H", namespace="PreampTable",
+                    value_description="Recommended preamp (dB)"):
+    """C++ 헤더: constexpr float 배열 + 인라인 조회 함수"""
+    lines = [f"#ifndef {guard}", f"#define {guard}", "", "#include <cmath>", ""]
+    lines += _settings_comment(table, "//")
+    lines += [
+        f"namespace {namespace} {{",
+        "",
+        f"constexpr int REF_MIN_X10 = {table.ref_min_x10};",
+        f"constexpr int REF_STEP_X10 = {table.ref_step_x10};",
+        f"constexpr int REF_COUNT = {table.ref_count};",
+        f"constexpr int TARGET_MIN_X10 = {table.target_min_x10};",
+        f"constexpr int TARGET_STEP_X10 = {table.target_step_x10};",
+        f"constexpr int TARGET_COUNT = {table.target_count};",
+        "",
+        "constexpr float TABLE[REF_COUNT * TARGET_COUNT] = {",
+    ]
+    for ref_index in range(table.ref_count):
+        reference_phon = (table.ref_min_x10 + ref_index * table.ref_step_x10) / 10.0
+        lines.append(f"    // Reference Phon {reference_phon:.1f}")
+        row = table.values[ref_index]
+        for start in range(0, len(row), 10):
+            lines.append("    " + " ".join(f"{_format_value(value)}f," for value in row[start:start + 10]))
+    lines += [
+        "};",
+        "",
+        "inline int clampIndex(int index, int count) {",
+        "    return index < 0 ? 0 : (index >= count ? count - 1 : index);",
+        "}",
+        "",
+        f"// {value_description} for the nearest grid point",
+        "inline float lookup(double targetPhon, double referencePhon) {",
+        "    const int refX10 = static_cast<int>(std::lround(referencePhon * 10.0));",
+        "    const int targetX10 = static_cast<int>(std::lround(targetPhon * 10.0));",
+        "    const int refIndex = clampIndex(static_cast<int>(std::lround(double(refX10 - REF_MIN_X10) / REF_STEP_X10)), REF_COUNT);",
+        "    const int targetIndex = clampIndex(static_cast<int>(std::lround(double(targetX10 - TARGET_MIN_X10) / TARGET_STEP_X10)), TARGET_COUNT);",
+        "    return TABLE[refIndex * TARGET_COUNT + targetIndex];",
+        "}",
+        "",
+        f"}} // namespace {namespace}",
+        "",
+        f"#endif // {guard}",
+        "",
+    ]
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines))
+
+
+def emit_kotlin(table, filename, object_name="PreampTable", package=KOTLIN_PACKAGE,
+                value_description="Recommended preamp (dB)"):
+    """
+    Kotlin 소스: 참조 폰별 FloatArray + 조회 함수
+
+    JVM 메서드 크기 제한(64KB)을 넘지 않도록 참조 폰 행마다 별도 함수로 초기화합니다.
+    """
+    lines = [f"package {package}", "", "import kotlin.math.roundToInt", ""]
+    lines += _settings_comment(table, "//")
+    lines += [
+        f"object {object_name} {{",
+        f"    const val REF_MIN_X10 = {table.ref_min_x10}",
+        f"    const val REF_STEP_X10 = {table.ref_step_x10}",
+        f"    const val REF_COUNT = {table.ref_count}",
+        f"    const val TARGET_MIN_X10 = {table.target_min_x10}",
+        f"    const val TARGET_STEP_X10 = {table.target_step_x10}",
+        f"    const val TARGET_COUNT = {table.target_count}",
+        "",
+        "    private val rows: Array<FloatArray> = arrayOf(",
+    ]
+    for ref_index in range(table.ref_count):
+        lines.append(f"        row{ref_index}(),")
+    lines += [
+        "    )",
+        "",
+        "    /**",
+        f"     * {value_description} for the nearest grid point",
+        "     */",
+        "    fun lookup(targetPhon: Float, referencePhon: Float): Float {",
+        "        val refX10 = (referencePhon * 10f).roundToInt()",
+        "        val targetX10 = (targetPhon * 10f).roundToInt()",
+        "        val refIndex = ((refX10 - REF_MIN_X10).toFloat() / REF_STEP_X10).roundToInt().coerceIn(0, REF_COUNT - 1)",
+        "        val targetIndex = ((targetX10 - TARGET_MIN_X10).toFloat() / TARGET_STEP_X10).roundToInt().coerceIn(0, TARGET_COUNT - 1)",
+        "        return rows[refIndex][targetIndex]",
+        "    }",
+    ]
+    for ref_index in range(table.ref_count):
+        reference_phon = (table.ref_min_x10 + ref_index * table.ref_step_x10) / 10.0
+        lines += ["", f"    // Reference Phon {reference_phon:.1f}",
+                  f"    private fun row{ref_index}() = floatArrayOf("]
+        row = table.values[ref_index]
+        for start in range(0, len(row), 10):
+            lines.append("        " + " ".join(f"{_format_value(value)}f," for value in row[start:start + 10]))
+        lines.append("    )")
+    lines += ["}", ""]
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines))
+
+
+def emit_binary(table, filename):
+    """바이너리 블롭: 고정 헤더 + float32 [ref_count x target_count]"""
+    header = struct.pack(TABLE_HEADER_FORMAT, TABLE_MAGIC, TABLE_VERSION,
+                         table.ref_min_x10, table.ref_step_x10, table.ref_count,
+                         table.target_min_x10, table.target_step_x10, table.target_count)
+    with open(filename, 'wb') as f:
+        f.writelines((header, memoryview(np.ascontiguousarray(table.values, dtype='<f4')).cast('B')))
+
+
+def load_binary(filename):
+    """emit_binary로 기록한 테이블 읽기"""
+    with open(filename, 'rb') as f:
+        data = f.read()
+    (magic, version, ref_min_x10, ref_step_x10, ref_count,
+     target_min_x10, target_step_x10, target_count) = struct.unpack_from(TABLE_HEADER_FORMAT, data)
+    if magic != TABLE_MAGIC or version != TABLE_VERSION:
+        raise ValueError(f"프리앰프 테이블 파일이 아닙니다: {filename}")
+    values = np.frombuffer(data, dtype='<f4', offset=struct.calcsize(TABLE_HEADER_FORMAT),
+                           count=ref_count * target_count).reshape(ref_count, target_count)
+    return PreampTable(ref_min_x10, ref_step_x10, target_min_x10, target_step_x10, values)
+
+
+CONSISTENCY_TEST_TEMPLATE = '''import os
+import re
+import struct
+import unittest
+
+import numpy as np
+
+# Generated by preamp_codegen.py - checks that the generated outputs agree with each other
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CPP_FILE = os.path.join(HERE, {cpp_name!r})
+KOTLIN_FILE = os.path.join(HERE, {kotlin_name!r})
+BINARY_FILE = os.path.join(HERE, {binary_name!r})
+HEADER_FORMAT = {header_format!r}
+
+VALUE_PATTERN = re.compile(r"(-?\\d+\\.\\d+)f,")
+CONST_PATTERN = re.compile(r"(REF_MIN_X10|REF_STEP_X10|REF_COUNT|TARGET_MIN_X10|TARGET_STEP_X10|TARGET_COUNT) = (-?\\d+)")
+
+
+def parse_source(filename):
+    with open(filename, encoding="utf-8") as f:
+        text = f.read()
+    constants = {{name: int(value) for name, value in CONST_PATTERN.findall(text)}}
+    values = np.array([float(value) for value in VALUE_PATTERN.findall(text)], dtype=np.float32)
+    return constants, values
+
+
+def parse_binary(filename):
+    with open(filename, "rb") as f:
+        data = f.read()
+    fields = struct.unpack_from(HEADER_FORMAT, data)
+    constants = dict(zip(["REF_MIN_X10", "REF_STEP_X10", "REF_COUNT",
+                          "TARGET_MIN_X10", "TARGET_STEP_X10", "TARGET_COUNT"], fields[2:]))
+    count = constants["REF_COUNT"] * constants["TARGET_COUNT"]
+    values = np.frombuffer(data, dtype="<f4", offset=struct.calcsize(HEADER_FORMAT), count=count)
+    return constants, values
+
+
+class PreampTableConsistencyTest(unittest.TestCase):
+    def test_layout_constants_match(self):
+        cpp_constants, _ = parse_source(CPP_FILE)
+        kotlin_constants, _ = parse_source(KOTLIN_FILE)
+        binary_constants, _ = parse_binary(BINARY_FILE)
+        self.assertEqual(cpp_constants, binary_constants)
+        self.assertEqual(kotlin_constants, binary_constants)
+
+    def test_values_match(self):
+        _, cpp_values = parse_source(CPP_FILE)
+        _, kotlin_values = parse_source(KOTLIN_FILE)
+        binary_constants, binary_values = parse_binary(BINARY_FILE)
+        self.assertEqual(len(binary_values), binary_constants["REF_COUNT"] * binary_constants["TARGET_COUNT"])
+        np.testing.assert_array_equal(cpp_values, binary_values)
+        np.testing.assert_array_equal(kotlin_values, binary_values)
+
+    def test_spot_values(self):
+        _, binary_values = parse_binary(BINARY_FILE)
+        target_count = {target_count}
+        for (ref_index, target_index), expected in {spot_values!r}.items():
+            self.assertEqual(binary_values[ref_index * target_count + target_index], np.float32(expected))
+
+
+if __name__ == "__main__":
+    unittest.main()
+'''
+
+
+def emit_consistency_test(table, filename, cpp_name, kotlin_name, binary_name, num_spot_values=16):
+    """세 출력 (C++, Kotlin, 바이너리)을 서로 비교하는 unittest 스크립트 생성"""
+    rng = np.random.default_rng(0)
+    spot_values = {}
+    for _ in range(num_spot_values):
+        ref_index = int(rng.integers(table.ref_count))
+        target_index = int(rng.integers(table.target_count))
+        spot_values[(ref_index, target_index)] = float(table.values[ref_index, target_index])
+
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write(CONSISTENCY_TEST_TEMPLATE.format(
+            cpp_name=cpp_name, kotlin_name=kotlin_name, binary_name=binary_name,
+            header_format=TABLE_HEADER_FORMAT, target_count=table.target_count,
+            spot_values=spot_values,
+        ))
+
+
+def generate_preamp_outputs(table, output_dir, basename="preamp_table", name="PreampTable",
+                            value_description="Recommended preamp (dB)"):
+    """
+    C++ 헤더, Kotlin 소스, 바이너리 블롭, 일관성 테스트를 한 번에 생성
+
+    name은 C++ 네임스페이스 / Kotlin 오브젝트 이름입니다 (같은 형식의 다른 테이블용, 예: offset_simulator).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    outputs = {
+        'cpp': f"{basename}_generated.h",
+        'kotlin': f"{name}.kt",
+        'binary': f"{basename}.bin",
+        'test': f"test_{basename}_consistency.py",
+    }
+    emit_cpp_header(table, os.path.join(output_dir, outputs['cpp']), guard=f"{basename.upper()}_GENERATED_H",
+                    namespace=name, value_description=value_description)
+    emit_kotlin(table, os.path.join(output_dir, outputs['kotlin']), object_name=name,
+                value_description=value_description)
+    emit_binary(table, os.path.join(output_dir, outputs['binary']))
+    emit_consistency_test(table, os.path.join(output_dir, outputs['test']),
+                          outputs['cpp'], outputs['kotlin'], outputs['binary'])
+    return {name: os.path.join(output_dir, path) for name, path in outputs.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="프리앰프 테이블 코드 생성 (C++ 헤더, Kotlin, 바이너리)")
+    parser.add_argument("--output-dir", default="generated_preamp", help="출력 디렉토리")
+    parser.add_argument("--reference-range", type=float, nargs=3, default=(75.0, 90.0, 1.0),
+                        metavar=("START", "END", "STEP"), help="참조 폰 범위")
+    parser.add_argument("--target-range", type=float, nargs=3, default=(40.0, 90.0, 0.1),
+                        metavar=("START", "END", "STEP"), help="타겟 폰 범위")
+    parser.add_argument("--calibrated-spl", type=float, default=80.0)
+    parser.add_argument("--desired-spl", type=float, default=70.0)
+    parser.add_argument("--headroom", type=float, default=-1.0, help="목표 트루 피크 헤드룸 (dBTP)")
+    parser.add_argument("--fs", type=int, default=48000)
+    args = parser.parse_args()
+
+    generator = BulkFIRFilterGenerator(fs=args.fs)
+    table = build_preamp_table(generator, tuple(args.reference_range), tuple(args.target_range),
+                               calibrated_spl=args.calibrated_spl, desired_spl=args.desired_spl,
+                               true_peak_headroom=args.headroom)
+    outputs = generate_preamp_outputs(table, args.output_dir)
+
+    print(f"프리앰프 테이블: 참조 {table.ref_count}개 x 타겟 {table.target_count}개")
+    for name, path in outputs.items():
+        print(f"  {name}: {path}")
+
+
+if __name__ == "__main__":
+    main()
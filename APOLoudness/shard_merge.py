@@ -0,0 +1,237 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+
+from bulk_fir_filter_generator import MANIFEST_FILENAME, phon_grid
+from filter_bank import FilterBank, FilterBankWriter
+
+
+METADATA_FILENAME = "filter_metadata.json"
+REPORT_FILENAME = "shard_merge_report.json"
+
+# 샤드 사이에서 같아야 하는 생성 설정 (다르면 한 뱅크로 합칠 수 없음)
+CONSISTENT_KEYS = ('fs', 'numtaps', 'engine', 'wav_format', 'window', 'phase', 'max_error_db',
+                   'generator_version', 'target_range', 'reference_range', 'device_correction')
+OUTPUT_EXTENSIONS = ('.wav', '.csv')
+
+
+def load_shard(shard_dir):
+    """
+    샤드 출력 디렉토리의 메타데이터 / 매니페스트 읽기
+
+    메타데이터가 없으면 (강제 종료된 샤드) None, 매니페스트는 없으면 빈 딕셔너리입니다.
+    """
+    metadata = None
+    metadata_filename = os.path.join(shard_dir, METADATA_FILENAME)
+    if os.path.exists(metadata_filename):
+        with open(metadata_filename, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+
+    manifest = {}
+    manifest_filename = os.path.join(shard_dir, MANIFEST_FILENAME)
+    if os.path.exists(manifest_filename):
+        with open(manifest_filename, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    manifest[entry['filename']] = entry
+                except (ValueError, KeyError, TypeError):
+                    continue
+    return metadata, manifest
+
+
+def _link_or_copy(source, destination):
+    """하드 링크 (같은 파일 시스템) 또는 복사"""
+    if os.path.exists(destination):
+        os.remove(destination)
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+def merge_shards(shard_dirs, output_dir, bank_filename=None, copy_files=True):
+    """
+    generate_filter_range(shard=...) 샤드 출력을 하나의 출력 디렉토리로 병합
+
+    기대 격자는 샤드 메타데이터의 target_range / reference_range로 다시 계산하고,
+    필터는 격자 순서로 기록합니다. 같은 필터가 여러 샤드에 있으면 샤드 번호가 가장 작은
+    (같으면 경로 순) 샤드의 것을 사용하므로 샤드 디렉토리를 넘기는 순서와 결과가 무관합니다.
+
+    Args:
+        shard_dirs: 샤드 출력 디렉토리 리스트
+        output_dir: 병합 출력 디렉토리 (WAV / CSV는 하드 링크 또는 복사)
+        bank_filename: 지정하면 각 샤드의 같은 이름 필터 뱅크를 하나의 뱅크로 병합
+        copy_files: False이면 메타데이터 / 매니페스트 / 뱅크만 병합
+
+    Returns:
+        병합 보고서 딕셔너리 (missing, duplicates, unexpected, missing_files, missing_bank 포함)
+    """
+    shards = []
+    for shard_dir in shard_dirs:
+        metadata, manifest = load_shard(shard_dir)
+        shard_info = (metadata or {}).get('generation_info', {}).get('shard')
+        order = shard_info['index'] if shard_info else -1
+        shards.append((order, shard_dir, metadata, manifest))
+    shards.sort(key=lambda shard: (shard[0], shard[1]))
+
+    with_metadata = [shard for shard in shards if shard[2] is not None]
+    if not with_metadata:
+        raise ValueError("메타데이터가 있는 샤드가 없습니다.")
+
+    generation_info = dict(with_metadata[0][2]['generation_info'])
+    for _, shard_dir, metadata, _ in with_metadata[1:]:
+        for key in CONSISTENT_KEYS:
+            if metadata['generation_info'].get(key) != generation_info.get(key):
+                raise ValueError(f"샤드 설정 불일치 ({key}): {shard_dir}: "
+                                 f"{metadata['generation_info'].get(key)} != {generation_info.get(key)}")
+
+    grid_pairs = phon_grid(generation_info['target_range'], generation_info['reference_range'])
+    grid_filenames = [f"{target_phon:.1f}-{ref_phon:.1f}_filter" for target_phon, ref_phon in grid_pairs]
+    grid_positions = {filename: index for index, filename in enumerate(grid_filenames)}
+
+    owners = {}  # 파일명 -> (샤드 디렉토리, 필터 정보, 매니페스트 항목)
+    duplicates = []
+    unexpected = []
+    shard_counts = {}
+    for order, shard_dir, metadata, manifest in with_metadata:
+        filters = metadata.get('filters', [])
+        shard_counts[shard_dir] = len(filters)
+        for filter_info in filters:
+            filename = filter_info['filename']
+            if filename not in grid_positions:
+                unexpected.append({'filename': filename, 'shard_dir': shard_dir})
+            elif filename in owners:
+                duplicates.append({'filename': filename, 'used': owners[filename][0], 'ignored': shard_dir})
+            else:
+                owners[filename] = (shard_dir, filter_info, manifest.get(filename))
+
+    missing = [filename for filename in grid_filenames if filename not in owners]
+    merged = [filename for filename in grid_filenames if filename in owners]
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    # 필터 파일
+    missing_files = []
+    if copy_files:
+        for filename in merged:
+            shard_dir = owners[filename][0]
+            found = False
+            for extension in OUTPUT_EXTENSIONS:
+                source = os.path.join(shard_dir, filename + extension)
+                if os.path.exists(source):
+                    _link_or_copy(source, os.path.join(output_dir, filename + extension))
+                    found = True
+            if not found:
+                missing_files.append(filename)
+
+    # 필터 뱅크 (격자 순서)
+    missing_bank = []
+    if bank_filename:
+        banks = {}
+        for _, shard_dir, _, _ in with_metadata:
+            bank_path = os.path.join(shard_dir, bank_filename)
+            if os.path.exists(bank_path):
+                banks[shard_dir] = FilterBank(bank_path)
+
+        bank_path = os.path.join(output_dir, bank_filename)
+        with FilterBankWriter(bank_path + ".tmp", generation_info['fs'], generation_info['numtaps'],
+                              len(merged), phase=generation_info.get('phase', 'linear')) as bank_writer:
+            for filename in merged:
+                target_phon, ref_phon = grid_pairs[grid_positions[filename]]
+                bank = banks.get(owners[filename][0])
+                if bank is None or (target_phon, ref_phon) not in bank:
+                    missing_bank.append(filename)
+                    continue
+                bank_writer.add(target_phon, ref_phon, bank.get(target_phon, ref_phon))
+        banks = None
+        os.replace(bank_path + ".tmp", bank_path)
+
+    # 매니페스트 (병합 디렉토리도 incremental=True 재실행에 그대로 사용 가능)
+    manifest_filename = os.path.join(output_dir, MANIFEST_FILENAME)
+    with open(manifest_filename + ".tmp", 'w', encoding='utf-8') as f:
+        for filename in merged:
+            entry = owners[filename][2]
+            if entry is not None:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    os.replace(manifest_filename + ".tmp", manifest_filename)
+
+    # 메타데이터 (타임스탬프는 가장 늦은 샤드 기준이라 같은 샤드 출력이면 결과도 같음)
+    generation_info.pop('shard', None)
+    generation_info['timestamp'] = max(metadata['generation_info']['timestamp']
+                                       for _, _, metadata, _ in with_metadata)
+    generation_info['total_filters'] = len(grid_pairs)
+    generation_info['merged_shards'] = len(shards)
+    metadata = {
+        'generation_info': generation_info,
+        'filters': [owners[filename][1] for filename in merged],
+    }
+    with open(os.path.join(output_dir, METADATA_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2, ensure_ascii=False)
+
+    shard_indices = [order for order, _, _, _ in with_metadata if order >= 0]
+    report = {
+        'expected': len(grid_pairs),
+        'merged': len(merged),
+        'missing': missing,
+        'duplicates': duplicates,
+        'unexpected': unexpected,
+        'missing_files': missing_files,
+        'missing_bank': missing_bank,
+        'shards': [{'shard_dir': shard_dir, 'index': order if order >= 0 else None,
+                    'filters': shard_counts.get(shard_dir), 'has_metadata': metadata is not None}
+                   for order, shard_dir, metadata, _ in shards],
+        'duplicate_shard_indices': sorted({index for index in shard_indices if shard_indices.count(index) > 1}),
+    }
+    with open(os.path.join(output_dir, REPORT_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return report
+
+
+def print_report(report, listed=10):
+    """병합 보고서 요약 출력 (목록은 앞의 listed개만)"""
+    print(f"\n=== 샤드 병합 결과 ===")
+    for shard in report['shards']:
+        state = f"{shard['filters']}개" if shard['has_metadata'] else "메타데이터 없음"
+        index = shard['index'] if shard['index'] is not None else "-"
+        print(f"샤드 {index}: {shard['shard_dir']} ({state})")
+    print(f"기대 필터: {report['expected']}개 | 병합: {report['merged']}개")
+    if report['duplicate_shard_indices']:
+        print(f"중복된 샤드 번호: {report['duplicate_shard_indices']}")
+
+    for key, label in (('missing', "누락된 필터"), ('duplicates', "중복된 필터"),
+                       ('unexpected', "격자 밖 필터"), ('missing_files', "파일 없는 필터"),
+                       ('missing_bank', "뱅크에 없는 필터")):
+        items = report[key]
+        if not items:
+            continue
+        print(f"{label}: {len(items)}개")
+        for item in items[:listed]:
+            print(f"  {item['filename'] if isinstance(item, dict) else item}")
+        if len(items) > listed:
+            print(f"  ... 외 {len(items) - listed}개")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="샤드별 필터 생성 결과 병합")
+    parser.add_argument("shard_dirs", nargs="+", help="샤드 출력 디렉토리")
+    parser.add_argument("--output", required=True, help="병합 출력 디렉토리")
+    parser.add_argument("--bank", help="병합할 필터 뱅크 파일명 (각 샤드 디렉토리 안)")
+    parser.add_argument("--metadata-only", action="store_true", help="WAV / CSV 파일은 링크 / 복사하지 않음")
+    parser.add_argument("--allow-missing", action="store_true", help="누락 / 중복이 있어도 종료 코드 0")
+    args = parser.parse_args()
+
+    report = merge_shards(args.shard_dirs, args.output, bank_filename=args.bank,
+                          copy_files=not args.metadata_only)
+    print_report(report)
+    print(f"\n보고서 저장: {os.path.join(args.output, REPORT_FILENAME)}")
+
+    incomplete = (report['missing'] or report['duplicates'] or report['missing_files']
+                  or report['missing_bank'])
+    return 1 if incomplete and not args.allow_missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())